@@ -1,22 +1,84 @@
 import os
+import json
+import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, List, Optional
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.contract_service import analyze_contract, get_analysis_metadata
+from app.services.contract_service import (
+    analyze_contract,
+    analyze_parts_batch,
+    stream_contract_analysis,
+    get_analysis_metadata,
+    get_analysis_history,
+    get_latest_stored_analysis,
+    get_coalescing_stats
+)
+from app.services.analysis_cache import get_analysis_cache
+from app.services.llm_gateway import get_gateway_stats
+from app.services.postgrest_client import get_postgrest_stats
+from app.services.contract_repository import get_contract_store_stats
+from app.services.astra_service import rebuild_contract_query_tables, stream_contract_information, get_contract_statistics
+from app.services.contract_statistics import recompute_contract_statistics, get_contract_statistics_stats
+from app.services.contract_text_index import search_contract_text, get_contract_text_index_stats
+from app.services.clause_retrieval import get_clause_retrieval_stats
+from app.services.contract_cache import get_contract_cache_stats
+from app.services.master_snapshot import get_snapshot_stats
+from app.services.supabase_service import PART_PROFILES, get_parts_information
+from app.services.supplier_index import get_supplier_index, get_supplier_index_stats
+from app.services.supplier_aggregates import get_supplier_aggregate, get_supplier_aggregate_stats
+from app.services.job_service import submit_analysis_job, get_job, get_latest_job_for_part, get_job_stats
+from app.services.prewarm_service import trigger_prewarm, get_prewarm_status
 from app.utils.validation import validate_part_number, sanitize_part_number
-from app.utils.exceptions import ContractAnalysisError
+from app.utils.exceptions import ContractAnalysisError, ContractStoreError
 
 router = APIRouter()
 
+# Largest number of part numbers accepted by the batch endpoint
+BATCH_MAX_PARTS = int(os.getenv("BATCH_MAX_PARTS", "500"))
+
+# Largest number of part numbers accepted by the bulk part lookup
+BULK_PARTS_MAX = int(os.getenv("BULK_PARTS_MAX", "1000"))
+
+# Largest Cassandra page size accepted by the contract export
+CONTRACT_EXPORT_MAX_FETCH_SIZE = int(os.getenv("CONTRACT_EXPORT_MAX_FETCH_SIZE", "5000"))
+
 # Pydantic models
 class ContractAnalysisRequest(BaseModel):
     partNumber: str
 
+class BatchAnalysisRequest(BaseModel):
+    partNumbers: List[str]
+
+class BulkPartsRequest(BaseModel):
+    partNumbers: List[str]
+    profile: str = "pricing"
+
 class StatusResponse(BaseModel):
     partNumber: str
     status: str
     timestamp: str
+    jobId: Optional[str] = None
+    submittedAt: Optional[str] = None
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    queueSeconds: Optional[float] = None
+    runSeconds: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[dict] = None
+
+class JobResponse(BaseModel):
+    jobId: str
+    partNumber: str
+    status: str
+    submittedAt: str
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    queueSeconds: Optional[float] = None
+    runSeconds: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[dict] = None
 
 class FormatsResponse(BaseModel):
     supportedFormats: List[dict]
@@ -111,6 +173,156 @@ async def analyze_contract_endpoint(request: ContractAnalysisRequest):
             }
         )
 
+@router.post("/analyze/stream")
+async def analyze_contract_stream_endpoint(request: ContractAnalysisRequest):
+    """
+    Analyze contract for a given part number, streaming results as Server-Sent Events
+    """
+    return create_analysis_event_stream(request.partNumber)
+
+@router.get("/analyze/stream")
+async def analyze_contract_stream_get_endpoint(partNumber: str):
+    """
+    EventSource-friendly variant of the streaming analysis endpoint
+    """
+    return create_analysis_event_stream(partNumber)
+
+def create_analysis_event_stream(part_number: str) -> StreamingResponse:
+    """
+    Validate the part number and wrap the streaming analysis in an SSE response
+    """
+    validation_result = validate_part_number(part_number)
+    if not validation_result["is_valid"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid part number format",
+                "message": validation_result["message"],
+                "partNumber": part_number,
+                "suggestions": [
+                    "Ensure part number starts with 'PA-'",
+                    "Ensure part number is exactly 8 characters long",
+                    "Ensure suffix is exactly 5 digits"
+                ]
+            }
+        )
+
+    print(f"🔍 Starting streamed analysis for part number: {part_number}")
+
+    async def event_stream():
+        try:
+            async for event, data in stream_contract_analysis(part_number):
+                yield format_sse_event(event, data)
+        except ContractAnalysisError as error:
+            print(f"Contract analysis error: {error}")
+            yield format_sse_event("error", {
+                "error": "Analysis failed",
+                "code": getattr(error, 'code', None),
+                "message": str(error),
+                "partNumber": part_number,
+                "supplier": getattr(error, 'supplier', None)
+            })
+        except Exception as error:
+            print(f"Unexpected error during streamed analysis: {error}")
+            yield format_sse_event("error", {
+                "error": "Internal server error",
+                "message": "An unexpected error occurred during analysis",
+                "partNumber": part_number
+            })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+def format_sse_event(event: str, data: Any) -> str:
+    """
+    Format a Server-Sent Event frame
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/analyze/batch")
+async def analyze_contracts_batch_endpoint(request: BatchAnalysisRequest):
+    """
+    Analyze many part numbers, streaming one NDJSON line per part as it completes
+    """
+    if not request.partNumbers or len(request.partNumbers) > BATCH_MAX_PARTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid batch size",
+                "message": f"partNumbers must contain between 1 and {BATCH_MAX_PARTS} part numbers (got {len(request.partNumbers)})"
+            }
+        )
+
+    print(f"📦 Starting batch analysis for {len(request.partNumbers)} part numbers")
+
+    async def ndjson_stream():
+        try:
+            async for item in analyze_parts_batch(request.partNumbers):
+                yield json.dumps(item, default=str) + "\n"
+        except Exception as error:
+            print(f"Unexpected error during batch analysis: {error}")
+            yield json.dumps({
+                "success": False,
+                "error": {"code": "BATCH_FAILED", "message": "An unexpected error occurred during batch analysis"}
+            }) + "\n"
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+@router.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_analysis_job_endpoint(request: ContractAnalysisRequest):
+    """
+    Queue an analysis for background processing and return its job id immediately
+    """
+    validation_result = validate_part_number(request.partNumber)
+    if not validation_result["is_valid"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid part number format",
+                "message": validation_result["message"],
+                "partNumber": request.partNumber
+            }
+        )
+
+    try:
+        job = await submit_analysis_job(sanitize_part_number(request.partNumber))
+        return JobResponse(**job)
+
+    except ContractAnalysisError as error:
+        print(f"Job submission error: {error}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "Job submission failed",
+                "code": error.code,
+                "message": str(error),
+                "partNumber": request.partNumber
+            }
+        )
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_analysis_job_endpoint(job_id: str):
+    """
+    Get an analysis job's status, timings and result when ready
+    """
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": "Job not found",
+                "message": f"No analysis job with id {job_id}"
+            }
+        )
+
+    return JobResponse(**job)
+
 @router.get("/status/{part_number}", response_model=StatusResponse)
 async def get_analysis_status(part_number: str):
     """
@@ -128,11 +340,29 @@ async def get_analysis_status(part_number: str):
                 }
             )
 
-        # This could be extended to check analysis status from a cache or database
+        # Report the most recent analysis job for this part, then fall back to stored analyses
+        job = await get_latest_job_for_part(sanitize_part_number(part_number))
+        if job is None:
+            stored = await get_latest_stored_analysis(part_number)
+            if stored is None:
+                return StatusResponse(
+                    partNumber=part_number,
+                    status="not_started",
+                    timestamp=datetime.now().isoformat()
+                )
+
+            return StatusResponse(
+                partNumber=part_number,
+                status="done",
+                timestamp=datetime.now().isoformat(),
+                finishedAt=stored["createdAt"],
+                runSeconds=stored["latencyMs"] / 1000 if stored["latencyMs"] is not None else None,
+                result=stored["result"]
+            )
+
         return StatusResponse(
-            partNumber=part_number,
-            status="completed",  # This would be dynamic in a real implementation
-            timestamp=datetime.now().isoformat()
+            timestamp=datetime.now().isoformat(),
+            **job
         )
 
     except HTTPException:
@@ -147,6 +377,217 @@ async def get_analysis_status(part_number: str):
             }
         )
 
+@router.get("/metadata/{part_number}")
+async def get_analysis_metadata_endpoint(part_number: str):
+    """
+    Get when a part was last analyzed, and with which model and inputs
+    """
+    validation_result = validate_part_number(part_number)
+    if not validation_result["is_valid"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid part number format",
+                "message": validation_result["message"]
+            }
+        )
+
+    try:
+        metadata = await get_analysis_metadata(part_number)
+    except ContractAnalysisError as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error": "Metadata lookup failed",
+                "message": str(error)
+            }
+        )
+
+    if metadata is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": "Part not found",
+                "message": f"Part number {part_number} not found",
+                "partNumber": part_number
+            }
+        )
+
+    return metadata
+
+@router.get("/history/{part_number}")
+async def get_analysis_history_endpoint(part_number: str, limit: int = 20, includeResults: bool = False):
+    """
+    Get the stored analyses of a part number, newest first
+    """
+    validation_result = validate_part_number(part_number)
+    if not validation_result["is_valid"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid part number format",
+                "message": validation_result["message"]
+            }
+        )
+
+    history = await get_analysis_history(part_number, limit=max(1, min(limit, 200)), include_results=includeResults)
+    return {
+        "partNumber": part_number,
+        "count": len(history),
+        "analyses": history
+    }
+
+@router.post("/parts/bulk")
+async def get_parts_bulk_endpoint(request: BulkPartsRequest):
+    """
+    Look up many part numbers at once, keyed by part number
+    """
+    if request.profile not in PART_PROFILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid profile",
+                "message": f"profile must be one of {', '.join(PART_PROFILES)} (got {request.profile})"
+            }
+        )
+
+    if not request.partNumbers or len(request.partNumbers) > BULK_PARTS_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Invalid batch size",
+                "message": f"partNumbers must contain between 1 and {BULK_PARTS_MAX} part numbers (got {len(request.partNumbers)})"
+            }
+        )
+
+    part_numbers: List[str] = []
+    invalid: List[str] = []
+    for part_number in request.partNumbers:
+        sanitized_part_number = sanitize_part_number(part_number)
+        if not validate_part_number(sanitized_part_number)["is_valid"]:
+            invalid.append(part_number)
+        elif sanitized_part_number not in part_numbers:
+            part_numbers.append(sanitized_part_number)
+
+    try:
+        parts = await get_parts_information(part_numbers, profile=request.profile) if part_numbers else {}
+    except Exception as error:
+        print(f"Bulk part lookup error: {error}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "Part lookup unavailable",
+                "message": str(error)
+            }
+        )
+
+    return {
+        "profile": request.profile,
+        "count": len(parts),
+        "parts": parts,
+        "notFound": [part_number for part_number in part_numbers if part_number not in parts],
+        "invalid": invalid
+    }
+
+@router.get("/suppliers/search")
+async def search_suppliers_endpoint(q: str, limit: int = 10):
+    """
+    Find suppliers by name with prefix, substring and typo-tolerant matching, best match first
+    """
+    if not q.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Missing query",
+                "message": "Query parameter q must not be empty"
+            }
+        )
+
+    try:
+        index = get_supplier_index()
+    except Exception as error:
+        print(f"Supplier search error: {error}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "Supplier search unavailable",
+                "message": str(error)
+            }
+        )
+
+    matches = index.search(q, limit=max(1, min(limit, 100)))
+    return {
+        "query": q,
+        "count": len(matches),
+        "suppliers": matches
+    }
+
+@router.get("/suppliers/{supplier_name}/statistics")
+async def get_supplier_statistics_endpoint(supplier_name: str):
+    """
+    Get a supplier's precomputed part, spend, volume and price-index rollup
+    """
+    try:
+        record = await get_supplier_aggregate(supplier_name)
+        matched_by = "exact"
+
+        # Not an exact supplier name: resolve it through the search index first
+        if record is None:
+            index = get_supplier_index()
+            matches = index.search(supplier_name, limit=1)
+            if matches:
+                record = await get_supplier_aggregate(matches[0]["supplierName"])
+                matched_by = matches[0]["matchType"]
+
+    except Exception as error:
+        print(f"Supplier statistics error: {error}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "Supplier statistics unavailable",
+                "message": str(error)
+            }
+        )
+
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "error": "Supplier not found",
+                "message": f"No supplier matches {supplier_name}"
+            }
+        )
+
+    return {
+        **record,
+        "matchedBy": matched_by
+    }
+
+@router.get("/suppliers/{supplier_name}/contracts/export")
+async def export_supplier_contracts_endpoint(supplier_name: str, fetchSize: Optional[int] = None):
+    """
+    Stream every contract of a supplier as NDJSON, one Cassandra page in memory at a time
+    """
+    fetch_size = max(1, min(fetchSize, CONTRACT_EXPORT_MAX_FETCH_SIZE)) if fetchSize else None
+
+    async def ndjson_stream():
+        exported = 0
+        try:
+            async for page in stream_contract_information(supplier_name, fetch_size=fetch_size):
+                yield "".join(contract.to_json() + "\n" for contract in page)
+                exported += len(page)
+        except Exception as error:
+            print(f"Contract export error after {exported} contracts: {error}")
+            yield json.dumps({
+                "success": False,
+                "error": {"code": "CONTRACT_EXPORT_FAILED", "message": str(error), "exported": exported}
+            }) + "\n"
+            return
+
+        print(f"📤 Exported {exported} contracts for supplier: {supplier_name}")
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
 @router.get("/formats", response_model=FormatsResponse)
 async def get_supported_formats():
     """
@@ -168,6 +609,163 @@ async def get_supported_formats():
         }
     )
 
+@router.post("/prewarm", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_prewarm_endpoint():
+    """
+    Start a pre-warm run for the top-ranked parts now, outside the scheduled window
+    """
+    if not trigger_prewarm():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "error": "Pre-warm already running",
+                "message": "A pre-warm run is already in progress"
+            }
+        )
+
+    return get_prewarm_status()
+
+@router.get("/prewarm/status")
+async def get_prewarm_status_endpoint():
+    """
+    Get pre-warm scheduler state, progress and estimated cost of the latest run
+    """
+    return get_prewarm_status()
+
+@router.post("/store/rebuild")
+async def rebuild_contract_query_tables_endpoint():
+    """
+    Copy the base contracts table into the supplier, type and value query tables and delete their stale rows
+    """
+    try:
+        result = await rebuild_contract_query_tables()
+    except ContractStoreError as error:
+        print(f"Contract query table rebuild error: {error}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "Contract store unavailable",
+                "message": str(error)
+            }
+        )
+
+    return {
+        "rebuilt": result["rows"],
+        "staleRowsDeleted": result["staleRowsDeleted"],
+        "suppliers": result["suppliers"],
+        "queryTables": get_contract_store_stats()["queryTables"],
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/search")
+async def search_contract_text_endpoint(
+    q: str,
+    supplier: Optional[str] = None,
+    contractType: Optional[str] = None,
+    limit: int = 20
+):
+    """
+    Full-text search over contract terms, clauses, risks and opportunities ("quoted phrases" must match exactly),
+    ranked by BM25, with supplier and contract type facets
+    """
+    if not q.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Missing query",
+                "message": "Query parameter q must not be empty"
+            }
+        )
+
+    start_time = time.perf_counter()
+    try:
+        result = await search_contract_text(q, limit=max(1, min(limit, 100)), supplier_name=supplier, contract_type=contractType)
+    except ContractAnalysisError as error:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "Contract search unavailable",
+                "message": str(error)
+            }
+        )
+    except ContractStoreError as error:
+        print(f"Contract search error: {error}")
+        result = None
+
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "Contract search unavailable",
+                "message": "The contract text index needs a configured, reachable contract store"
+            }
+        )
+
+    return {
+        "query": q,
+        "tookMs": round((time.perf_counter() - start_time) * 1000, 2),
+        **result
+    }
+
+@router.get("/statistics")
+async def get_contract_statistics_endpoint():
+    """
+    Get contract count and value per contract type, served from memory within the staleness bound
+    """
+    return await get_contract_statistics()
+
+@router.post("/statistics/reconcile")
+async def reconcile_contract_statistics_endpoint():
+    """
+    Recompute contract statistics with a full table scan, replacing the incrementally maintained ones
+    """
+    try:
+        statistics = await recompute_contract_statistics()
+    except ContractStoreError as error:
+        print(f"Contract statistics reconcile error: {error}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "error": "Contract store unavailable",
+                "message": str(error)
+            }
+        )
+
+    if statistics is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "error": "Contract store not configured",
+                "message": "Statistics are mock data when no contract store is configured"
+            }
+        )
+
+    return statistics.render()
+
+@router.get("/stats")
+async def get_service_stats():
+    """
+    Get analysis cache, request coalescing, job, pre-warm, LLM gateway, PostgREST, contract store/cache/statistics/text index, clause retrieval, MASTER_FILE snapshot and supplier index/aggregate counters
+    """
+    cache = get_analysis_cache()
+    return {
+        "analysisCache": await cache.stats() if cache is not None else {"enabled": False},
+        "requestCoalescing": get_coalescing_stats(),
+        "jobs": await get_job_stats(),
+        "prewarm": get_prewarm_status(),
+        "llmGateway": get_gateway_stats(),
+        "postgrest": get_postgrest_stats(),
+        "contractStore": get_contract_store_stats(),
+        "supplierContractCache": get_contract_cache_stats(),
+        "contractStatistics": get_contract_statistics_stats(),
+        "contractTextIndex": get_contract_text_index_stats(),
+        "clauseRetrieval": get_clause_retrieval_stats(),
+        "masterSnapshot": get_snapshot_stats(),
+        "supplierIndex": get_supplier_index_stats(),
+        "supplierAggregates": get_supplier_aggregate_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @router.post("/test-simple")
 async def test_simple_endpoint():
     """
@@ -1,26 +1,71 @@
 import os
 import json
-from typing import Dict, Any, List
-from openai import OpenAI
+import time
+import asyncio
+from typing import Dict, Any, AsyncIterator, List, Tuple
+from app.services.llm_gateway import chat_completion, stream_chat_completion, OPENAI_MODEL
+from app.services.analysis_cache import get_analysis_cache, make_cache_key
+from app.services.clause_retrieval import select_prompt_context, PROMPT_CONTEXT_MODE
+from app.services.prompt_builder import count_tokens, format_part_context, format_response_schema, ANALYSIS_RESPONSE_SCHEMA, PROMPT_CONTRACT_TOKEN_BUDGET
+from app.services.section_analysis import SECTION_SPECS, iter_sections_parallel, analyze_sections_parallel, is_complete_analysis
+from app.utils.json_stream import TopLevelJsonSectionParser, extract_json_object
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# "monolithic" sends one prompt for all sections; "parallel" runs one prompt per section concurrently
+AI_ANALYSIS_MODE = os.getenv("AI_ANALYSIS_MODE", "monolithic").lower()
+
+# Bump whenever the prompt or response schema changes so cached analyses are not reused
+PROMPT_VERSION = "v3"
 
 async def analyze_with_ai(part_info: Dict[str, Any], contract_info: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Analyze contract data using OpenAI
     """
     try:
-        print("🤖 Starting AI analysis...")
+        print(f"🤖 Starting AI analysis ({AI_ANALYSIS_MODE} mode)...")
+        
+        # Serve repeat analyses of unchanged inputs from the cache
+        cache = get_analysis_cache()
+        cache_key = get_analysis_cache_key(part_info, contract_info)
+        if cache is not None:
+            cached_result = await cache.get(cache_key)
+            if cached_result is not None:
+                print(f"⚡ AI analysis served from cache ({cache_key[:12]})")
+                return mark_cached(cached_result)
+        
+        if AI_ANALYSIS_MODE == "parallel":
+            analysis_result = await analyze_sections_parallel(
+                part_info,
+                contract_info,
+                get_mock_ai_analysis(part_info, contract_info)
+            )
+            if cache is not None and is_complete_analysis(analysis_result):
+                await cache.set(cache_key, analysis_result)
+            
+            print("✅ AI analysis completed")
+            return analysis_result
+        
+        start_time = time.perf_counter()
         
         # Prepare the analysis prompt
-        prompt = create_analysis_prompt(part_info, contract_info)
+        prompt, prompt_stats = await build_analysis_prompt(part_info, contract_info)
         
         # Call OpenAI API
         response = await call_openai_api(prompt)
         
         # Parse and structure the response
-        analysis_result = parse_ai_response(response)
+        try:
+            analysis_result = extract_json_object(response)
+        except Exception as error:
+            print(f"Error parsing AI response: {error}")
+            return get_unavailable_analysis()
+        
+        analysis_result["analysisMetadata"] = {
+            "mode": "monolithic",
+            "totalSeconds": round(time.perf_counter() - start_time, 3),
+            "promptStats": prompt_stats
+        }
+        if cache is not None:
+            await cache.set(cache_key, analysis_result)
         
         print("✅ AI analysis completed")
         return analysis_result
@@ -30,155 +75,210 @@ async def analyze_with_ai(part_info: Dict[str, Any], contract_info: List[Dict[st
         # Return mock analysis for testing
         return get_mock_ai_analysis(part_info, contract_info)
 
+def get_analysis_cache_key(part_info: Dict[str, Any], contract_info: List[Dict[str, Any]]) -> str:
+    """
+    Cache key for an analysis under the current model, prompt version, modes and token budget
+    """
+    return make_cache_key(
+        part_info,
+        contract_info,
+        OPENAI_MODEL,
+        f"{AI_ANALYSIS_MODE}-{PROMPT_VERSION}-{PROMPT_CONTEXT_MODE}-{PROMPT_CONTRACT_TOKEN_BUDGET}"
+    )
+
+def mark_cached(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flag a cached analysis in its metadata
+    """
+    analysis["analysisMetadata"] = {**analysis.get("analysisMetadata", {}), "cached": True}
+    return analysis
+
 def create_analysis_prompt(part_info: Dict[str, Any], contract_info: List[Dict[str, Any]]) -> str:
     """
     Create a comprehensive prompt for AI analysis
     """
+    prompt, _ = render_analysis_prompt(part_info, contract_info)
+    return prompt
+
+async def build_analysis_prompt(part_info: Dict[str, Any], contract_info: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """
+    render_analysis_prompt in a worker thread, so building the contract context doesn't block the event loop
+    """
+    return await asyncio.to_thread(render_analysis_prompt, part_info, contract_info)
+
+def render_analysis_prompt(part_info: Dict[str, Any], contract_info: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Create the analysis prompt within the contract token budget, returning it with its prompt stats
+    """
+    # The single prompt answers every section, so it retrieves for all section queries at once
+    queries = [spec["retrieval_query"] for spec in SECTION_SPECS.values()]
+    contract_context, prompt_stats = select_prompt_context(contract_info, queries)
+
     prompt = f"""
     You are an expert contract analyst and procurement specialist. Analyze the following contract data and provide strategic insights.
 
-    PART INFORMATION:
-    - Part Number: {part_info.get('PartNumber', 'N/A')}
-    - Part Name: {part_info.get('partname', 'N/A')}
-    - Supplier: {part_info.get('suppliername', 'N/A')}
-    - Material: {part_info.get('material', 'N/A')}
-    - Currency: {part_info.get('currency', 'N/A')}
-    - Current Pricing: {json.dumps(part_info.get('currentPricing', {}), indent=2)}
+    {format_part_context(part_info)}
 
-    CONTRACT INFORMATION:
-    {json.dumps(contract_info, indent=2)}
+    {contract_context}
 
     Please provide a comprehensive analysis in the following JSON format:
 
-    {{
-        "dateRangeOfContracts": "Summary of contract date ranges",
-        "keyClausesIdentification": {{
-            "critical_clauses": ["List of critical contract clauses"],
-            "risk_clauses": ["Clauses that pose risks"],
-            "opportunity_clauses": ["Clauses that present opportunities"]
-        }},
-        "riskAssessmentAndMitigation": {{
-            "high_risks": ["List of high-risk factors"],
-            "medium_risks": ["List of medium-risk factors"],
-            "low_risks": ["List of low-risk factors"],
-            "mitigation_strategies": ["Recommended mitigation strategies"]
-        }},
-        "contractBenchmarkingAndPrecedentBasedInsights": {{
-            "benchmark_metrics": ["Key metrics for benchmarking"],
-            "industry_comparisons": ["Industry standard comparisons"],
-            "best_practices": ["Recommended best practices"]
-        }},
-        "negotiationLeveragePoints": {{
-            "strengths": ["Your negotiation strengths"],
-            "weaknesses": ["Areas of weakness"],
-            "opportunities": ["Negotiation opportunities"],
-            "threats": ["Potential threats"]
-        }},
-        "complianceCheck": {{
-            "regulatory_requirements": ["Regulatory compliance requirements"],
-            "internal_policies": ["Internal policy compliance"],
-            "recommendations": ["Compliance recommendations"]
-        }},
-        "summaryAndStrategicRecommendations": {{
-            "executive_summary": "High-level summary of findings",
-            "key_recommendations": ["Strategic recommendations"],
-            "next_steps": ["Recommended next steps"],
-            "priority_actions": ["Priority actions to take"]
-        }}
-    }}
+    {format_response_schema(list(ANALYSIS_RESPONSE_SCHEMA.keys()))}
 
     Focus on practical, actionable insights that can help with contract negotiation and risk management.
     """
     
-    return prompt
+    prompt_stats["promptTokens"] = count_tokens(prompt)
+    print(f"🧮 Prompt: {prompt_stats['promptTokens']} tokens, {prompt_stats['contractsIncluded']}/{prompt_stats['contractsTotal']} contracts")
+    
+    return prompt, prompt_stats
+
+async def stream_ai_analysis(
+    part_info: Dict[str, Any],
+    contract_info: List[Dict[str, Any]]
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Analyze contract data using OpenAI, yielding each top-level section as soon as it is generated
+    """
+    emitted: Dict[str, Any] = {}
+    try:
+        print(f"🤖 Starting streamed AI analysis ({AI_ANALYSIS_MODE} mode)...")
+        
+        cache = get_analysis_cache()
+        cache_key = get_analysis_cache_key(part_info, contract_info)
+        if cache is not None:
+            cached_result = await cache.get(cache_key)
+            if cached_result is not None:
+                print(f"⚡ AI analysis served from cache ({cache_key[:12]})")
+                for section, value in mark_cached(cached_result).items():
+                    yield section, value
+                return
+        
+        if AI_ANALYSIS_MODE == "parallel":
+            # Sections are yielded in completion order
+            fallback_analysis = get_mock_ai_analysis(part_info, contract_info)
+            async for section, value in iter_sections_parallel(part_info, contract_info, fallback_analysis):
+                emitted[section] = value
+                yield section, value
+            
+            if cache is not None and is_complete_analysis(emitted):
+                await cache.set(cache_key, emitted)
+            
+            print("✅ Streamed AI analysis completed")
+            return
+        
+        start_time = time.perf_counter()
+        prompt, prompt_stats = await build_analysis_prompt(part_info, contract_info)
+        parser = TopLevelJsonSectionParser()
+        chunks = []
+        
+        async for delta in stream_chat_completion(build_analysis_messages(prompt), temperature=0.3, max_tokens=4000):
+            chunks.append(delta)
+            for section, value in parser.feed(delta):
+                emitted[section] = value
+                yield section, value
+        
+        # Reconcile with a full parse so the final payload matches the non-streaming path
+        response = "".join(chunks)
+        try:
+            analysis_result = extract_json_object(response)
+        except Exception as error:
+            print(f"Error parsing AI response: {error}")
+            analysis_result = get_unavailable_analysis()
+        else:
+            analysis_result["analysisMetadata"] = {
+                "mode": "monolithic",
+                "totalSeconds": round(time.perf_counter() - start_time, 3),
+                "promptStats": prompt_stats
+            }
+            if cache is not None:
+                await cache.set(cache_key, analysis_result)
+        
+        for section, value in analysis_result.items():
+            if section not in emitted:
+                emitted[section] = value
+                yield section, value
+        
+        print("✅ Streamed AI analysis completed")
+        
+    except Exception as error:
+        print(f"Error in streamed AI analysis: {error}")
+        # Fill in whatever the model did not deliver with the mock analysis
+        for section, value in get_mock_ai_analysis(part_info, contract_info).items():
+            if section not in emitted:
+                emitted[section] = value
+                yield section, value
+
+def build_analysis_messages(prompt: str) -> List[Dict[str, str]]:
+    """
+    Build the chat messages for an analysis prompt
+    """
+    return [
+        {
+            "role": "system",
+            "content": "You are an expert contract analyst and procurement specialist. Provide detailed, practical analysis in JSON format."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
 
 async def call_openai_api(prompt: str) -> str:
     """
-    Call OpenAI API for analysis
+    Call OpenAI API for analysis through the async LLM gateway
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert contract analyst and procurement specialist. Provide detailed, practical analysis in JSON format."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
+        return await chat_completion(
+            messages=build_analysis_messages(prompt),
             temperature=0.3,
             max_tokens=4000
         )
         
-        content = response.choices[0].message.content
-        if content is None:
-            raise ValueError("OpenAI API returned empty response")
-        return content
-        
     except Exception as error:
         print(f"Error calling OpenAI API: {error}")
         raise error
 
-def parse_ai_response(response: str) -> Dict[str, Any]:
+def get_unavailable_analysis() -> Dict[str, Any]:
     """
-    Parse the AI response and extract structured data
+    Structured placeholder returned when the AI response cannot be parsed
     """
-    try:
-        # Try to extract JSON from the response
-        if "```json" in response:
-            json_start = response.find("```json") + 7
-            json_end = response.find("```", json_start)
-            json_str = response[json_start:json_end].strip()
-        else:
-            # Try to find JSON in the response
-            start_idx = response.find("{")
-            end_idx = response.rfind("}") + 1
-            json_str = response[start_idx:end_idx]
-        
-        return json.loads(json_str)
-        
-    except Exception as error:
-        print(f"Error parsing AI response: {error}")
-        # Return a structured error response
-        return {
-            "dateRangeOfContracts": "Unable to determine",
-            "keyClausesIdentification": {
-                "critical_clauses": ["Analysis unavailable"],
-                "risk_clauses": ["Analysis unavailable"],
-                "opportunity_clauses": ["Analysis unavailable"]
-            },
-            "riskAssessmentAndMitigation": {
-                "high_risks": ["Analysis unavailable"],
-                "medium_risks": ["Analysis unavailable"],
-                "low_risks": ["Analysis unavailable"],
-                "mitigation_strategies": ["Analysis unavailable"]
-            },
-            "contractBenchmarkingAndPrecedentBasedInsights": {
-                "benchmark_metrics": ["Analysis unavailable"],
-                "industry_comparisons": ["Analysis unavailable"],
-                "best_practices": ["Analysis unavailable"]
-            },
-            "negotiationLeveragePoints": {
-                "strengths": ["Analysis unavailable"],
-                "weaknesses": ["Analysis unavailable"],
-                "opportunities": ["Analysis unavailable"],
-                "threats": ["Analysis unavailable"]
-            },
-            "complianceCheck": {
-                "regulatory_requirements": ["Analysis unavailable"],
-                "internal_policies": ["Analysis unavailable"],
-                "recommendations": ["Analysis unavailable"]
-            },
-            "summaryAndStrategicRecommendations": {
-                "executive_summary": "AI analysis was unable to process the data",
-                "key_recommendations": ["Analysis unavailable"],
-                "next_steps": ["Analysis unavailable"],
-                "priority_actions": ["Analysis unavailable"]
-            }
+    return {
+        "dateRangeOfContracts": "Unable to determine",
+        "keyClausesIdentification": {
+            "critical_clauses": ["Analysis unavailable"],
+            "risk_clauses": ["Analysis unavailable"],
+            "opportunity_clauses": ["Analysis unavailable"]
+        },
+        "riskAssessmentAndMitigation": {
+            "high_risks": ["Analysis unavailable"],
+            "medium_risks": ["Analysis unavailable"],
+            "low_risks": ["Analysis unavailable"],
+            "mitigation_strategies": ["Analysis unavailable"]
+        },
+        "contractBenchmarkingAndPrecedentBasedInsights": {
+            "benchmark_metrics": ["Analysis unavailable"],
+            "industry_comparisons": ["Analysis unavailable"],
+            "best_practices": ["Analysis unavailable"]
+        },
+        "negotiationLeveragePoints": {
+            "strengths": ["Analysis unavailable"],
+            "weaknesses": ["Analysis unavailable"],
+            "opportunities": ["Analysis unavailable"],
+            "threats": ["Analysis unavailable"]
+        },
+        "complianceCheck": {
+            "regulatory_requirements": ["Analysis unavailable"],
+            "internal_policies": ["Analysis unavailable"],
+            "recommendations": ["Analysis unavailable"]
+        },
+        "summaryAndStrategicRecommendations": {
+            "executive_summary": "AI analysis was unable to process the data",
+            "key_recommendations": ["Analysis unavailable"],
+            "next_steps": ["Analysis unavailable"],
+            "priority_actions": ["Analysis unavailable"]
         }
+    }
 
 def get_mock_ai_analysis(part_info: Dict[str, Any], contract_info: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -0,0 +1,235 @@
+import os
+import json
+import copy
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from app.utils.sqlite import open_sqlite
+
+# Analysis cache configuration
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "512"))
+ANALYSIS_CACHE_DB_PATH = os.getenv("ANALYSIS_CACHE_DB_PATH")  # Optional on-disk tier
+ANALYSIS_CACHE_MAX_DISK_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_DISK_ENTRIES", "10000"))
+
+def normalize_for_key(value: Any) -> Any:
+    """
+    Normalize a value so that equivalent inputs serialize identically
+    """
+    if isinstance(value, dict):
+        return {
+            str(key): normalize_for_key(item)
+            for key, item in value.items()
+            if item is not None
+        }
+    if isinstance(value, (list, tuple, set)):
+        return [normalize_for_key(item) for item in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+def make_cache_key(
+    part_info: Dict[str, Any],
+    contract_info: List[Dict[str, Any]],
+    model: str,
+    prompt_version: str
+) -> str:
+    """
+    Build a stable content hash of the analysis inputs
+    """
+    contracts = sorted(
+        json.dumps(normalize_for_key(contract), sort_keys=True, separators=(',', ':'))
+        for contract in contract_info
+    )
+    payload = json.dumps(
+        {
+            "model": model,
+            "promptVersion": prompt_version,
+            "part": normalize_for_key(part_info),
+            "contracts": contracts
+        },
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class AnalysisCache:
+    """Two-tier (memory LRU + optional SQLite) cache for AI analyses"""
+
+    def __init__(
+        self,
+        max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = ANALYSIS_CACHE_TTL_SECONDS,
+        db_path: Optional[str] = ANALYSIS_CACHE_DB_PATH,
+        max_disk_entries: int = ANALYSIS_CACHE_MAX_DISK_ENTRIES
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._stats = {
+            "memoryHits": 0,
+            "diskHits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "diskEvictions": 0,
+            "expirations": 0
+        }
+
+        if db_path:
+            self._db = open_sqlite(db_path)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_access ON analysis_cache (last_access)"
+            )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up an analysis, promoting disk hits into memory
+        """
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if now - created_at <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._stats["memoryHits"] += 1
+                return copy.deepcopy(value)
+
+            del self._memory[key]
+            self._stats["expirations"] += 1
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._disk_get, key, now)
+            if row is not None:
+                created_at, value = row
+                self._remember(key, created_at, value)
+                self._stats["diskHits"] += 1
+                return copy.deepcopy(value)
+
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store an analysis in every configured tier
+        """
+        created_at = time.time()
+        self._remember(key, created_at, copy.deepcopy(value))
+        self._stats["sets"] += 1
+
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, json.dumps(value, default=str), created_at)
+
+    async def clear(self) -> None:
+        """
+        Drop every cached analysis
+        """
+        self._memory.clear()
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_clear)
+
+    async def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters and tier sizes
+        """
+        hits = self._stats["memoryHits"] + self._stats["diskHits"]
+        lookups = hits + self._stats["misses"]
+
+        disk_entries = None
+        if self._db is not None:
+            disk_entries = await asyncio.to_thread(self._disk_count)
+
+        return {
+            **self._stats,
+            "hits": hits,
+            "hitRate": round(hits / lookups, 4) if lookups else 0.0,
+            "memoryEntries": len(self._memory),
+            "maxEntries": self.max_entries,
+            "diskEntries": disk_entries,
+            "ttlSeconds": self.ttl_seconds
+        }
+
+    def _remember(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._db.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self._stats["expirations"] += 1
+                return None
+
+            self._db.execute("UPDATE analysis_cache SET last_access = ? WHERE key = ?", (now, key))
+            return created_at, json.loads(value)
+
+    def _disk_count(self) -> int:
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+
+    def _disk_clear(self) -> None:
+        with self._db_lock:
+            self._db.execute("DELETE FROM analysis_cache")
+
+    def _disk_set(self, key: str, value: str, created_at: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, created_at, created_at)
+            )
+            self._db.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (created_at - self.ttl_seconds,)
+            )
+            overflow = self._db.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0] - self.max_disk_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM analysis_cache WHERE key IN "
+                    "(SELECT key FROM analysis_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self._stats["diskEvictions"] += overflow
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """
+    Get the shared analysis cache (None when caching is disabled)
+    """
+    global _analysis_cache
+
+    if not ANALYSIS_CACHE_ENABLED:
+        return None
+
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache()
+        tier = f"memory + SQLite ({ANALYSIS_CACHE_DB_PATH})" if ANALYSIS_CACHE_DB_PATH else "memory"
+        print(f"🗄️ Analysis cache enabled ({tier}, TTL {ANALYSIS_CACHE_TTL_SECONDS}s)")
+
+    return _analysis_cache
@@ -0,0 +1,134 @@
+import os
+import json
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from app.utils.sqlite import open_sqlite
+
+# Analysis repository configuration
+ANALYSIS_STORE_ENABLED = os.getenv("ANALYSIS_STORE_ENABLED", "true").lower() == "true"
+ANALYSIS_STORE_DB_PATH = os.getenv("ANALYSIS_STORE_DB_PATH", "data/analyses.db")
+
+class AnalysisRepository:
+    """SQLite record of every completed analysis"""
+
+    SUMMARY_COLUMNS = [
+        "id", "part_number", "supplier_name", "created_at", "fingerprint", "model", "mode", "latency_ms"
+    ]
+
+    def __init__(self, db_path: str = ANALYSIS_STORE_DB_PATH):
+        self._db = open_sqlite(db_path)
+        self._lock = threading.Lock()
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                part_number TEXT NOT NULL,
+                supplier_name TEXT,
+                created_at TEXT NOT NULL,
+                fingerprint TEXT,
+                model TEXT,
+                mode TEXT,
+                latency_ms REAL,
+                result TEXT NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_analyses_part ON analyses (part_number, created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_analyses_supplier ON analyses (supplier_name, created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at)")
+
+    async def record(
+        self,
+        part_number: str,
+        supplier_name: Optional[str],
+        result: Dict[str, Any],
+        fingerprint: Optional[str] = None,
+        model: Optional[str] = None,
+        mode: Optional[str] = None,
+        latency_ms: Optional[float] = None
+    ) -> int:
+        """
+        Store a completed analysis and return its id
+        """
+        row = (
+            part_number,
+            supplier_name,
+            datetime.now().isoformat(),
+            fingerprint,
+            model,
+            mode,
+            latency_ms,
+            json.dumps(result, default=str)
+        )
+
+        def insert() -> int:
+            with self._lock:
+                cursor = self._db.execute(
+                    "INSERT INTO analyses (part_number, supplier_name, created_at, fingerprint, model, mode, latency_ms, result) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    row
+                )
+                return cursor.lastrowid
+
+        return await asyncio.to_thread(insert)
+
+    async def get_latest(self, part_number: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get the most recent analysis of a part
+        """
+        rows = await self.get_history(part_number, limit=1, include_result=include_result)
+        return rows[0] if rows else None
+
+    async def get_history(self, part_number: str, limit: int = 20, include_result: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get the analyses of a part, newest first
+        """
+        return await self._select("part_number = ?", [part_number], limit, include_result)
+
+    async def get_by_supplier(self, supplier_name: str, limit: int = 50, include_result: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get the analyses of a supplier's parts, newest first
+        """
+        return await self._select("supplier_name = ?", [supplier_name], limit, include_result)
+
+    async def _select(self, where: str, params: List[Any], limit: int, include_result: bool) -> List[Dict[str, Any]]:
+        columns = self.SUMMARY_COLUMNS + (["result"] if include_result else [])
+        sql = f"SELECT {', '.join(columns)} FROM analyses WHERE {where} ORDER BY created_at DESC, id DESC LIMIT ?"
+
+        def fetch() -> List[tuple]:
+            with self._lock:
+                return self._db.execute(sql, params + [limit]).fetchall()
+
+        return [self._to_record(dict(zip(columns, row))) for row in await asyncio.to_thread(fetch)]
+
+    def _to_record(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        record = {
+            "analysisId": row["id"],
+            "partNumber": row["part_number"],
+            "supplierName": row["supplier_name"],
+            "createdAt": row["created_at"],
+            "fingerprint": row["fingerprint"],
+            "model": row["model"],
+            "mode": row["mode"],
+            "latencyMs": row["latency_ms"]
+        }
+        if "result" in row:
+            record["result"] = json.loads(row["result"])
+        return record
+
+_repository: Optional[AnalysisRepository] = None
+
+def get_analysis_repository() -> Optional[AnalysisRepository]:
+    """
+    Get the shared analysis repository (None when disabled)
+    """
+    global _repository
+
+    if not ANALYSIS_STORE_ENABLED:
+        return None
+
+    if _repository is None:
+        _repository = AnalysisRepository()
+        print(f"🗃️ Analysis repository: SQLite ({ANALYSIS_STORE_DB_PATH})")
+
+    return _repository
@@ -1,78 +1,80 @@
 import os
-from typing import Dict, Any, List, Optional
-from cassandra.cluster import Cluster
-from cassandra.auth import PlainTextAuthProvider
-
-# Astra DB configuration
-ASTRA_DB_ENDPOINT = os.getenv("ASTRA_DB_ENDPOINT")
-ASTRA_DB_CLIENT_ID = os.getenv("ASTRA_DB_CLIENT_ID")
-ASTRA_DB_SECRET = os.getenv("ASTRA_DB_SECRET")
-ASTRA_DB_TOKEN = os.getenv("ASTRA_DB_TOKEN")
-ASTRA_DB_KEYSPACE = os.getenv("ASTRA_DB_KEYSPACE", "default_keyspace")
-ASTRA_DB_COLLECTION = os.getenv("ASTRA_DB_COLLECTION", "contracts")
-
-# Initialize Astra DB connection
-def get_astra_client():
+from typing import Dict, Any, AsyncIterator, List, Optional
+from app.services.contract_cache import get_contract_cache, invalidate_supplier_contracts
+from app.services.contract_model import Contract, SUMMARY_FIELDS
+from app.services.contract_repository import get_contract_repository, value_buckets
+from app.services.contract_statistics import get_contract_statistics_snapshot, record_contract_change
+from app.services.contract_text_index import index_contract_change
+from app.services.prompt_builder import count_tokens, compact_json, drop_empty_fields
+from app.utils.exceptions import ContractAnalysisError, ContractStoreError
+
+# With a token budget, pages are read until the fetched contracts hold this many times the
+# budget, leaving the prompt builder room to rank and drop contracts
+CONTRACT_FETCH_BUDGET_FACTOR = float(os.getenv("CONTRACT_FETCH_BUDGET_FACTOR", "2"))
+
+async def get_contract_information(supplier_name: str, token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
     """
-    Get Astra DB client connection
+    Get contract information from DataStax Astra.
+    With a token budget, only as many pages are read as the prompt can use.
+    Results are cached per supplier until its version in the store changes.
     """
-    try:
-        # For now, return None to use mock data
-        # The actual Astra connection needs proper configuration
-        print("⚠️ Using mock data - Astra connection not properly configured")
-        return None
-    except Exception as error:
-        print(f"Error connecting to Astra DB: {error}")
-        return None
-
-async def get_contract_information(supplier_name: str) -> List[Dict[str, Any]]:
+    repository = await get_contract_repository()
+    cache = get_contract_cache() if repository is not None else None
+    version = None
+    if cache is not None:
+        try:
+            version = await repository.get_supplier_version(supplier_name)
+            cached = cache.get(supplier_name, token_budget, version)
+            if cached is not None:
+                print(f"⚡ {len(cached)} cached contracts for supplier: {supplier_name}")
+                return cached
+        except ContractStoreError as error:
+            # Without a version the result cannot be validated later, so read through uncached
+            print(f"Supplier version probe failed: {error}")
+            cache = None
+
+    print(f"🔍 Querying Astra DB for supplier: {supplier_name}")
+
+    contracts: List[Dict[str, Any]] = []
+    fetched_tokens = 0
+    token_limit = token_budget * CONTRACT_FETCH_BUDGET_FACTOR if token_budget else None
+
+    async for page in stream_contract_information(supplier_name):
+        page_contracts = [contract.to_dict() for contract in page]
+        contracts.extend(page_contracts)
+        if token_limit is None:
+            continue
+        fetched_tokens += sum(count_tokens(compact_json(drop_empty_fields(contract))) for contract in page_contracts)
+        if fetched_tokens >= token_limit:
+            print(f"✂️ Stopped reading contracts at {len(contracts)} ({fetched_tokens} tokens, budget {token_budget})")
+            break
+
+    print(f"✅ Found {len(contracts)} contracts for supplier: {supplier_name}")
+
+    if cache is not None:
+        cache.set(supplier_name, token_budget, version, contracts)
+
+    return contracts
+
+async def stream_contract_information(supplier_name: str, fetch_size: Optional[int] = None) -> AsyncIterator[List[Contract]]:
     """
-    Get contract information from DataStax Astra
+    Yield a supplier's contracts as Contract records, one page at a time (fetch_size rows per Cassandra page)
     """
     try:
-        print(f"🔍 Querying Astra DB for supplier: {supplier_name}")
-        
-        session = get_astra_client()
-        
-        # If session is None, use mock data
-        if session is None:
+        repository = await get_contract_repository()
+
+        # No contract store configured: serve mock data
+        if repository is None:
             print("📋 Using mock contract data")
-            return get_mock_contract_data(supplier_name)
-        
-        # Query contracts collection for the supplier
-        query = f"""
-        SELECT * FROM {ASTRA_DB_KEYSPACE}.{ASTRA_DB_COLLECTION} 
-        WHERE supplier_name = %s ALLOW FILTERING
-        """
-        
-        result = session.execute(query, [supplier_name])
-        
-        contracts = []
-        for row in result:
-            contract_data = {
-                "id": getattr(row, 'id', None),
-                "supplier_name": getattr(row, 'supplier_name', None),
-                "contract_title": getattr(row, 'contract_title', None),
-                "contract_type": getattr(row, 'contract_type', None),
-                "start_date": getattr(row, 'start_date', None),
-                "end_date": getattr(row, 'end_date', None),
-                "value": getattr(row, 'value', None),
-                "currency": getattr(row, 'currency', None),
-                "terms": getattr(row, 'terms', None),
-                "clauses": getattr(row, 'clauses', None),
-                "risks": getattr(row, 'risks', None),
-                "opportunities": getattr(row, 'opportunities', None)
-            }
-            contracts.append(contract_data)
-        
-        print(f"✅ Found {len(contracts)} contracts for supplier: {supplier_name}")
-        
-        return contracts
-        
-    except Exception as error:
+            yield [Contract.from_dict(contract) for contract in get_mock_contract_data(supplier_name)]
+            return
+
+        async for page in repository.iter_supplier_contracts(supplier_name, fetch_size=fetch_size):
+            yield page
+
+    except ContractStoreError as error:
         print(f"Error getting contract information: {error}")
-        # For now, return mock data to allow testing
-        return get_mock_contract_data(supplier_name)
+        raise ContractAnalysisError(str(error), code="CONTRACT_LOOKUP_FAILED", supplier=supplier_name)
 
 def get_mock_contract_data(supplier_name: str) -> List[Dict[str, Any]]:
     """
@@ -147,76 +149,123 @@ def get_mock_contract_data(supplier_name: str) -> List[Dict[str, Any]]:
         }
     ]
 
+def plan_contract_search(criteria: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Route a criteria combination to the query table that answers it with partition reads:
+    supplier -> contracts_by_supplier (one partition), type -> contracts_by_type (one partition),
+    value range only -> contracts_by_value (one partition per overlapping value bucket).
+    Value bounds become clustering slices where the table allows it, otherwise an in-memory filter.
+    """
+    supplier_name = criteria.get("supplier_name")
+    contract_type = criteria.get("contract_type")
+    min_value = float(criteria["min_value"]) if criteria.get("min_value") else None
+    max_value = float(criteria["max_value"]) if criteria.get("max_value") else None
+
+    bounds = [("min_value", min_value), ("max_value", max_value)]
+    value_restrictions = tuple(name for name, bound in bounds if bound is not None)
+    value_parameters = [bound for _, bound in bounds if bound is not None]
+
+    if supplier_name:
+        # Within a supplier partition the value slice needs the contract type clustering column first
+        if contract_type:
+            return {
+                "table": "by_supplier",
+                "partitions": [supplier_name],
+                "restrictions": ("contract_type",) + value_restrictions,
+                "parameters": [contract_type] + value_parameters,
+                "filter": None
+            }
+        return {
+            "table": "by_supplier",
+            "partitions": [supplier_name],
+            "restrictions": (),
+            "parameters": [],
+            "filter": (min_value, max_value) if value_restrictions else None
+        }
+
+    if contract_type:
+        return {
+            "table": "by_type",
+            "partitions": [contract_type],
+            "restrictions": value_restrictions,
+            "parameters": value_parameters,
+            "filter": None
+        }
+
+    return {
+        "table": "by_value",
+        "partitions": value_buckets(min_value, max_value),
+        "restrictions": value_restrictions,
+        "parameters": value_parameters,
+        "filter": None
+    }
+
 async def search_contracts_by_criteria(criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Search contracts by various criteria
     """
     try:
-        session = get_astra_client()
-        
-        # If session is None, return empty list
-        if session is None:
+        repository = await get_contract_repository()
+
+        # If no contract store is configured, return empty list
+        if repository is None:
             print("📋 Using mock data for contract search")
             return []
-        
-        # Build dynamic query based on criteria
-        query_parts = [f"SELECT * FROM {ASTRA_DB_KEYSPACE}.{ASTRA_DB_COLLECTION}"]
-        where_conditions = []
-        params = []
-        
-        if criteria.get("supplier_name"):
-            where_conditions.append("supplier_name = %s")
-            params.append(criteria["supplier_name"])
-        
-        if criteria.get("contract_type"):
-            where_conditions.append("contract_type = %s")
-            params.append(criteria["contract_type"])
-        
-        if criteria.get("min_value"):
-            where_conditions.append("value >= %s")
-            params.append(criteria["min_value"])
-        
-        if criteria.get("max_value"):
-            where_conditions.append("value <= %s")
-            params.append(criteria["max_value"])
-        
-        if where_conditions:
-            query_parts.append("WHERE " + " AND ".join(where_conditions))
-        
-        query_parts.append("ALLOW FILTERING")
-        query = " ".join(query_parts)
-        
-        result = session.execute(query, params)
-        
-        contracts = []
-        for row in result:
-            contract_data = {
-                "id": getattr(row, 'id', None),
-                "supplier_name": getattr(row, 'supplier_name', None),
-                "contract_title": getattr(row, 'contract_title', None),
-                "contract_type": getattr(row, 'contract_type', None),
-                "start_date": getattr(row, 'start_date', None),
-                "end_date": getattr(row, 'end_date', None),
-                "value": getattr(row, 'value', None),
-                "currency": getattr(row, 'currency', None)
-            }
-            contracts.append(contract_data)
-        
-        return contracts
-        
-    except Exception as error:
+
+        plan = plan_contract_search(criteria)
+        print(f"🧭 Contract search via {plan['table']} ({len(plan['partitions'])} partitions, restrictions: {plan['restrictions'] or 'none'})")
+        return [contract.to_dict(SUMMARY_FIELDS) for contract in await repository.execute_plan(plan)]
+
+    except ContractStoreError as error:
         print(f"Error searching contracts: {error}")
         return []
 
+async def save_contract(contract: Dict[str, Any]) -> None:
+    """
+    Insert or update a contract, keeping the supplier, type and value query tables consistent
+    """
+    repository = await get_contract_repository()
+    if repository is None:
+        raise ContractStoreError("Contract store not configured")
+
+    change = await repository.save_contract(contract)
+    record_contract_change(change)
+    invalidate_supplier_contracts(change)
+    index_contract_change(contract=contract)
+
+async def delete_contract(contract_id: str) -> bool:
+    """
+    Delete a contract from the base and query tables
+    """
+    repository = await get_contract_repository()
+    if repository is None:
+        raise ContractStoreError("Contract store not configured")
+
+    change = await repository.delete_contract(contract_id)
+    record_contract_change(change)
+    invalidate_supplier_contracts(change)
+    index_contract_change(removed_id=contract_id)
+    return change is not None
+
+async def rebuild_contract_query_tables() -> Dict[str, int]:
+    """
+    Backfill the query tables from the base contracts table and delete their stale rows
+    """
+    repository = await get_contract_repository()
+    if repository is None:
+        raise ContractStoreError("Contract store not configured")
+
+    return await repository.rebuild_query_tables()
+
 async def get_contract_statistics() -> Dict[str, Any]:
     """
     Get contract statistics and analytics
     """
     try:
-        session = get_astra_client()
-        
-        # If session is None, return mock statistics
-        if session is None:
+        repository = await get_contract_repository()
+
+        # If no contract store is configured, return mock statistics
+        if repository is None:
             print("📋 Using mock statistics data")
             return {
                 "total_contracts": 2,
@@ -224,37 +273,15 @@ async def get_contract_statistics() -> Dict[str, Any]:
                 "contracts_by_type": {"Supply Agreement": 1, "Service Agreement": 1},
                 "average_value": 375000
             }
-        
-        # Get total contracts
-        total_query = f"SELECT COUNT(*) as total FROM {ASTRA_DB_KEYSPACE}.{ASTRA_DB_COLLECTION}"
-        total_result = session.execute(total_query)
-        total_contracts = total_result.one().total if total_result.one() else 0
-        
-        # Get contracts by type
-        type_query = f"SELECT contract_type, COUNT(*) as count FROM {ASTRA_DB_KEYSPACE}.{ASTRA_DB_COLLECTION} GROUP BY contract_type"
-        type_result = session.execute(type_query)
-        
-        contracts_by_type = {}
-        for row in type_result:
-            contracts_by_type[row.contract_type] = row.count
-        
-        # Get total value
-        value_query = f"SELECT SUM(value) as total_value FROM {ASTRA_DB_KEYSPACE}.{ASTRA_DB_COLLECTION}"
-        value_result = session.execute(value_query)
-        total_value = value_result.one().total_value if value_result.one() else 0
-        
-        return {
-            "total_contracts": total_contracts,
-            "total_value": total_value,
-            "contracts_by_type": contracts_by_type,
-            "average_value": total_value / total_contracts if total_contracts > 0 else 0
-        }
-        
-    except Exception as error:
+
+        # Served from memory, synced from the change log when older than the staleness bound
+        return await get_contract_statistics_snapshot()
+
+    except ContractStoreError as error:
         print(f"Error getting contract statistics: {error}")
         return {
             "total_contracts": 0,
             "total_value": 0,
             "contracts_by_type": {},
             "average_value": 0
-        } 
\ No newline at end of file
+        }
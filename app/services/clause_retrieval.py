@@ -0,0 +1,313 @@
+import os
+import json
+import zlib
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from app.services.analysis_cache import normalize_for_key
+from app.services.contract_text_index import tokenize
+from app.services.prompt_builder import (
+    PROMPT_CONTRACT_TOKEN_BUDGET,
+    build_contract_context,
+    compact_json,
+    count_tokens,
+    drop_empty_fields,
+    get_tokenizer_name,
+    rank_contracts,
+    CONTRACT_TEXT_FIELDS
+)
+
+# "full" sends whole compacted contracts; "retrieval" (opt-in) sends contract headers plus the clauses retrieved per section
+PROMPT_CONTEXT_MODE = os.getenv("PROMPT_CONTEXT_MODE", "full").lower()
+# Passages retrieved per section query
+CLAUSE_RETRIEVAL_TOP_K = int(os.getenv("CLAUSE_RETRIEVAL_TOP_K", "12"))
+# Passages scoring below this cosine similarity are never included
+CLAUSE_RETRIEVAL_MIN_SCORE = float(os.getenv("CLAUSE_RETRIEVAL_MIN_SCORE", "0.05"))
+# Share of the contract token budget contract headers may use; the rest is left for passages
+CLAUSE_RETRIEVAL_HEADER_SHARE = float(os.getenv("CLAUSE_RETRIEVAL_HEADER_SHARE", "0.4"))
+# Hashed embedding width (a power of two)
+CLAUSE_EMBEDDING_DIMENSIONS = int(os.getenv("CLAUSE_EMBEDDING_DIMENSIONS", "1024"))
+# In-memory passage indexes kept (one per distinct contract set), and an optional on-disk copy
+CLAUSE_INDEX_CACHE_SIZE = int(os.getenv("CLAUSE_INDEX_CACHE_SIZE", "64"))
+CLAUSE_INDEX_DIR = os.getenv("CLAUSE_INDEX_DIR")
+
+# Feature weights: whole words dominate, bigrams add phrasing, character trigrams catch word variants
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.7
+TRIGRAM_WEIGHT = 0.25
+
+# Contract fields rendered in the per-contract header line
+HEADER_FIELDS = ["id", "contract_title", "contract_type", "start_date", "end_date", "value", "currency"]
+
+def hashed_features(text: str) -> List[Tuple[int, float]]:
+    """
+    Signed hashed (index, weight) features of a text: words, word bigrams and character trigrams.
+    CRC32 keeps the hashing stable across processes, so saved indexes stay valid.
+    """
+    tokens = tokenize(text)
+    features = [(token, WORD_WEIGHT) for token in tokens]
+    features.extend((f"{first} {second}", BIGRAM_WEIGHT) for first, second in zip(tokens, tokens[1:]))
+    for token in tokens:
+        padded = f"#{token}#"
+        features.extend((f"#3{padded[position:position + 3]}", TRIGRAM_WEIGHT) for position in range(len(padded) - 2))
+
+    mask = CLAUSE_EMBEDDING_DIMENSIONS - 1
+    hashed = []
+    for feature, weight in features:
+        value = zlib.crc32(feature.encode("utf-8"))
+        hashed.append((value & mask, weight if value & 0x80000000 else -weight))
+    return hashed
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    L2-normalized hashed n-gram vectors, one row per text (no external model)
+    """
+    vectors = np.zeros((len(texts), CLAUSE_EMBEDDING_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for index, weight in hashed_features(text):
+            vectors[row, index] += weight
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def chunk_contracts(contract_info: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Clause-level passages: one per entry of each contract's terms, clauses, risks and opportunities
+    """
+    passages = []
+    for position, contract in enumerate(contract_info):
+        for field in CONTRACT_TEXT_FIELDS:
+            section = contract.get(field)
+            if not isinstance(section, dict):
+                continue
+            for key, text in section.items():
+                if text:
+                    passages.append({
+                        "contract": position,
+                        "field": field,
+                        "key": str(key),
+                        "text": str(text)
+                    })
+    return passages
+
+class PassageIndex:
+    """
+    Passage vectors of one contract set, searched by cosine similarity (a dot product of normalized rows)
+    """
+
+    def __init__(self, passages: List[Dict[str, Any]], vectors: np.ndarray):
+        self.passages = passages
+        self.vectors = vectors
+
+    @classmethod
+    def build(cls, contract_info: List[Dict[str, Any]]) -> "PassageIndex":
+        passages = chunk_contracts(contract_info)
+        texts = [f"{passage['field']} {passage['key'].replace('_', ' ')}: {passage['text']}" for passage in passages]
+        return cls(passages, embed_texts(texts))
+
+    def search(self, query_vector: np.ndarray, top_k: int) -> List[Tuple[float, int]]:
+        """
+        (score, passage position) of the top_k passages, best first
+        """
+        if not self.passages:
+            return []
+
+        scores = self.vectors @ query_vector
+        count = min(top_k, len(scores))
+        best = np.argpartition(-scores, count - 1)[:count]
+        return [
+            (float(scores[position]), int(position))
+            for position in sorted(best, key=lambda position: -scores[position])
+            if scores[position] >= CLAUSE_RETRIEVAL_MIN_SCORE
+        ]
+
+    def save(self, path: str) -> None:
+        """
+        Write the vectors (.npy) and passages (.json) next to each other
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(f"{path}.npy.tmp", "wb") as file:
+            np.save(file, self.vectors)
+        with open(f"{path}.json.tmp", "w") as file:
+            json.dump({"dimensions": CLAUSE_EMBEDDING_DIMENSIONS, "passages": self.passages}, file)
+        os.replace(f"{path}.npy.tmp", f"{path}.npy")
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PassageIndex"]:
+        """
+        Open a saved index (None when missing or built with another embedding width)
+        """
+        if not (os.path.exists(f"{path}.json") and os.path.exists(f"{path}.npy")):
+            return None
+
+        with open(f"{path}.json") as file:
+            metadata = json.load(file)
+        if metadata.get("dimensions") != CLAUSE_EMBEDDING_DIMENSIONS:
+            return None
+        return cls(metadata["passages"], np.load(f"{path}.npy"))
+
+_indexes: "OrderedDict[str, PassageIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_query_vectors: Dict[str, np.ndarray] = {}
+_stats = {
+    "indexesBuilt": 0,
+    "indexesLoaded": 0,
+    "indexHits": 0,
+    "retrievals": 0
+}
+
+def contract_set_key(contract_info: List[Dict[str, Any]]) -> str:
+    """
+    Content hash of a contract set, so parts sharing a supplier share one passage index
+    """
+    payload = json.dumps([normalize_for_key(contract) for contract in contract_info], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{CLAUSE_EMBEDDING_DIMENSIONS}:{payload}".encode("utf-8")).hexdigest()
+
+def get_passage_index(contract_info: List[Dict[str, Any]]) -> PassageIndex:
+    """
+    Get the passage index of a contract set from memory, then disk, else build (and save) it
+    """
+    key = contract_set_key(contract_info)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            _stats["indexHits"] += 1
+            return index
+
+    path = os.path.join(CLAUSE_INDEX_DIR, key[:2], key) if CLAUSE_INDEX_DIR else None
+    index = PassageIndex.load(path) if path else None
+    if index is not None:
+        _stats["indexesLoaded"] += 1
+    else:
+        index = PassageIndex.build(contract_info)
+        _stats["indexesBuilt"] += 1
+        if path:
+            try:
+                index.save(path)
+            except OSError as error:
+                print(f"Could not save clause index: {error}")
+
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > CLAUSE_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+def embed_query(query: str) -> np.ndarray:
+    vector = _query_vectors.get(query)
+    if vector is None:
+        vector = _query_vectors[query] = embed_texts([query])[0]
+    return vector
+
+def build_retrieval_context(
+    contract_info: List[Dict[str, Any]],
+    queries: List[str],
+    token_budget: Optional[int] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Render contract headers plus the passages retrieved for the queries within a token budget.
+    Headers (title, type, dates, value) of the top-ranked contracts take up to CLAUSE_RETRIEVAL_HEADER_SHARE
+    of the budget so date ranges and values stay visible; passages fill the rest, best-scoring first.
+    """
+    budget = token_budget or PROMPT_CONTRACT_TOKEN_BUDGET
+    index = get_passage_index(contract_info)
+    _stats["retrievals"] += 1
+
+    # Best score per passage across all queries
+    scores: Dict[int, float] = {}
+    for query in queries:
+        for score, position in index.search(embed_query(query), CLAUSE_RETRIEVAL_TOP_K):
+            scores[position] = max(score, scores.get(position, 0.0))
+
+    header = "CONTRACTS (one compact JSON header per contract, ranked by recency and value):"
+    excerpt_header = "RELEVANT CONTRACT EXCERPTS (contract id, section.clause: text):"
+    used_tokens = count_tokens(header) + count_tokens(excerpt_header)
+
+    ranked = rank_contracts(contract_info)
+    header_budget = used_tokens + int(budget * CLAUSE_RETRIEVAL_HEADER_SHARE)
+    header_lines = []
+    for contract in ranked:
+        line = compact_json(drop_empty_fields({field: contract.get(field) for field in HEADER_FIELDS}))
+        cost = count_tokens(line) + 1
+        if header_lines and used_tokens + cost > header_budget:
+            break
+        header_lines.append(line)
+        used_tokens += cost
+
+    excerpts: Dict[int, List[str]] = {}
+    included = 0
+    for position, _ in sorted(scores.items(), key=lambda item: -item[1]):
+        passage = index.passages[position]
+        line = f"[{contract_info[passage['contract']].get('id')}] {passage['field']}.{passage['key']}: {passage['text']}"
+        cost = count_tokens(line) + 1
+        if used_tokens + cost > budget:
+            continue
+        excerpts.setdefault(passage["contract"], []).append(line)
+        used_tokens += cost
+        included += 1
+
+    blocks = [header] + header_lines
+    if excerpts:
+        blocks.append(excerpt_header)
+        # Keep each contract's excerpts together, in contract rank order
+        order = {id(contract): rank for rank, contract in enumerate(ranked)}
+        for position in sorted(excerpts, key=lambda position: order[id(contract_info[position])]):
+            blocks.extend(excerpts[position])
+
+    context = "\n    ".join(blocks)
+    stats = {
+        "contextMode": "retrieval",
+        "contractsIncluded": len(header_lines),
+        "contractsTotal": len(contract_info),
+        "passagesIncluded": included,
+        "passagesTotal": len(index.passages),
+        "contractTokens": count_tokens(context),
+        "tokenBudget": budget,
+        "tokenizer": get_tokenizer_name()
+    }
+    return context, stats
+
+def select_prompt_context(
+    contract_info: List[Dict[str, Any]],
+    queries: List[str],
+    token_budget: Optional[int] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    The CONTRACT block of a prompt under PROMPT_CONTEXT_MODE: retrieved clauses, or whole compacted contracts
+    """
+    if PROMPT_CONTEXT_MODE == "retrieval":
+        return build_retrieval_context(contract_info, queries, token_budget)
+
+    context, stats = build_contract_context(contract_info, token_budget)
+    return context, {**stats, "contextMode": "full"}
+
+async def build_prompt_context(
+    contract_info: List[Dict[str, Any]],
+    queries: List[str],
+    token_budget: Optional[int] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    select_prompt_context in a worker thread, so indexing, embedding and token counting don't block the event loop
+    """
+    return await asyncio.to_thread(select_prompt_context, contract_info, queries, token_budget)
+
+def get_clause_retrieval_stats() -> Dict[str, Any]:
+    """
+    Get passage index cache counters
+    """
+    return {
+        **_stats,
+        "mode": PROMPT_CONTEXT_MODE,
+        "cachedIndexes": len(_indexes),
+        "topK": CLAUSE_RETRIEVAL_TOP_K,
+        "dimensions": CLAUSE_EMBEDDING_DIMENSIONS
+    }
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+# Supplier contract cache configuration
+CONTRACT_CACHE_ENABLED = os.getenv("CONTRACT_CACHE_ENABLED", "true").lower() == "true"
+CONTRACT_CACHE_TTL_SECONDS = int(os.getenv("CONTRACT_CACHE_TTL_SECONDS", "900"))
+# Suppliers without contracts are remembered for a shorter time
+CONTRACT_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("CONTRACT_CACHE_NEGATIVE_TTL_SECONDS", "120"))
+# Memory bound, measured as the cached contracts' compact JSON size
+CONTRACT_CACHE_MAX_BYTES = int(os.getenv("CONTRACT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+class SupplierContractCache:
+    """
+    Per-supplier contract lists, LRU-bounded by bytes. Each entry records the supplier's
+    version when it was read; a lookup is only a hit while the store still reports that
+    version, so writes from any process invalidate it without re-reading the contracts.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = CONTRACT_CACHE_MAX_BYTES,
+        ttl_seconds: int = CONTRACT_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: int = CONTRACT_CACHE_NEGATIVE_TTL_SECONDS
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        # (supplier, token budget) -> (stored_at, version, encoded contracts)
+        self._entries: "OrderedDict[Tuple[str, Optional[int]], Tuple[float, Any, str]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "negativeHits": 0,
+            "misses": 0,
+            "sets": 0,
+            "invalidations": 0,
+            "expirations": 0,
+            "evictions": 0,
+            "oversized": 0
+        }
+
+    def get(self, supplier_name: str, token_budget: Optional[int], version: Any) -> Optional[List[Dict[str, Any]]]:
+        """
+        Cached contracts of a supplier, or None when missing, expired or read at another version
+        """
+        key = (supplier_name, token_budget)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            stored_at, cached_version, encoded = entry
+            ttl_seconds = self.ttl_seconds if encoded != "[]" else self.negative_ttl_seconds
+            if cached_version != version:
+                self._drop(key)
+                self._stats["invalidations"] += 1
+                self._stats["misses"] += 1
+                return None
+            if time.time() - stored_at > ttl_seconds:
+                self._drop(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["negativeHits" if encoded == "[]" else "hits"] += 1
+
+        # Each hit decodes a private copy, so callers may modify what they get
+        return json.loads(encoded)
+
+    def set(self, supplier_name: str, token_budget: Optional[int], version: Any, contracts: List[Dict[str, Any]]) -> None:
+        """
+        Store a supplier's contracts as read at the given version (an empty list is a negative entry)
+        """
+        encoded = json.dumps(contracts, separators=(',', ':'), default=str)
+        key = (supplier_name, token_budget)
+        with self._lock:
+            self._drop(key)
+            if len(encoded) > self.max_bytes:
+                self._stats["oversized"] += 1
+                return
+
+            self._entries[key] = (time.time(), version, encoded)
+            self._bytes += len(encoded)
+            self._stats["sets"] += 1
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, supplier_name: str) -> int:
+        """
+        Drop every entry of a supplier (after a write made by this process); returns the entries dropped
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == supplier_name]
+            for key in keys:
+                self._drop(key)
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss/invalidation counters and memory use
+        """
+        hits = self._stats["hits"] + self._stats["negativeHits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hitRate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl_seconds,
+            "negativeTtlSeconds": self.negative_ttl_seconds
+        }
+
+    def _drop(self, key: Tuple[str, Optional[int]]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+_contract_cache: Optional[SupplierContractCache] = None
+
+def get_contract_cache() -> Optional[SupplierContractCache]:
+    """
+    Get the shared supplier contract cache (None when caching is disabled)
+    """
+    global _contract_cache
+
+    if not CONTRACT_CACHE_ENABLED:
+        return None
+
+    if _contract_cache is None:
+        _contract_cache = SupplierContractCache()
+        print(f"🗄️ Supplier contract cache enabled ({CONTRACT_CACHE_MAX_BYTES // (1024 * 1024)} MiB, TTL {CONTRACT_CACHE_TTL_SECONDS}s)")
+
+    return _contract_cache
+
+def invalidate_supplier_contracts(change: Optional[Dict[str, Any]]) -> None:
+    """
+    Drop the cached contracts of every supplier a local write touched
+    """
+    if change is not None and _contract_cache is not None:
+        for supplier_name in change.get("suppliers", []):
+            _contract_cache.invalidate(supplier_name)
+
+def get_contract_cache_stats() -> Dict[str, Any]:
+    """
+    Get supplier contract cache counters
+    """
+    if not CONTRACT_CACHE_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **get_contract_cache().stats()}
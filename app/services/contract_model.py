@@ -0,0 +1,114 @@
+import json
+from typing import Dict, Any, List, Optional, Sequence
+
+# Contract columns returned by supplier lookups and searches
+CONTRACT_FIELDS = [
+    "id", "supplier_name", "contract_title", "contract_type", "start_date", "end_date",
+    "value", "currency", "terms", "clauses", "risks", "opportunities"
+]
+SUMMARY_FIELDS = CONTRACT_FIELDS[:8]
+
+# Map columns read as JSON text (CQL toJson) and only decoded when accessed
+CONTRACT_MAP_FIELDS = CONTRACT_FIELDS[8:]
+
+# Compact encoder shared by every to_json call
+_encode_compact = json.JSONEncoder(separators=(',', ':'), default=str).encode
+
+class Contract:
+    """
+    One contract row. Scalar columns are plain attributes; the terms, clauses, risks
+    and opportunities maps hold the JSON text Cassandra returned until first access,
+    so rows that are only counted, filtered or re-serialized never decode them.
+    """
+
+    __slots__ = tuple(SUMMARY_FIELDS) + tuple(f"_{field}" for field in CONTRACT_MAP_FIELDS)
+
+    def __init__(
+        self,
+        id: Optional[str] = None,
+        supplier_name: Optional[str] = None,
+        contract_title: Optional[str] = None,
+        contract_type: Optional[str] = None,
+        start_date: Any = None,
+        end_date: Any = None,
+        value: Any = None,
+        currency: Optional[str] = None,
+        terms: Any = None,
+        clauses: Any = None,
+        risks: Any = None,
+        opportunities: Any = None
+    ):
+        self.id = id
+        self.supplier_name = supplier_name
+        self.contract_title = contract_title
+        self.contract_type = contract_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.value = value
+        self.currency = currency
+        # Either JSON text (still encoded) or the decoded dict
+        self._terms = terms
+        self._clauses = clauses
+        self._risks = risks
+        self._opportunities = opportunities
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Contract":
+        return cls(**{field: data.get(field) for field in CONTRACT_FIELDS})
+
+    def _decode(self, slot: str) -> Optional[Dict[str, Any]]:
+        value = getattr(self, slot)
+        if isinstance(value, str):
+            value = json.loads(value)
+            setattr(self, slot, value)
+        return value
+
+    @property
+    def terms(self) -> Optional[Dict[str, Any]]:
+        return self._decode("_terms")
+
+    @property
+    def clauses(self) -> Optional[Dict[str, Any]]:
+        return self._decode("_clauses")
+
+    @property
+    def risks(self) -> Optional[Dict[str, Any]]:
+        return self._decode("_risks")
+
+    @property
+    def opportunities(self) -> Optional[Dict[str, Any]]:
+        return self._decode("_opportunities")
+
+    def get(self, field: str, default: Any = None) -> Any:
+        value = getattr(self, field, None)
+        return default if value is None else value
+
+    def to_dict(self, fields: Sequence[str] = CONTRACT_FIELDS) -> Dict[str, Any]:
+        """
+        The contract as the dict shape the prompt builder and API use (maps decoded)
+        """
+        return {field: getattr(self, field) for field in fields}
+
+    def to_json(self) -> str:
+        """
+        Serialize to compact JSON; maps still held as JSON text are spliced in without decoding
+        """
+        head = _encode_compact({field: getattr(self, field) for field in SUMMARY_FIELDS})
+        parts = [head[:-1]]
+        for field in CONTRACT_MAP_FIELDS:
+            value = getattr(self, f"_{field}")
+            parts.append(f',"{field}":{value if isinstance(value, str) else _encode_compact(value)}')
+        parts.append("}")
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"Contract(id={self.id!r}, supplier_name={self.supplier_name!r}, contract_type={self.contract_type!r})"
+
+def contract_row_factory(colnames: List[str], rows: List[Sequence[Any]]) -> List[Contract]:
+    """
+    Cassandra driver row factory building Contract records straight from row tuples
+    """
+    # Contract selects list columns in CONTRACT_FIELDS order, so rows map onto __init__ positionally
+    if list(colnames) == CONTRACT_FIELDS[:len(colnames)]:
+        return [Contract(*row) for row in rows]
+    return [Contract(**dict(zip(colnames, row))) for row in rows]
@@ -0,0 +1,811 @@
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+from bisect import bisect_left
+from itertools import product
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Sequence, Set, Tuple
+from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT
+from cassandra.auth import PlainTextAuthProvider
+from cassandra.query import BatchStatement, BatchType, dict_factory
+from cassandra.util import uuid_from_time, min_uuid_from_time, datetime_from_uuid1
+from app.services.contract_model import (
+    Contract,
+    CONTRACT_FIELDS,
+    CONTRACT_MAP_FIELDS,
+    SUMMARY_FIELDS,
+    contract_row_factory
+)
+from app.utils.exceptions import ContractStoreError
+
+# Astra DB / Cassandra configuration. Astra is used when a secure connect bundle is set;
+# CASSANDRA_CONTACT_POINTS points at any other Cassandra-compatible cluster (e.g. a local one).
+ASTRA_DB_ENDPOINT = os.getenv("ASTRA_DB_ENDPOINT")
+ASTRA_DB_CLIENT_ID = os.getenv("ASTRA_DB_CLIENT_ID")
+ASTRA_DB_SECRET = os.getenv("ASTRA_DB_SECRET")
+ASTRA_DB_TOKEN = os.getenv("ASTRA_DB_TOKEN")
+ASTRA_DB_SECURE_BUNDLE_PATH = os.getenv("ASTRA_DB_SECURE_BUNDLE_PATH")
+ASTRA_DB_KEYSPACE = os.getenv("ASTRA_DB_KEYSPACE", "default_keyspace")
+ASTRA_DB_COLLECTION = os.getenv("ASTRA_DB_COLLECTION", "contracts")
+CASSANDRA_CONTACT_POINTS = [host.strip() for host in os.getenv("CASSANDRA_CONTACT_POINTS", "").split(",") if host.strip()]
+CASSANDRA_PORT = int(os.getenv("CASSANDRA_PORT", "9042"))
+CASSANDRA_USERNAME = os.getenv("CASSANDRA_USERNAME")
+CASSANDRA_PASSWORD = os.getenv("CASSANDRA_PASSWORD")
+CASSANDRA_REQUEST_TIMEOUT_SECONDS = float(os.getenv("CASSANDRA_REQUEST_TIMEOUT_SECONDS", "10"))
+CASSANDRA_FETCH_SIZE = int(os.getenv("CASSANDRA_FETCH_SIZE", "500"))
+# Contracts copied concurrently per step when rebuilding the query tables
+QUERY_TABLE_REBUILD_BATCH_SIZE = int(os.getenv("QUERY_TABLE_REBUILD_BATCH_SIZE", "50"))
+
+# Create the query tables at startup when they are missing (needs CREATE permission on the keyspace),
+# and backfill them in the background when they are empty but the base table is not
+CONTRACT_QUERY_TABLES_AUTO_CREATE = os.getenv("CONTRACT_QUERY_TABLES_AUTO_CREATE", "true").lower() == "true"
+
+# Upper bounds of the contract value buckets; values above the last bound share the last bucket
+CONTRACT_VALUE_BUCKETS = [
+    float(bound) for bound in os.getenv("CONTRACT_VALUE_BUCKETS", "10000,100000,1000000,10000000").split(",") if bound.strip()
+]
+
+# How long contract change-log rows are kept for statistics delta syncs
+CONTRACT_CHANGE_LOG_TTL_SECONDS = int(os.getenv("CONTRACT_CHANGE_LOG_TTL_SECONDS", "604800"))
+
+# Execution profile whose row factory decodes contract reads into Contract records
+CONTRACT_EXECUTION_PROFILE = "contracts"
+
+# Column types of the query tables (dates are stored as ISO text, maps as text to text)
+CONTRACT_COLUMN_TYPES = {
+    "id": "text",
+    "supplier_name": "text",
+    "contract_title": "text",
+    "contract_type": "text",
+    "start_date": "text",
+    "end_date": "text",
+    "value": "double",
+    "currency": "text",
+    "terms": "map<text, text>",
+    "clauses": "map<text, text>",
+    "risks": "map<text, text>",
+    "opportunities": "map<text, text>"
+}
+
+# Query tables: denormalized copies of the base table, each partitioned for one access path.
+# value_key is the non-null clustering copy of value (missing values sort as 0).
+QUERY_TABLES = {
+    "by_supplier": {
+        "fields": CONTRACT_FIELDS,
+        "partition_key": "supplier_name",
+        "primary_key": "((supplier_name), contract_type, value_key, id)"
+    },
+    "by_type": {
+        "fields": SUMMARY_FIELDS,
+        "partition_key": "contract_type",
+        "primary_key": "((contract_type), value_key, id)"
+    },
+    "by_value": {
+        "fields": SUMMARY_FIELDS,
+        "partition_key": "value_bucket",
+        "primary_key": "((value_bucket), value_key, id)"
+    }
+}
+
+# Clustering restrictions each query table supports, in the order their parameters are bound
+CLUSTERING_CONDITIONS = [
+    ("contract_type", "contract_type = ?"),
+    ("min_value", "value_key >= ?"),
+    ("max_value", "value_key <= ?")
+]
+
+_stats = {
+    "queries": 0,
+    "failures": 0,
+    "inFlight": 0,
+    "rows": 0,
+    "pages": 0,
+    "writes": 0
+}
+
+def is_contract_store_configured() -> bool:
+    """
+    Whether Astra or a Cassandra cluster is configured (otherwise mock contracts are served)
+    """
+    return bool(ASTRA_DB_SECURE_BUNDLE_PATH or CASSANDRA_CONTACT_POINTS)
+
+def value_bucket(value: Any) -> int:
+    """
+    Index of the CONTRACT_VALUE_BUCKETS bucket a contract value falls in
+    """
+    return bisect_left(CONTRACT_VALUE_BUCKETS, value_key(value))
+
+def value_buckets(min_value: Any = None, max_value: Any = None) -> List[int]:
+    """
+    Buckets that can hold values within [min_value, max_value] (either bound may be missing)
+    """
+    first = value_bucket(min_value) if min_value is not None else 0
+    last = value_bucket(max_value) if max_value is not None else len(CONTRACT_VALUE_BUCKETS)
+    return list(range(first, last + 1))
+
+def value_key(value: Any) -> float:
+    """
+    Clustering value of a contract value (missing values sort as 0)
+    """
+    return float(value) if value is not None else 0.0
+
+def query_table_key_columns(table: str) -> List[str]:
+    """
+    Primary key columns of a query table, in the order its DELETE binds them
+    """
+    partition_key = QUERY_TABLES[table]["partition_key"]
+    return [partition_key] + (["contract_type"] if table == "by_supplier" else []) + ["value_key", "id"]
+
+def plan_predicate(plan: Dict[str, Any]) -> Callable[[Contract], bool]:
+    """
+    In-memory equivalent of a search plan, for base-table scans while the query tables are backfilled
+    """
+    partition_key = QUERY_TABLES[plan["table"]]["partition_key"]
+    partitions = set(plan["partitions"])
+    restrictions = dict(zip(plan["restrictions"], plan["parameters"]))
+    min_value, max_value = plan["filter"] or (restrictions.get("min_value"), restrictions.get("max_value"))
+
+    def matches(contract: Contract) -> bool:
+        keys = {
+            "supplier_name": contract.supplier_name,
+            "contract_type": contract.contract_type or "",
+            "value_bucket": value_bucket(contract.value)
+        }
+        value = value_key(contract.value)
+        return (
+            keys[partition_key] in partitions
+            and ("contract_type" not in restrictions or keys["contract_type"] == restrictions["contract_type"])
+            and (min_value is None or value >= min_value)
+            and (max_value is None or value <= max_value)
+        )
+
+    return matches
+
+def clustering_shapes(table: str) -> List[Tuple[str, ...]]:
+    """
+    Clustering restriction combinations a query table can serve without ALLOW FILTERING.
+    Within a supplier partition the value range needs the contract type (the clustering column before it).
+    """
+    conditions = CLUSTERING_CONDITIONS if table == "by_supplier" else CLUSTERING_CONDITIONS[1:]
+    shapes = []
+    for included in product([False, True], repeat=len(conditions)):
+        shape = tuple(name for (name, _), use in zip(conditions, included) if use)
+        if table == "by_supplier" and shape and shape[0] != "contract_type":
+            continue
+        shapes.append(shape)
+    return shapes
+
+class ContractRepository:
+    """
+    Contract queries over one shared Cassandra session, using statements prepared once.
+    Reads go to the query table partitioned for the access path; writes keep the base
+    table and every query table consistent in one logged batch.
+    """
+
+    def __init__(self, session: Any, keyspace: str = ASTRA_DB_KEYSPACE, table: str = ASTRA_DB_COLLECTION):
+        self.session = session
+        self.table = f"{keyspace}.{table}"
+        self.query_tables = {name: f"{self.table}_{name}" for name in QUERY_TABLES}
+        # (query table, clustering restrictions) -> prepared SELECT
+        self.select_statements: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+        self.insert_statements: Dict[str, Any] = {}
+        self.delete_statements: Dict[str, Any] = {}
+        self.change_log = f"{self.table}_changes"
+        self.supplier_versions = f"{self.table}_supplier_versions"
+        self.current_keys = None
+        self.scan_base = None
+        self.by_id = None
+        self.scan_contracts = None
+        self.statistics = None
+        self.changes_since = None
+        self.supplier_version = None
+        self.key_scans: Dict[str, Any] = {}
+        self.any_base = None
+        self.any_indexed = None
+        # False while the query tables are empty but the base table is not (reads then scan the base table)
+        self.query_tables_ready = True
+        self.rebuild_lock: Optional[asyncio.Lock] = None
+
+    def prepare(self) -> None:
+        """
+        Create the query tables if needed and prepare every read and write statement (blocking; run once at startup)
+        """
+        if CONTRACT_QUERY_TABLES_AUTO_CREATE:
+            self.create_query_tables()
+
+        for name, definition in QUERY_TABLES.items():
+            table = self.query_tables[name]
+            fields = definition["fields"]
+            partition_key = definition["partition_key"]
+
+            for shape in clustering_shapes(name):
+                conditions = [f"{partition_key} = ?"] + [cql for condition, cql in CLUSTERING_CONDITIONS if condition in shape]
+                self.select_statements[(name, shape)] = self.session.prepare(
+                    f"SELECT {select_list(fields)} FROM {table} WHERE {' AND '.join(conditions)}"
+                )
+
+            columns = list(fields) + ["value_key"] + (["value_bucket"] if name == "by_value" else [])
+            self.insert_statements[name] = self.session.prepare(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+            )
+            key_columns = query_table_key_columns(name)
+            self.delete_statements[name] = self.session.prepare(
+                f"DELETE FROM {table} WHERE {' AND '.join(f'{column} = ?' for column in key_columns)}"
+            )
+            self.key_scans[name] = self.session.prepare(f"SELECT {', '.join(key_columns)} FROM {table}")
+
+        self.insert_statements["base"] = self.session.prepare(
+            f"INSERT INTO {self.table} ({', '.join(CONTRACT_FIELDS)}) VALUES ({', '.join('?' for _ in CONTRACT_FIELDS)})"
+        )
+        self.delete_statements["base"] = self.session.prepare(f"DELETE FROM {self.table} WHERE id = ?")
+        self.current_keys = self.session.prepare(
+            f"SELECT id, supplier_name, contract_type, value FROM {self.table} WHERE id = ?"
+        )
+        self.scan_base = self.session.prepare(f"SELECT {', '.join(CONTRACT_FIELDS)} FROM {self.table}")
+        self.by_id = self.session.prepare(f"SELECT {select_list(CONTRACT_FIELDS)} FROM {self.table} WHERE id = ?")
+        self.scan_contracts = self.session.prepare(f"SELECT {select_list(CONTRACT_FIELDS)} FROM {self.table}")
+        self.statistics = self.session.prepare(f"SELECT contract_type, value FROM {self.table}")
+        self.any_base = self.session.prepare(f"SELECT id FROM {self.table} LIMIT 1")
+        self.any_indexed = self.session.prepare(f"SELECT id FROM {self.query_tables['by_supplier']} LIMIT 1")
+
+        self.insert_statements["changes"] = self.session.prepare(
+            f"INSERT INTO {self.change_log} (day, changed_at, id, old_type, old_value, new_type, new_value) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?) USING TTL ?"
+        )
+        self.changes_since = self.session.prepare(
+            f"SELECT changed_at, id, old_type, old_value, new_type, new_value FROM {self.change_log} "
+            f"WHERE day = ? AND changed_at > ?"
+        )
+        self.insert_statements["supplier_version"] = self.session.prepare(
+            f"INSERT INTO {self.supplier_versions} (supplier_name, version) VALUES (?, ?)"
+        )
+        self.supplier_version = self.session.prepare(
+            f"SELECT version FROM {self.supplier_versions} WHERE supplier_name = ?"
+        )
+
+    def create_query_tables(self) -> None:
+        """
+        CREATE TABLE IF NOT EXISTS for every query table (blocking)
+        """
+        for name, definition in QUERY_TABLES.items():
+            columns = [f"{field} {CONTRACT_COLUMN_TYPES[field]}" for field in definition["fields"]]
+            columns.append("value_key double")
+            if name == "by_value":
+                columns.append("value_bucket int")
+            self.session.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.query_tables[name]} "
+                f"({', '.join(columns)}, PRIMARY KEY {definition['primary_key']})"
+            )
+
+        # One partition per UTC day so delta syncs read only the days since their watermark
+        self.session.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.change_log} "
+            f"(day text, changed_at timeuuid, id text, old_type text, old_value double, new_type text, new_value double, "
+            f"PRIMARY KEY ((day), changed_at, id))"
+        )
+        # One row per supplier, rewritten by every write touching its contracts (cache invalidation probe)
+        self.session.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.supplier_versions} "
+            f"(supplier_name text PRIMARY KEY, version timeuuid)"
+        )
+
+    async def check_query_tables(self) -> bool:
+        """
+        Whether the query tables can serve reads: False when they are empty but the base table has contracts
+        """
+        self.query_tables_ready = bool(await self.execute(self.any_indexed)) or not await self.execute(self.any_base)
+        return self.query_tables_ready
+
+    async def get_by_supplier(self, supplier_name: str) -> List[Contract]:
+        """
+        Get every contract of a supplier (one partition read)
+        """
+        if not self.query_tables_ready:
+            return [contract async for page in self.iter_supplier_contracts(supplier_name) for contract in page]
+
+        return await self.execute(
+            self.select_statements[("by_supplier", ())],
+            [supplier_name],
+            execution_profile=CONTRACT_EXECUTION_PROFILE
+        )
+
+    async def iter_supplier_contracts(self, supplier_name: str, fetch_size: Optional[int] = None) -> AsyncIterator[List[Contract]]:
+        """
+        Yield a supplier's contracts one Cassandra page at a time
+        """
+        if not self.query_tables_ready:
+            async for page in self.iter_base_matching(lambda contract: contract.supplier_name == supplier_name, fetch_size):
+                yield page
+            return
+
+        async for page in self.iter_pages(
+            self.select_statements[("by_supplier", ())],
+            [supplier_name],
+            fetch_size=fetch_size or CASSANDRA_FETCH_SIZE,
+            execution_profile=CONTRACT_EXECUTION_PROFILE
+        ):
+            yield page
+
+    async def get_supplier_version(self, supplier_name: str) -> Any:
+        """
+        Version (timeuuid of the latest write) of a supplier's contracts; None when never written through this repository
+        """
+        rows = await self.execute(self.supplier_version, [supplier_name])
+        return rows[0]["version"] if rows else None
+
+    async def get_by_ids(self, contract_ids: List[str]) -> List[Contract]:
+        """
+        Get contracts by id (one partition read each); ids that no longer exist are left out
+        """
+        pages = await asyncio.gather(*(
+            self.execute(self.by_id, [contract_id], execution_profile=CONTRACT_EXECUTION_PROFILE)
+            for contract_id in contract_ids
+        ))
+        return [contract for page in pages for contract in page]
+
+    async def iter_all_contracts(self, fetch_size: Optional[int] = None) -> AsyncIterator[List[Contract]]:
+        """
+        Yield every contract one page at a time (a full-table scan, for building local indexes)
+        """
+        async for page in self.iter_pages(
+            self.scan_contracts,
+            fetch_size=fetch_size or CASSANDRA_FETCH_SIZE,
+            execution_profile=CONTRACT_EXECUTION_PROFILE
+        ):
+            yield page
+
+    async def iter_base_matching(
+        self,
+        predicate: Callable[[Contract], bool],
+        fetch_size: Optional[int] = None
+    ) -> AsyncIterator[List[Contract]]:
+        """
+        Yield the base-table contracts matching a predicate, page by page (a full scan, used until the query tables are backfilled)
+        """
+        async for page in self.iter_all_contracts(fetch_size):
+            matching = [contract for contract in page if predicate(contract)]
+            if matching:
+                yield matching
+
+    async def execute_plan(self, plan: Dict[str, Any]) -> List[Contract]:
+        """
+        Run a search plan: one single-partition read per planned partition, then the plan's in-memory value filter
+        """
+        if not self.query_tables_ready:
+            return [contract async for page in self.iter_base_matching(plan_predicate(plan)) for contract in page]
+
+        statement = self.select_statements[(plan["table"], plan["restrictions"])]
+        pages = await asyncio.gather(*(
+            self.execute(statement, [partition] + list(plan["parameters"]), execution_profile=CONTRACT_EXECUTION_PROFILE)
+            for partition in plan["partitions"]
+        ))
+
+        min_value, max_value = plan["filter"] or (None, None)
+        contracts = []
+        for page in pages:
+            for contract in page:
+                value = value_key(contract.value)
+                if (min_value is not None and value < min_value) or (max_value is not None and value > max_value):
+                    continue
+                contracts.append(contract)
+        return contracts
+
+    async def save_contract(self, contract: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert or update a contract in the base table and every query table.
+        Query-table rows keyed by the contract's previous supplier, type or value are removed in the same batch,
+        the type/value change is appended to the change log and the affected suppliers' versions are bumped;
+        returns the change.
+        """
+        record = to_stored_contract(contract)
+        previous = await self.execute(self.current_keys, [record["id"]])
+
+        batch = BatchStatement(batch_type=BatchType.LOGGED)
+        if previous:
+            self.add_query_table_deletes(batch, previous[0])
+        batch.add(self.insert_statements["base"], [contract.get(field) for field in CONTRACT_FIELDS])
+        self.add_query_table_inserts(batch, record)
+        change = self.add_change(batch, record["id"], to_stored_contract(previous[0]) if previous else None, record)
+        self.add_supplier_versions(batch, change, [previous[0]["supplier_name"] if previous else None, record["supplier_name"]])
+
+        await self.execute(batch)
+        _stats["writes"] += 1
+        return change
+
+    async def delete_contract(self, contract_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Delete a contract from the base table and every query table; returns the change, or None when it did not exist
+        """
+        previous = await self.execute(self.current_keys, [contract_id])
+        if not previous:
+            return None
+
+        batch = BatchStatement(batch_type=BatchType.LOGGED)
+        self.add_query_table_deletes(batch, previous[0])
+        batch.add(self.delete_statements["base"], [contract_id])
+        change = self.add_change(batch, contract_id, to_stored_contract(previous[0]), None)
+        self.add_supplier_versions(batch, change, [previous[0]["supplier_name"]])
+
+        await self.execute(batch)
+        _stats["writes"] += 1
+        return change
+
+    def add_change(
+        self,
+        batch: Any,
+        contract_id: str,
+        previous: Optional[Dict[str, Any]],
+        current: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        changed_at = uuid_from_time(time.time())
+        change = {
+            "changed_at": changed_at,
+            "id": contract_id,
+            "old_type": previous["contract_type"] if previous else None,
+            "old_value": previous["value"] if previous else None,
+            "new_type": current["contract_type"] if current else None,
+            "new_value": current["value"] if current else None
+        }
+        day = datetime_from_uuid1(changed_at).strftime("%Y-%m-%d")
+        batch.add(
+            self.insert_statements["changes"],
+            [day, changed_at, contract_id, change["old_type"], change["old_value"], change["new_type"], change["new_value"], CONTRACT_CHANGE_LOG_TTL_SECONDS]
+        )
+        return change
+
+    def add_supplier_versions(self, batch: Any, change: Dict[str, Any], supplier_names: List[Optional[str]]) -> List[str]:
+        """
+        Set each supplier's version to the change's timeuuid; returns the distinct suppliers touched
+        """
+        suppliers = list(dict.fromkeys(name for name in supplier_names if name is not None))
+        for supplier_name in suppliers:
+            batch.add(self.insert_statements["supplier_version"], [supplier_name, change["changed_at"]])
+        change["suppliers"] = suppliers
+        return suppliers
+
+    async def get_changes_since(self, since: float) -> List[Dict[str, Any]]:
+        """
+        Change-log entries written after a unix timestamp, oldest first (one partition read per UTC day)
+        """
+        start = datetime.fromtimestamp(since, tz=timezone.utc).date()
+        today = datetime.now(timezone.utc).date()
+        days = [(start + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range((today - start).days + 1)]
+
+        pages = await asyncio.gather(*(
+            self.execute(self.changes_since, [day, min_uuid_from_time(since)])
+            for day in days
+        ))
+        return [change for page in pages for change in page]
+
+    async def rebuild_query_tables(self) -> Dict[str, int]:
+        """
+        Copy every base-table contract into the query tables page by page, delete query-table rows no
+        base row backs any more, and bump the version of every supplier touched (initial backfill or reconciliation)
+        """
+        if self.rebuild_lock is None:
+            self.rebuild_lock = asyncio.Lock()
+
+        async with self.rebuild_lock:
+            start_time = time.perf_counter()
+            # Query-table keys of every base contract (a few small tuples per contract, not whole rows)
+            current: Dict[str, Dict[str, Tuple[Any, ...]]] = {}
+            suppliers: Set[str] = set()
+
+            async for page in self.iter_pages(self.scan_base, fetch_size=CASSANDRA_FETCH_SIZE):
+                records = [to_stored_contract(row) for row in page]
+                for start in range(0, len(records), QUERY_TABLE_REBUILD_BATCH_SIZE):
+                    await asyncio.gather(*(
+                        self.execute(self.add_query_table_inserts(BatchStatement(batch_type=BatchType.LOGGED), record))
+                        for record in records[start:start + QUERY_TABLE_REBUILD_BATCH_SIZE]
+                    ))
+                for record in records:
+                    current[record["id"]] = {
+                        name: tuple(record[column] for column in query_table_key_columns(name)) for name in QUERY_TABLES
+                    }
+                    suppliers.add(record["supplier_name"])
+
+            stale_rows, stale_suppliers = await self.delete_stale_query_rows(current)
+            suppliers |= stale_suppliers
+
+            # Cached supplier contracts read before the rebuild are invalidated like after any write
+            version = uuid_from_time(time.time())
+            supplier_list = sorted(suppliers)
+            for start in range(0, len(supplier_list), QUERY_TABLE_REBUILD_BATCH_SIZE):
+                await asyncio.gather(*(
+                    self.execute(self.insert_statements["supplier_version"], [supplier_name, version])
+                    for supplier_name in supplier_list[start:start + QUERY_TABLE_REBUILD_BATCH_SIZE]
+                ))
+
+            self.query_tables_ready = True
+            print(
+                f"🧱 Rebuilt contract query tables from {len(current)} base rows "
+                f"({stale_rows} stale rows deleted) in {time.perf_counter() - start_time:.1f}s"
+            )
+            return {"rows": len(current), "staleRowsDeleted": stale_rows, "suppliers": len(suppliers)}
+
+    async def delete_stale_query_rows(self, current: Dict[str, Dict[str, Tuple[Any, ...]]]) -> Tuple[int, Set[str]]:
+        """
+        Delete query-table rows whose contract is gone or now sits under other keys; returns the count and their suppliers
+        """
+        stale: List[Tuple[str, Tuple[Any, ...]]] = []
+        for name in QUERY_TABLES:
+            async for page in self.iter_pages(self.key_scans[name], fetch_size=CASSANDRA_FETCH_SIZE):
+                for row in page:
+                    keys = tuple(row[column] for column in query_table_key_columns(name))
+                    expected = current.get(row["id"])
+                    if expected is None or expected[name] != keys:
+                        stale.append((name, keys))
+
+        deleted = 0
+        suppliers: Set[str] = set()
+        for start in range(0, len(stale), QUERY_TABLE_REBUILD_BATCH_SIZE):
+            chunk = stale[start:start + QUERY_TABLE_REBUILD_BATCH_SIZE]
+            # Re-read the contract so a row written by a save during the rebuild is not deleted
+            latest = await asyncio.gather(*(self.execute(self.current_keys, [keys[-1]]) for _, keys in chunk))
+            deletes = []
+            for (name, keys), rows in zip(chunk, latest):
+                if rows and tuple(to_stored_contract(rows[0])[column] for column in query_table_key_columns(name)) == keys:
+                    continue
+                deletes.append(self.execute(self.delete_statements[name], list(keys)))
+                if name == "by_supplier":
+                    suppliers.add(keys[0])
+            await asyncio.gather(*deletes)
+            deleted += len(deletes)
+
+        return deleted, suppliers
+
+    def add_query_table_inserts(self, batch: Any, record: Dict[str, Any]) -> Any:
+        for name, definition in QUERY_TABLES.items():
+            parameters = [record[field] for field in definition["fields"]] + [record["value_key"]]
+            if name == "by_value":
+                parameters.append(record["value_bucket"])
+            batch.add(self.insert_statements[name], parameters)
+        return batch
+
+    def add_query_table_deletes(self, batch: Any, previous: Dict[str, Any]) -> Any:
+        record = to_stored_contract(previous)
+        batch.add(self.delete_statements["by_supplier"], [record["supplier_name"], record["contract_type"], record["value_key"], record["id"]])
+        batch.add(self.delete_statements["by_type"], [record["contract_type"], record["value_key"], record["id"]])
+        batch.add(self.delete_statements["by_value"], [record["value_bucket"], record["value_key"], record["id"]])
+        return batch
+
+    async def scan_statistics(self) -> List[Dict[str, Any]]:
+        """
+        Type and value of every contract (a full-table scan, used to recompute statistics)
+        """
+        return await self.execute(self.statistics)
+
+    async def execute(
+        self,
+        statement: Any,
+        parameters: Optional[Sequence[Any]] = None,
+        execution_profile: Any = EXEC_PROFILE_DEFAULT
+    ) -> List[Any]:
+        """
+        Run a statement and collect every page (dict rows, or Contract records under the contracts profile)
+        """
+        start_time = time.perf_counter()
+        rows: List[Any] = []
+        async for page in self.iter_pages(statement, parameters, execution_profile=execution_profile):
+            rows.extend(page)
+
+        print(f"⏱️ Contract query returned {len(rows)} rows in {time.perf_counter() - start_time:.3f}s")
+        return rows
+
+    async def iter_pages(
+        self,
+        statement: Any,
+        parameters: Optional[Sequence[Any]] = None,
+        fetch_size: Optional[int] = None,
+        execution_profile: Any = EXEC_PROFILE_DEFAULT
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Run a statement with execute_async and yield its pages without blocking the event loop.
+        The next page is only requested once the consumer asks for it, so at most one page is held
+        in memory and a consumer that stops early never fetches the rest.
+        """
+        loop = asyncio.get_running_loop()
+        pages: asyncio.Queue = asyncio.Queue()
+
+        _stats["queries"] += 1
+        _stats["inFlight"] += 1
+
+        # Callbacks run on the driver's I/O thread; pages are handed back to the event loop thread
+        def on_page(page: Optional[List[Any]]) -> None:
+            # Writes complete with no rows
+            loop.call_soon_threadsafe(pages.put_nowait, (page or [], None))
+
+        def on_error(error: BaseException) -> None:
+            loop.call_soon_threadsafe(pages.put_nowait, (None, error))
+
+        try:
+            if fetch_size is not None and hasattr(statement, "bind"):
+                statement = statement.bind(parameters or [])
+                statement.fetch_size = fetch_size
+                parameters = None
+            response_future = self.session.execute_async(statement, parameters, execution_profile=execution_profile)
+            response_future.add_callbacks(on_page, on_error)
+
+            while True:
+                page, error = await pages.get()
+                if error is not None:
+                    raise error
+                _stats["pages"] += 1
+                _stats["rows"] += len(page)
+                yield page
+                if not response_future.has_more_pages:
+                    break
+                response_future.start_fetching_next_page()
+
+        except Exception as error:
+            _stats["failures"] += 1
+            raise ContractStoreError(f"Contract query failed: {error}") from error
+        finally:
+            _stats["inFlight"] -= 1
+
+def select_list(fields: List[str]) -> str:
+    """
+    SELECT column list for contract reads: map columns come back as JSON text for lazy decoding
+    """
+    return ", ".join(f"toJson({field}) AS {field}" if field in CONTRACT_MAP_FIELDS else field for field in fields)
+
+def to_contract(row: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """
+    Contract dict with the given fields (missing columns become None)
+    """
+    return {field: row.get(field) for field in fields}
+
+def to_stored_contract(contract: Any) -> Dict[str, Any]:
+    """
+    Contract as written to the query tables: key columns made non-null, dates as ISO text, maps as text
+    """
+    if isinstance(contract, Contract):
+        contract = contract.to_dict()
+    if not contract.get("id") or not contract.get("supplier_name"):
+        raise ContractStoreError("Contracts need an id and a supplier_name")
+
+    record = to_contract(contract, CONTRACT_FIELDS)
+    record["contract_type"] = record["contract_type"] or ""
+    for field in ("start_date", "end_date"):
+        if record[field] is not None:
+            record[field] = str(record[field])
+    if record["value"] is not None:
+        record["value"] = float(record["value"])
+    for field in ("terms", "clauses", "risks", "opportunities"):
+        if record[field] is not None:
+            record[field] = {str(key): str(value) for key, value in record[field].items()}
+    record["value_key"] = value_key(record["value"])
+    record["value_bucket"] = value_bucket(record["value"])
+    return record
+
+_cluster: Optional[Cluster] = None
+_repository: Optional[ContractRepository] = None
+_open_error: Optional[str] = None
+_backfill_task: Optional[asyncio.Task] = None
+
+def connect_session() -> Tuple[Cluster, Any]:
+    """
+    Connect to Astra (secure connect bundle) or the configured Cassandra contact points
+    """
+    profile = ExecutionProfile(row_factory=dict_factory, request_timeout=CASSANDRA_REQUEST_TIMEOUT_SECONDS)
+    contract_profile = ExecutionProfile(row_factory=contract_row_factory, request_timeout=CASSANDRA_REQUEST_TIMEOUT_SECONDS)
+    execution_profiles = {EXEC_PROFILE_DEFAULT: profile, CONTRACT_EXECUTION_PROFILE: contract_profile}
+
+    if ASTRA_DB_SECURE_BUNDLE_PATH:
+        if ASTRA_DB_TOKEN:
+            auth_provider = PlainTextAuthProvider("token", ASTRA_DB_TOKEN)
+        else:
+            auth_provider = PlainTextAuthProvider(ASTRA_DB_CLIENT_ID, ASTRA_DB_SECRET)
+        cluster = Cluster(
+            cloud={"secure_connect_bundle": ASTRA_DB_SECURE_BUNDLE_PATH},
+            auth_provider=auth_provider,
+            execution_profiles=execution_profiles
+        )
+    else:
+        auth_provider = PlainTextAuthProvider(CASSANDRA_USERNAME, CASSANDRA_PASSWORD) if CASSANDRA_USERNAME else None
+        cluster = Cluster(
+            contact_points=CASSANDRA_CONTACT_POINTS,
+            port=CASSANDRA_PORT,
+            auth_provider=auth_provider,
+            execution_profiles=execution_profiles
+        )
+
+    session = cluster.connect()
+    session.default_fetch_size = CASSANDRA_FETCH_SIZE
+    return cluster, session
+
+async def _backfill_query_tables(repository: ContractRepository) -> None:
+    try:
+        await repository.rebuild_query_tables()
+    except Exception as error:
+        print(f"Contract query table backfill failed: {error}")
+
+async def open_contract_repository(session: Any = None) -> Optional[ContractRepository]:
+    """
+    Connect the shared session and prepare statements (called from the FastAPI lifespan).
+    A session passed in (for tests) must define the CONTRACT_EXECUTION_PROFILE execution profile.
+    """
+    global _cluster, _repository, _open_error, _backfill_task
+
+    if _repository is not None:
+        return _repository
+
+    if session is None and not is_contract_store_configured():
+        print("⚠️ Contract store not configured (set ASTRA_DB_SECURE_BUNDLE_PATH or CASSANDRA_CONTACT_POINTS); serving mock contracts")
+        return None
+
+    try:
+        if session is None:
+            _cluster, session = await asyncio.to_thread(connect_session)
+        repository = ContractRepository(session)
+        await asyncio.to_thread(repository.prepare)
+    except Exception as error:
+        _open_error = str(error)
+        print(f"❌ Contract store connection failed: {error}")
+        await close_contract_repository()
+        return None
+
+    try:
+        await repository.check_query_tables()
+    except ContractStoreError as error:
+        print(f"⚠️ Could not check whether the contract query tables are populated: {error}")
+
+    _repository = repository
+    _open_error = None
+    if not repository.query_tables_ready:
+        if CONTRACT_QUERY_TABLES_AUTO_CREATE:
+            print("🧱 Contract query tables are empty: backfilling in the background, reads scan the base table until then")
+            _backfill_task = asyncio.create_task(_backfill_query_tables(repository))
+        else:
+            print("⚠️ Contract query tables are empty: reads scan the base table until POST /api/contracts/store/rebuild")
+    print(f"🔌 Contract store ready ({repository.table} + {len(repository.query_tables)} query tables, {len(repository.select_statements)} prepared reads)")
+    return _repository
+
+async def get_contract_repository() -> Optional[ContractRepository]:
+    """
+    Get the contract repository, or None when no contract store is configured.
+    A configured store that failed to connect is retried here and raises if still unreachable.
+    """
+    if _repository is not None or not is_contract_store_configured():
+        return _repository
+
+    repository = await open_contract_repository()
+    if repository is None:
+        raise ContractStoreError(f"Contract store unavailable: {_open_error}")
+    return repository
+
+async def close_contract_repository() -> None:
+    """
+    Shut down the Cassandra cluster connection (called from the FastAPI lifespan)
+    """
+    global _cluster, _repository, _backfill_task
+
+    if _backfill_task is not None:
+        _backfill_task.cancel()
+        try:
+            await _backfill_task
+        except asyncio.CancelledError:
+            pass
+        _backfill_task = None
+
+    if _cluster is not None:
+        await asyncio.to_thread(_cluster.shutdown)
+        print("🔌 Contract store closed")
+
+    _cluster = None
+    _repository = None
+
+def get_contract_store_stats() -> Dict[str, Any]:
+    """
+    Get contract store connection state and query counters
+    """
+    return {
+        **_stats,
+        "configured": is_contract_store_configured(),
+        "connected": _repository is not None,
+        "table": _repository.table if _repository is not None else None,
+        "queryTables": list(_repository.query_tables.values()) if _repository is not None else [],
+        "supplierVersions": _repository.supplier_versions if _repository is not None else None,
+        "queryTablesReady": _repository.query_tables_ready if _repository is not None else None,
+        "lastError": _open_error
+    }
@@ -1,47 +1,51 @@
-from typing import Dict, Any, Optional
-from app.services.supabase_service import get_part_information
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from app.services.supabase_service import get_part_information, get_parts_information
 from app.services.astra_service import get_contract_information
-from app.services.ai_service import analyze_with_ai
-from app.utils.validation import sanitize_part_number
+from app.services.ai_service import analyze_with_ai, stream_ai_analysis, get_analysis_cache_key
+from app.services.analysis_repository import get_analysis_repository
+from app.services.llm_gateway import OPENAI_MODEL
+from app.services.prompt_builder import PROMPT_CONTRACT_TOKEN_BUDGET
+from app.services.section_analysis import is_complete_analysis
+from app.utils.validation import sanitize_part_number, validate_part_number
 from app.utils.exceptions import ContractAnalysisError
+from app.utils.single_flight import SingleFlight
+
+# Upper bound on concurrent contract fetches and AI calls within one batch
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+# Concurrent analyses of the same part share one pipeline run
+_analysis_flights = SingleFlight()
 
 async def analyze_contract(part_number: str) -> Dict[str, Any]:
     """
-    Main contract analysis function
+    Main contract analysis function (concurrent calls for the same part are coalesced)
     """
-    try:
-        # Step 1: Sanitize and validate part number
-        sanitized_part_number = sanitize_part_number(part_number)
-        if not sanitized_part_number:
-            raise ContractAnalysisError("Invalid part number format")
+    sanitized_part_number = sanitize_part_number(part_number)
+    if not sanitized_part_number:
+        raise ContractAnalysisError("Invalid part number format")
 
-        print(f"📋 Step 1: Retrieving part information for {sanitized_part_number}")
-        print(f"🔍 About to call get_part_information...")
+    return await _analysis_flights.do(
+        sanitized_part_number,
+        lambda: run_contract_analysis(sanitized_part_number)
+    )
 
-        # Step 2: Get part information from Supabase
-        part_info = await get_part_information(sanitized_part_number)
-        print(f"✅ get_part_information completed")
-        if not part_info:
-            raise ContractAnalysisError(
-                f"Part number {sanitized_part_number} not found in MASTER_FILE table",
-                code="PART_NOT_FOUND"
-            )
-
-        print(f"🏭 Step 2: Found supplier: {part_info['suppliername']}")
-        print(f"🔍 About to call get_contract_information...")
-
-        # Step 3: Get contract information from DataStax Astra
-        contract_info = await get_contract_information(part_info['suppliername'])
-        print(f"✅ get_contract_information completed")
-        if not contract_info or len(contract_info) == 0:
-            raise ContractAnalysisError(
-                f"No contracts found for supplier: {part_info['suppliername']}",
-                code="CONTRACTS_NOT_FOUND",
-                supplier=part_info['suppliername']
-            )
-
-        print(f"📄 Step 3: Found {len(contract_info)} contracts for analysis")
-        print(f"🔍 About to call analyze_with_ai...")
+def get_coalescing_stats() -> Dict[str, Any]:
+    """
+    Get request coalescing counters for analyze_contract
+    """
+    return _analysis_flights.stats()
+
+async def run_contract_analysis(part_number: str) -> Dict[str, Any]:
+    """
+    Run the full analysis pipeline for a part number
+    """
+    try:
+        start_time = time.perf_counter()
+        sanitized_part_number, part_info, contract_info = await load_analysis_inputs(part_number)
 
         # Step 4: Analyze with AI
         print(f"🤖 Step 4: Starting AI analysis")
@@ -49,32 +53,8 @@ async def analyze_contract(part_number: str) -> Dict[str, Any]:
         print(f"✅ analyze_with_ai completed")
 
         # Step 5: Structure the final response
-        analysis_result = {
-            "supplierOverview": {
-                "supplierName": part_info['suppliername'],
-                "supplierNumber": part_info['suppliernumber'],
-                "supplierContact": {
-                    "name": part_info['suppliercontactname'],
-                    "email": part_info['suppliercontactemail']
-                },
-                "manufacturingLocation": part_info['suppliermanufacturinglocation'],
-                "numberOfContractsFound": len(contract_info),
-                "dateRangeOfContracts": ai_analysis.get('dateRangeOfContracts', 'Not specified')
-            },
-            "partInformation": {
-                "partNumber": part_info['PartNumber'],
-                "partName": part_info['partname'],
-                "material": part_info['material'],
-                "material2": part_info.get('material2'),
-                "currency": part_info['currency']
-            },
-            "keyClausesIdentification": ai_analysis.get('keyClausesIdentification', {}),
-            "riskAssessmentAndMitigation": ai_analysis.get('riskAssessmentAndMitigation', {}),
-            "contractBenchmarkingAndPrecedentBasedInsights": ai_analysis.get('contractBenchmarkingAndPrecedentBasedInsights', {}),
-            "negotiationLeveragePoints": ai_analysis.get('negotiationLeveragePoints', {}),
-            "complianceCheck": ai_analysis.get('complianceCheck', {}),
-            "summaryAndStrategicRecommendations": ai_analysis.get('summaryAndStrategicRecommendations', {})
-        }
+        analysis_result = build_analysis_result(part_info, contract_info, ai_analysis)
+        await record_analysis(part_info, contract_info, analysis_result, start_time)
 
         print(f"✅ Analysis completed successfully for {sanitized_part_number}")
 
@@ -86,16 +66,322 @@ async def analyze_contract(part_number: str) -> Dict[str, Any]:
         print(f"Contract analysis failed: {error}")
         raise ContractAnalysisError(f"Analysis failed: {str(error)}")
 
+async def stream_contract_analysis(part_number: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming contract analysis: yields (event, data) pairs as each piece becomes available
+    """
+    try:
+        start_time = time.perf_counter()
+        sanitized_part_number, part_info, contract_info = await load_analysis_inputs(part_number)
+
+        # Database results go out before the model has produced anything
+        yield "supplierOverview", build_supplier_overview(part_info, contract_info)
+        yield "partInformation", build_part_information(part_info)
+
+        print(f"🤖 Step 4: Starting streamed AI analysis")
+        ai_analysis: Dict[str, Any] = {}
+        async for section, value in stream_ai_analysis(part_info, contract_info):
+            ai_analysis[section] = value
+            yield "section", {"section": section, "data": value}
+
+        analysis_result = build_analysis_result(part_info, contract_info, ai_analysis)
+        await record_analysis(part_info, contract_info, analysis_result, start_time)
+
+        print(f"✅ Streamed analysis completed successfully for {sanitized_part_number}")
+
+        yield "complete", {
+            "success": True,
+            "partNumber": part_number,
+            "timestamp": datetime.now().isoformat(),
+            "analysis": analysis_result
+        }
+
+    except ContractAnalysisError:
+        raise
+    except Exception as error:
+        print(f"Streamed contract analysis failed: {error}")
+        raise ContractAnalysisError(f"Analysis failed: {str(error)}")
+
+async def analyze_parts_batch(part_numbers: List[str]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze many parts, yielding one result (or per-item error) per part as it completes.
+    Parts are resolved with one MASTER_FILE query and grouped by supplier so each
+    supplier's contracts are fetched once.
+    """
+    start_time = datetime.now()
+    queue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    done = object()
+
+    def batch_error(part_number: str, code: str, message: str, supplier: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "partNumber": part_number,
+            "timestamp": datetime.now().isoformat(),
+            "error": {"code": code, "message": message, "supplier": supplier}
+        }
+
+    # Step 1: Validate and de-duplicate part numbers
+    valid_part_numbers: List[str] = []
+    for part_number in part_numbers:
+        sanitized_part_number = sanitize_part_number(part_number)
+        validation_result = validate_part_number(sanitized_part_number)
+        if not validation_result["is_valid"]:
+            yield batch_error(part_number, "INVALID_PART_NUMBER", validation_result["message"])
+        elif sanitized_part_number not in valid_part_numbers:
+            valid_part_numbers.append(sanitized_part_number)
+
+    if not valid_part_numbers:
+        return
+
+    # Step 2: Resolve every part with one bulk query and group by supplier
+    try:
+        parts = await get_parts_information(valid_part_numbers, profile="pricing")
+    except Exception as error:
+        print(f"Batch part lookup failed: {error}")
+        for part_number in valid_part_numbers:
+            yield batch_error(part_number, "PART_LOOKUP_FAILED", str(error))
+        return
+
+    parts_by_supplier: Dict[str, List[Dict[str, Any]]] = {}
+    for part_number in valid_part_numbers:
+        part_info = parts.get(part_number)
+        if not part_info:
+            yield batch_error(part_number, "PART_NOT_FOUND", f"Part number {part_number} not found in MASTER_FILE table")
+        else:
+            parts_by_supplier.setdefault(part_info['suppliername'], []).append(part_info)
+
+    print(f"📦 Batch: {len(parts)} parts across {len(parts_by_supplier)} suppliers")
+
+    async def analyze_part(part_info: Dict[str, Any], contract_info: List[Dict[str, Any]]) -> None:
+        async with semaphore:
+            try:
+                part_start_time = time.perf_counter()
+                ai_analysis = await analyze_with_ai(part_info, contract_info)
+                analysis_result = build_analysis_result(part_info, contract_info, ai_analysis)
+                await record_analysis(part_info, contract_info, analysis_result, part_start_time)
+                await queue.put({
+                    "success": True,
+                    "partNumber": part_info['PartNumber'],
+                    "timestamp": datetime.now().isoformat(),
+                    "analysis": analysis_result
+                })
+            except Exception as error:
+                print(f"Batch analysis failed for {part_info['PartNumber']}: {error}")
+                await queue.put(batch_error(part_info['PartNumber'], "ANALYSIS_FAILED", str(error), part_info['suppliername']))
+
+    async def analyze_supplier(supplier_name: str, supplier_parts: List[Dict[str, Any]]) -> None:
+        # Step 3: One contract fetch per supplier
+        try:
+            async with semaphore:
+                contract_info = await get_contract_information(supplier_name, token_budget=PROMPT_CONTRACT_TOKEN_BUDGET)
+        except Exception as error:
+            for part_info in supplier_parts:
+                await queue.put(batch_error(part_info['PartNumber'], "CONTRACT_LOOKUP_FAILED", str(error), supplier_name))
+            return
+
+        if not contract_info:
+            for part_info in supplier_parts:
+                await queue.put(batch_error(
+                    part_info['PartNumber'],
+                    "CONTRACTS_NOT_FOUND",
+                    f"No contracts found for supplier: {supplier_name}",
+                    supplier_name
+                ))
+            return
+
+        # Step 4: Fan out AI calls for the supplier's parts
+        await asyncio.gather(*(analyze_part(part_info, contract_info) for part_info in supplier_parts))
+
+    async def run_all() -> None:
+        try:
+            await asyncio.gather(*(
+                analyze_supplier(supplier_name, supplier_parts)
+                for supplier_name, supplier_parts in parts_by_supplier.items()
+            ))
+        finally:
+            await queue.put(done)
+
+    producer = asyncio.create_task(run_all())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        if not producer.done():
+            producer.cancel()
+
+    print(f"✅ Batch completed in {(datetime.now() - start_time).total_seconds():.2f}s")
+
+async def load_analysis_inputs(part_number: str) -> Tuple[str, Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Resolve the part and its supplier's contracts (analysis steps 1-3)
+    """
+    # Step 1: Sanitize and validate part number
+    sanitized_part_number = sanitize_part_number(part_number)
+    if not sanitized_part_number:
+        raise ContractAnalysisError("Invalid part number format")
+
+    print(f"📋 Step 1: Retrieving part information for {sanitized_part_number}")
+    print(f"🔍 About to call get_part_information...")
+
+    # Step 2: Get part information from Supabase
+    # The analysis only reads part attributes and current pricing
+    part_info = await get_part_information(sanitized_part_number, profile="pricing")
+    print(f"✅ get_part_information completed")
+    if not part_info:
+        raise ContractAnalysisError(
+            f"Part number {sanitized_part_number} not found in MASTER_FILE table",
+            code="PART_NOT_FOUND"
+        )
+
+    print(f"🏭 Step 2: Found supplier: {part_info['suppliername']}")
+    print(f"🔍 About to call get_contract_information...")
+
+    # Step 3: Get contract information from DataStax Astra
+    # Only as many contract pages as the prompt budget can use
+    contract_info = await get_contract_information(part_info['suppliername'], token_budget=PROMPT_CONTRACT_TOKEN_BUDGET)
+    print(f"✅ get_contract_information completed")
+    if not contract_info or len(contract_info) == 0:
+        raise ContractAnalysisError(
+            f"No contracts found for supplier: {part_info['suppliername']}",
+            code="CONTRACTS_NOT_FOUND",
+            supplier=part_info['suppliername']
+        )
+
+    print(f"📄 Step 3: Found {len(contract_info)} contracts for analysis")
+
+    return sanitized_part_number, part_info, contract_info
+
+def build_supplier_overview(
+    part_info: Dict[str, Any],
+    contract_info: List[Dict[str, Any]],
+    date_range: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build the supplierOverview section
+    """
+    return {
+        "supplierName": part_info['suppliername'],
+        "supplierNumber": part_info['suppliernumber'],
+        "supplierContact": {
+            "name": part_info['suppliercontactname'],
+            "email": part_info['suppliercontactemail']
+        },
+        "manufacturingLocation": part_info['suppliermanufacturinglocation'],
+        "numberOfContractsFound": len(contract_info),
+        "dateRangeOfContracts": date_range
+    }
+
+def build_part_information(part_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the partInformation section
+    """
+    return {
+        "partNumber": part_info['PartNumber'],
+        "partName": part_info['partname'],
+        "material": part_info['material'],
+        "material2": part_info.get('material2'),
+        "currency": part_info['currency']
+    }
+
+def build_analysis_result(
+    part_info: Dict[str, Any],
+    contract_info: List[Dict[str, Any]],
+    ai_analysis: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Merge database data and AI sections into the analysis response schema
+    """
+    analysis_result = {
+        "supplierOverview": build_supplier_overview(
+            part_info,
+            contract_info,
+            ai_analysis.get('dateRangeOfContracts', 'Not specified')
+        ),
+        "partInformation": build_part_information(part_info),
+        "keyClausesIdentification": ai_analysis.get('keyClausesIdentification', {}),
+        "riskAssessmentAndMitigation": ai_analysis.get('riskAssessmentAndMitigation', {}),
+        "contractBenchmarkingAndPrecedentBasedInsights": ai_analysis.get('contractBenchmarkingAndPrecedentBasedInsights', {}),
+        "negotiationLeveragePoints": ai_analysis.get('negotiationLeveragePoints', {}),
+        "complianceCheck": ai_analysis.get('complianceCheck', {}),
+        "summaryAndStrategicRecommendations": ai_analysis.get('summaryAndStrategicRecommendations', {})
+    }
+
+    # Execution mode, timings and cache status when the AI layer reports them
+    if 'analysisMetadata' in ai_analysis:
+        analysis_result["analysisMetadata"] = ai_analysis['analysisMetadata']
+
+    return analysis_result
+
+def is_model_analysis(analysis_result: Dict[str, Any]) -> bool:
+    """
+    Whether every section of an analysis came from the model (mock and unparseable fallbacks carry no metadata)
+    """
+    metadata = analysis_result.get("analysisMetadata")
+    if not metadata or "mode" not in metadata:
+        return False
+    return metadata["mode"] != "parallel" or is_complete_analysis(analysis_result)
+
+async def record_analysis(
+    part_info: Dict[str, Any],
+    contract_info: List[Dict[str, Any]],
+    analysis_result: Dict[str, Any],
+    start_time: float
+) -> None:
+    """
+    Persist a completed analysis with its input fingerprint, model and latency.
+    Mock and fallback analyses are not stored, so they never show up as available,
+    and neither are cache hits, which would record a near-zero latency for an analysis already stored.
+    """
+    repository = get_analysis_repository()
+    if repository is None or not is_model_analysis(analysis_result) or analysis_result["analysisMetadata"].get("cached"):
+        return
+
+    try:
+        metadata = analysis_result["analysisMetadata"]
+        await repository.record(
+            part_number=part_info['PartNumber'],
+            supplier_name=part_info.get('suppliername'),
+            result=analysis_result,
+            fingerprint=get_analysis_cache_key(part_info, contract_info),
+            model=OPENAI_MODEL,
+            mode=metadata["mode"],
+            latency_ms=round((time.perf_counter() - start_time) * 1000, 1)
+        )
+    except Exception as error:
+        # A failed write must not fail the analysis itself
+        print(f"Error recording analysis: {error}")
+
 async def get_analysis_metadata(part_number: str) -> Optional[Dict[str, Any]]:
     """
-    Get analysis metadata for a part number
+    Get analysis metadata for a part number from the analysis repository
     """
     try:
         sanitized_part_number = sanitize_part_number(part_number)
         if not sanitized_part_number:
             return None
-            
-        part_info = await get_part_information(sanitized_part_number)
+
+        repository = get_analysis_repository()
+        latest = await repository.get_latest(sanitized_part_number, include_result=False) if repository else None
+
+        if latest:
+            return {
+                "partNumber": sanitized_part_number,
+                "supplierName": latest['supplierName'],
+                "lastUpdated": latest['createdAt'],
+                "analysisStatus": "available",
+                "analysisId": latest['analysisId'],
+                "fingerprint": latest['fingerprint'],
+                "model": latest['model'],
+                "mode": latest['mode'],
+                "latencyMs": latest['latencyMs']
+            }
+
+        # Never analyzed: only the part lookup can say whether it exists
+        part_info = await get_part_information(sanitized_part_number, profile="minimal")
         
         if not part_info:
             return None
@@ -103,9 +389,31 @@ async def get_analysis_metadata(part_number: str) -> Optional[Dict[str, Any]]:
         return {
             "partNumber": sanitized_part_number,
             "supplierName": part_info['suppliername'],
-            "lastUpdated": "2024-01-01T00:00:00Z",  # TODO: Get actual timestamp
-            "analysisStatus": "available"
+            "lastUpdated": None,
+            "analysisStatus": "not_analyzed"
         }
     except Exception as error:
         print(f"Error getting analysis metadata: {error}")
-        raise ContractAnalysisError(f"Failed to get metadata: {str(error)}") 
\ No newline at end of file
+        raise ContractAnalysisError(f"Failed to get metadata: {str(error)}")
+
+async def get_analysis_history(part_number: str, limit: int = 20, include_results: bool = False) -> List[Dict[str, Any]]:
+    """
+    Get the stored analyses of a part number, newest first
+    """
+    sanitized_part_number = sanitize_part_number(part_number)
+    repository = get_analysis_repository()
+    if not sanitized_part_number or repository is None:
+        return []
+
+    return await repository.get_history(sanitized_part_number, limit=limit, include_result=include_results)
+
+async def get_latest_stored_analysis(part_number: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the most recent stored analysis (with result) of a part number
+    """
+    sanitized_part_number = sanitize_part_number(part_number)
+    repository = get_analysis_repository()
+    if not sanitized_part_number or repository is None:
+        return None
+
+    return await repository.get_latest(sanitized_part_number)
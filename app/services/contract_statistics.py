@@ -0,0 +1,239 @@
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from cassandra.util import unix_time_from_uuid1
+from app.services.contract_repository import get_contract_repository, is_contract_store_configured
+
+# Statistics older than this are brought up to date from the change log before being served
+CONTRACT_STATISTICS_MAX_STALENESS_SECONDS = int(os.getenv("CONTRACT_STATISTICS_MAX_STALENESS_SECONDS", "60"))
+# Full recompute interval that reconciles drift (e.g. writes made outside the change log)
+CONTRACT_STATISTICS_RECONCILE_SECONDS = int(os.getenv("CONTRACT_STATISTICS_RECONCILE_SECONDS", "86400"))
+# Delta syncs re-read this far behind the watermark so changes from slightly lagging writer clocks are not missed
+CONTRACT_STATISTICS_CLOCK_SKEW_SECONDS = int(os.getenv("CONTRACT_STATISTICS_CLOCK_SKEW_SECONDS", "30"))
+
+class ContractStatistics:
+    """
+    Contract count and value sum per contract type, kept current by applying
+    change-log deltas instead of rescanning the contracts table
+    """
+
+    def __init__(self, watermark: float):
+        self.counts: Dict[str, int] = {}
+        self.sums: Dict[str, float] = {}
+        # Latest change time applied (unix seconds); delta syncs read from here
+        self.watermark = watermark
+        # Change ids applied within the clock-skew window, so re-read changes are not counted twice
+        self.applied: Dict[str, float] = {}
+        self.recomputed_at = time.time()
+        self.synced_at = self.recomputed_at
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], watermark: float) -> "ContractStatistics":
+        statistics = cls(watermark)
+        for row in rows:
+            statistics._add(row.get("contract_type"), row.get("value"), 1)
+        return statistics
+
+    def apply_change(self, change: Dict[str, Any], advance_watermark: bool = True) -> bool:
+        """
+        Move a contract's count and value from its old type to its new one; False when already applied.
+        Changes applied outside a delta sync leave the watermark alone so older changes from other writers are still read.
+        """
+        change_id = str(change["changed_at"])
+        changed_at = unix_time_from_uuid1(change["changed_at"])
+        if change_id in self.applied:
+            # Already counted (by this process, or by the scan), but the delta sync still moves past it
+            if advance_watermark:
+                self.watermark = max(self.watermark, changed_at)
+            return False
+        if changed_at < self.watermark - CONTRACT_STATISTICS_CLOCK_SKEW_SECONDS:
+            return False
+
+        if change.get("old_type") is not None:
+            self._add(change["old_type"], change.get("old_value"), -1)
+        if change.get("new_type") is not None:
+            self._add(change["new_type"], change.get("new_value"), 1)
+
+        self.applied[change_id] = changed_at
+        if advance_watermark:
+            self.watermark = max(self.watermark, changed_at)
+        return True
+
+    def mark_applied(self, changes: List[Dict[str, Any]]) -> int:
+        """
+        Record changes the scan already reflects (written up to the watermark) so delta syncs skip them; returns how many
+        """
+        marked = 0
+        for change in changes:
+            changed_at = unix_time_from_uuid1(change["changed_at"])
+            if changed_at <= self.watermark:
+                self.applied[str(change["changed_at"])] = changed_at
+                marked += 1
+        return marked
+
+    def prune_applied(self) -> None:
+        horizon = self.watermark - CONTRACT_STATISTICS_CLOCK_SKEW_SECONDS
+        self.applied = {change_id: changed_at for change_id, changed_at in self.applied.items() if changed_at >= horizon}
+
+    def age_seconds(self) -> float:
+        return time.time() - self.synced_at
+
+    def render(self) -> Dict[str, Any]:
+        total_contracts = sum(self.counts.values())
+        total_value = sum(self.sums.values())
+        return {
+            "total_contracts": total_contracts,
+            "total_value": total_value,
+            "contracts_by_type": dict(self.counts),
+            "value_by_type": dict(self.sums),
+            "average_value": total_value / total_contracts if total_contracts else 0,
+            "asOf": datetime.fromtimestamp(self.synced_at).isoformat(),
+            "recomputedAt": datetime.fromtimestamp(self.recomputed_at).isoformat()
+        }
+
+    def _add(self, contract_type: Optional[str], value: Any, sign: int) -> None:
+        contract_type = contract_type or ""
+        count = self.counts.get(contract_type, 0) + sign
+        value_sum = self.sums.get(contract_type, 0.0) + sign * float(value or 0)
+        if count <= 0:
+            self.counts.pop(contract_type, None)
+            self.sums.pop(contract_type, None)
+        else:
+            self.counts[contract_type] = count
+            self.sums[contract_type] = value_sum
+
+_statistics: Optional[ContractStatistics] = None
+_sync_lock: Optional[asyncio.Lock] = None
+_sync_task: Optional[asyncio.Task] = None
+_stats = {
+    "recomputes": 0,
+    "deltaSyncs": 0,
+    "changesApplied": 0,
+    "syncFailures": 0,
+    "lastRecomputeSeconds": None
+}
+
+def _get_sync_lock() -> asyncio.Lock:
+    global _sync_lock
+
+    if _sync_lock is None:
+        _sync_lock = asyncio.Lock()
+    return _sync_lock
+
+async def recompute_contract_statistics() -> Optional[ContractStatistics]:
+    """
+    Rebuild the statistics with one full scan of the contracts table (reconciliation path)
+    """
+    global _statistics
+
+    repository = await get_contract_repository()
+    if repository is None:
+        return None
+
+    async with _get_sync_lock():
+        start_time = time.perf_counter()
+        # Deltas are read from the scan start: a change landing mid-scan can be counted twice until the next reconcile
+        watermark = time.time()
+        rows = await repository.scan_statistics()
+        statistics = ContractStatistics.from_rows(rows, watermark)
+        # Delta syncs re-read the clock-skew window before the watermark; the scan already counted those changes
+        statistics.mark_applied(await repository.get_changes_since(watermark - CONTRACT_STATISTICS_CLOCK_SKEW_SECONDS))
+        _statistics = statistics
+
+        _stats["recomputes"] += 1
+        _stats["lastRecomputeSeconds"] = round(time.perf_counter() - start_time, 3)
+        print(f"📈 Contract statistics recomputed from {len(rows)} contracts in {_stats['lastRecomputeSeconds']}s")
+        return _statistics
+
+async def sync_contract_statistics() -> Optional[ContractStatistics]:
+    """
+    Apply change-log entries written since the watermark
+    """
+    repository = await get_contract_repository()
+    if repository is None or _statistics is None:
+        return await recompute_contract_statistics()
+
+    async with _get_sync_lock():
+        statistics = _statistics
+        changes = await repository.get_changes_since(statistics.watermark - CONTRACT_STATISTICS_CLOCK_SKEW_SECONDS)
+        applied = sum(1 for change in changes if statistics.apply_change(change))
+        statistics.prune_applied()
+        statistics.synced_at = time.time()
+
+        _stats["deltaSyncs"] += 1
+        _stats["changesApplied"] += applied
+        if applied:
+            print(f"📈 Contract statistics updated with {applied} changes")
+        return statistics
+
+def record_contract_change(change: Optional[Dict[str, Any]]) -> None:
+    """
+    Apply a change made by this process right away (the delta sync skips it later)
+    """
+    if change is not None and _statistics is not None and _statistics.apply_change(change, advance_watermark=False):
+        _stats["changesApplied"] += 1
+
+async def get_contract_statistics_snapshot() -> Optional[Dict[str, Any]]:
+    """
+    Get the statistics from memory, syncing first when older than CONTRACT_STATISTICS_MAX_STALENESS_SECONDS
+    """
+    statistics = _statistics
+    if statistics is None:
+        statistics = await recompute_contract_statistics()
+    elif statistics.age_seconds() >= CONTRACT_STATISTICS_MAX_STALENESS_SECONDS:
+        statistics = await sync_contract_statistics()
+
+    return statistics.render() if statistics is not None else None
+
+async def _sync_loop() -> None:
+    while True:
+        try:
+            if _statistics is None or time.time() - _statistics.recomputed_at >= CONTRACT_STATISTICS_RECONCILE_SECONDS:
+                await recompute_contract_statistics()
+            else:
+                await sync_contract_statistics()
+        except Exception as error:
+            _stats["syncFailures"] += 1
+            print(f"Contract statistics sync failed: {error}")
+
+        await asyncio.sleep(CONTRACT_STATISTICS_MAX_STALENESS_SECONDS)
+
+async def start_contract_statistics() -> None:
+    """
+    Start the delta sync schedule (called from the FastAPI lifespan)
+    """
+    global _sync_task
+
+    if not is_contract_store_configured():
+        return
+
+    if _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_loop())
+
+async def stop_contract_statistics() -> None:
+    """
+    Stop the delta sync schedule
+    """
+    global _sync_task
+
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+
+def get_contract_statistics_stats() -> Dict[str, Any]:
+    """
+    Get contract statistics freshness and sync counters
+    """
+    return {
+        **_stats,
+        "types": len(_statistics.counts) if _statistics is not None else 0,
+        "ageSeconds": round(_statistics.age_seconds(), 1) if _statistics is not None else None,
+        "maxStalenessSeconds": CONTRACT_STATISTICS_MAX_STALENESS_SECONDS,
+        "reconcileSeconds": CONTRACT_STATISTICS_RECONCILE_SECONDS
+    }
@@ -0,0 +1,411 @@
+import os
+import re
+import math
+import heapq
+import time
+import asyncio
+import unicodedata
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+from cassandra.util import unix_time_from_uuid1
+from app.services.contract_model import Contract, CONTRACT_MAP_FIELDS, SUMMARY_FIELDS
+from app.services.contract_repository import get_contract_repository, is_contract_store_configured
+from app.services.contract_statistics import CONTRACT_STATISTICS_CLOCK_SKEW_SECONDS
+from app.utils.exceptions import ContractAnalysisError
+
+# Contract text index configuration
+CONTRACT_TEXT_INDEX_ENABLED = os.getenv("CONTRACT_TEXT_INDEX_ENABLED", "true").lower() == "true"
+CONTRACT_TEXT_INDEX_SYNC_SECONDS = int(os.getenv("CONTRACT_TEXT_INDEX_SYNC_SECONDS", "60"))
+CONTRACT_TEXT_INDEX_REBUILD_SECONDS = int(os.getenv("CONTRACT_TEXT_INDEX_REBUILD_SECONDS", "86400"))
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Position gap between passages so phrases never match across two clauses
+PASSAGE_GAP = 16
+# Matching passages returned per contract
+MAX_HIGHLIGHTS = 3
+
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def stem(token: str) -> str:
+    """
+    Light plural folding so "days" matches "day" (no full stemmer)
+    """
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """
+    Normalized, plural-folded word tokens (accents and punctuation dropped, "30-day" -> ["30", "day"])
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return [stem(token) for token in TOKEN_PATTERN.findall(text)]
+
+def contract_passages(contract: Contract) -> List[Tuple[str, str, str]]:
+    """
+    (field, key, text) for every entry of the contract's text maps
+    """
+    passages = []
+    for field in CONTRACT_MAP_FIELDS:
+        section = getattr(contract, field)
+        if isinstance(section, dict):
+            for key, text in section.items():
+                if text:
+                    passages.append((field, str(key), str(text)))
+    return passages
+
+def parse_query(query: str) -> Tuple[List[List[str]], List[str]]:
+    """
+    Split a query into quoted phrases (each a token list) and loose terms
+    """
+    phrases = [tokens for tokens in (tokenize(phrase) for phrase in PHRASE_PATTERN.findall(query)) if tokens]
+    terms = tokenize(PHRASE_PATTERN.sub(" ", query))
+    return phrases, terms
+
+class ContractTextIndex:
+    """
+    Positional inverted index over contract terms, clauses, risks and opportunities,
+    one document per contract, ranked with BM25. Contracts can be added, replaced
+    and removed one at a time, so the index follows contract writes without a rebuild.
+    """
+
+    def __init__(self):
+        self.built_at = time.time()
+        # Latest change-log time applied (unix seconds)
+        self.watermark = self.built_at
+        # term -> doc -> positions
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+        self.lengths: Dict[int, int] = {}
+        self.total_length = 0
+        self.summaries: Dict[int, Dict[str, Any]] = {}
+        # doc -> [(first position, last position, field, key, text)]
+        self.passages: Dict[int, List[Tuple[int, int, str, str, str]]] = {}
+        self.doc_ids: Dict[str, int] = {}
+        self.next_doc = 0
+
+    def upsert(self, contract: Contract) -> None:
+        """
+        Index a contract, replacing its previous version
+        """
+        self.remove(contract.id)
+
+        doc = self.next_doc
+        self.next_doc += 1
+        self.doc_ids[contract.id] = doc
+        self.summaries[doc] = contract.to_dict(SUMMARY_FIELDS)
+
+        position = 0
+        spans = []
+        for field, key, text in contract_passages(contract):
+            tokens = tokenize(f"{key.replace('_', ' ')} {text}")
+            start = position
+            for token in tokens:
+                self.postings.setdefault(token, {}).setdefault(doc, []).append(position)
+                position += 1
+            spans.append((start, position - 1, field, key, text))
+            position += PASSAGE_GAP
+
+        length = max(position - PASSAGE_GAP * len(spans), 0)
+        self.passages[doc] = spans
+        self.lengths[doc] = length
+        self.total_length += length
+
+    def remove(self, contract_id: str) -> bool:
+        doc = self.doc_ids.pop(contract_id, None)
+        if doc is None:
+            return False
+
+        for _, _, _, key, text in self.passages.pop(doc):
+            for token in set(tokenize(f"{key.replace('_', ' ')} {text}")):
+                postings = self.postings.get(token)
+                if postings is not None:
+                    postings.pop(doc, None)
+                    if not postings:
+                        del self.postings[token]
+
+        self.total_length -= self.lengths.pop(doc)
+        del self.summaries[doc]
+        return True
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        supplier_name: Optional[str] = None,
+        contract_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Contracts matching every quoted phrase and any loose term, best BM25 score first,
+        with the matching passages and supplier/type facet counts of all matches
+        """
+        phrases, terms = parse_query(query)
+        query_terms = list(dict.fromkeys([token for phrase in phrases for token in phrase] + terms))
+        if not query_terms:
+            return {"total": 0, "results": [], "facets": {"supplier_name": {}, "contract_type": {}}}
+
+        # Candidates: documents containing every phrase, else any loose term
+        if phrases:
+            candidates = None
+            for phrase in phrases:
+                matching = self._phrase_docs(phrase)
+                candidates = matching if candidates is None else candidates & matching
+        else:
+            candidates = set()
+            for term in terms:
+                candidates.update(self.postings.get(term, ()))
+
+        candidates = {
+            doc for doc in candidates
+            if (supplier_name is None or self.summaries[doc]["supplier_name"] == supplier_name)
+            and (contract_type is None or self.summaries[doc]["contract_type"] == contract_type)
+        }
+
+        score = self._scorer(query_terms)
+        scored = heapq.nsmallest(limit, ((-score(doc), doc) for doc in candidates))
+        return {
+            "total": len(candidates),
+            "results": [
+                {
+                    **self.summaries[doc],
+                    "score": round(-negative_score, 4),
+                    "matches": self._highlights(doc, query_terms)
+                }
+                for negative_score, doc in scored
+            ],
+            "facets": {
+                "supplier_name": dict(Counter(self.summaries[doc]["supplier_name"] for doc in candidates).most_common()),
+                "contract_type": dict(Counter(self.summaries[doc]["contract_type"] for doc in candidates).most_common())
+            }
+        }
+
+    def _phrase_docs(self, phrase: List[str]) -> set:
+        postings = [self.postings.get(token, {}) for token in phrase]
+        if not all(postings):
+            return set()
+
+        # Start from the rarest token's documents
+        docs = set(min(postings, key=len))
+        for token_postings in postings:
+            docs &= token_postings.keys()
+
+        matching = set()
+        for doc in docs:
+            # Phrase starts: first-token positions whose followers sit at the next positions
+            starts = set(postings[0][doc])
+            for offset, token_postings in enumerate(postings[1:], start=1):
+                starts.intersection_update(position - offset for position in token_postings[doc])
+                if not starts:
+                    break
+            if starts:
+                matching.add(doc)
+        return matching
+
+    def _scorer(self, query_terms: List[str]):
+        """
+        BM25 scoring function for a query, with idf and length normalization precomputed once
+        """
+        documents = len(self.lengths)
+        average_length = (self.total_length / documents if documents else 0) or 1
+        weighted = []
+        for term in query_terms:
+            postings = self.postings.get(term)
+            if postings:
+                weighted.append((postings, math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))))
+
+        lengths = self.lengths
+        length_weight = BM25_K1 * BM25_B / average_length
+        base_norm = BM25_K1 * (1 - BM25_B)
+
+        def score(doc: int) -> float:
+            norm = base_norm + length_weight * lengths[doc]
+            total = 0.0
+            for postings, idf in weighted:
+                positions = postings.get(doc)
+                if positions:
+                    frequency = len(positions)
+                    total += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            return total
+
+        return score
+
+    def _highlights(self, doc: int, query_terms: List[str]) -> List[Dict[str, str]]:
+        positions = sorted(position for term in query_terms for position in self.postings.get(term, {}).get(doc, ()))
+        hits: Counter = Counter()
+        for position in positions:
+            for index, (start, end, _, _, _) in enumerate(self.passages[doc]):
+                if start <= position <= end:
+                    hits[index] += 1
+                    break
+        return [
+            {"field": field, "key": key, "text": text}
+            for index, _ in hits.most_common(MAX_HIGHLIGHTS)
+            for _, _, field, key, text in [self.passages[doc][index]]
+        ]
+
+    def age_seconds(self) -> float:
+        return time.time() - self.built_at
+
+_index: Optional[ContractTextIndex] = None
+_build_lock: Optional[asyncio.Lock] = None
+_sync_task: Optional[asyncio.Task] = None
+_stats = {
+    "builds": 0,
+    "deltaSyncs": 0,
+    "contractsUpdated": 0,
+    "queries": 0,
+    "syncFailures": 0,
+    "lastBuildSeconds": None
+}
+
+def _get_build_lock() -> asyncio.Lock:
+    global _build_lock
+
+    if _build_lock is None:
+        _build_lock = asyncio.Lock()
+    return _build_lock
+
+async def build_contract_text_index(force: bool = False) -> Optional[ContractTextIndex]:
+    """
+    Index every contract, one Cassandra page at a time (unless an index was built while waiting for the lock and force is not set)
+    """
+    global _index
+
+    repository = await get_contract_repository()
+    if repository is None:
+        return None
+
+    async with _get_build_lock():
+        if _index is not None and not force:
+            return _index
+
+        start_time = time.perf_counter()
+        index = ContractTextIndex()
+        async for page in repository.iter_all_contracts():
+            for contract in page:
+                index.upsert(contract)
+            # Let requests run between pages of a large build
+            await asyncio.sleep(0)
+        _index = index
+
+        _stats["builds"] += 1
+        _stats["lastBuildSeconds"] = round(time.perf_counter() - start_time, 3)
+        print(
+            f"🔎 Contract text index built: {len(index.doc_ids)} contracts, {len(index.postings)} terms "
+            f"in {_stats['lastBuildSeconds']}s"
+        )
+        return _index
+
+async def sync_contract_text_index() -> Optional[ContractTextIndex]:
+    """
+    Re-index the contracts changed since the watermark (from the contract change log)
+    """
+    repository = await get_contract_repository()
+    if repository is None or _index is None:
+        return await build_contract_text_index()
+
+    async with _get_build_lock():
+        index = _index
+        changes = await repository.get_changes_since(index.watermark - CONTRACT_STATISTICS_CLOCK_SKEW_SECONDS)
+        changed_ids = list(dict.fromkeys(change["id"] for change in changes))
+        if changed_ids:
+            contracts = await repository.get_by_ids(changed_ids)
+            present = {contract.id for contract in contracts}
+            for contract in contracts:
+                index.upsert(contract)
+            for contract_id in changed_ids:
+                if contract_id not in present:
+                    index.remove(contract_id)
+            index.watermark = max(index.watermark, max(unix_time_from_uuid1(change["changed_at"]) for change in changes))
+
+        _stats["deltaSyncs"] += 1
+        _stats["contractsUpdated"] += len(changed_ids)
+        return index
+
+def index_contract_change(contract: Optional[Dict[str, Any]] = None, removed_id: Optional[str] = None) -> None:
+    """
+    Apply a contract write made by this process right away (the next delta sync re-reads it harmlessly)
+    """
+    if _index is None:
+        return
+    if contract is not None:
+        _index.upsert(Contract.from_dict(contract))
+    elif removed_id is not None:
+        _index.remove(removed_id)
+
+async def search_contract_text(
+    query: str,
+    limit: int = 20,
+    supplier_name: Optional[str] = None,
+    contract_type: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Search the local index (None when no contract store is configured)
+    """
+    if _index is None and _sync_task is not None:
+        raise ContractAnalysisError("The contract text index is still being built, retry shortly", code="TEXT_INDEX_BUILDING")
+
+    index = _index or await build_contract_text_index()
+    if index is None:
+        return None
+
+    _stats["queries"] += 1
+    return index.search(query, limit=limit, supplier_name=supplier_name, contract_type=contract_type)
+
+async def _sync_loop() -> None:
+    while True:
+        try:
+            if _index is None or _index.age_seconds() >= CONTRACT_TEXT_INDEX_REBUILD_SECONDS:
+                await build_contract_text_index(force=True)
+            else:
+                await sync_contract_text_index()
+        except Exception as error:
+            _stats["syncFailures"] += 1
+            print(f"Contract text index sync failed: {error}")
+
+        await asyncio.sleep(CONTRACT_TEXT_INDEX_SYNC_SECONDS)
+
+async def start_contract_text_index() -> None:
+    """
+    Build the index in the background and keep it in sync (called from the FastAPI lifespan)
+    """
+    global _sync_task
+
+    if not CONTRACT_TEXT_INDEX_ENABLED or not is_contract_store_configured():
+        return
+
+    if _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_loop())
+
+async def stop_contract_text_index() -> None:
+    """
+    Stop the index sync schedule
+    """
+    global _sync_task
+
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+
+def get_contract_text_index_stats() -> Dict[str, Any]:
+    """
+    Get contract text index size, age and sync counters
+    """
+    return {
+        **_stats,
+        "enabled": CONTRACT_TEXT_INDEX_ENABLED,
+        "contracts": len(_index.doc_ids) if _index is not None else 0,
+        "terms": len(_index.postings) if _index is not None else 0,
+        "ageSeconds": round(_index.age_seconds(), 1) if _index is not None else None,
+        "syncSeconds": CONTRACT_TEXT_INDEX_SYNC_SECONDS
+    }
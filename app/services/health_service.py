@@ -1,5 +1,6 @@
 import asyncio
 from typing import Dict, Any
+from app.services.contract_repository import get_contract_store_stats
 
 async def check_database_connections() -> Dict[str, Any]:
     """
@@ -21,10 +22,13 @@ async def check_database_connections() -> Dict[str, Any]:
             "message": "Connection successful"
         }
         
-        health_status["astra"] = {
-            "status": "healthy", 
-            "message": "Connection successful"
-        }
+        contract_store = get_contract_store_stats()
+        if not contract_store["configured"]:
+            health_status["astra"] = {"status": "mock", "message": "Contract store not configured; serving mock contracts"}
+        elif contract_store["connected"]:
+            health_status["astra"] = {"status": "healthy", "message": f"Session open ({contract_store['table']})"}
+        else:
+            health_status["astra"] = {"status": "unhealthy", "message": contract_store["lastError"] or "Not connected"}
         
     except Exception as error:
         health_status["supabase"] = {
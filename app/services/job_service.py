@@ -0,0 +1,168 @@
+import os
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from app.services.contract_service import analyze_contract
+from app.services.job_store import JobStore, create_job_store, ACTIVE_JOB_STATUSES
+from app.utils.exceptions import ContractAnalysisError
+
+# Job engine configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "1000"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+
+_store: Optional[JobStore] = None
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+_submit_lock: Optional[asyncio.Lock] = None
+
+def _get_submit_lock() -> asyncio.Lock:
+    global _submit_lock
+
+    if _submit_lock is None:
+        _submit_lock = asyncio.Lock()
+    return _submit_lock
+
+async def start_job_workers() -> None:
+    """
+    Create the job store and start the background workers (called from the FastAPI lifespan)
+    """
+    global _store, _queue
+
+    _store = create_job_store()
+    # Unbounded so every resumed job fits; JOB_QUEUE_MAX_SIZE is enforced on submission
+    _queue = asyncio.Queue()
+
+    # Jobs left queued or running by a previous process are picked up again
+    for job in await _store.list_active():
+        await _store.update(job["jobId"], status="queued", startedAt=None)
+        _queue.put_nowait(job["jobId"])
+
+    for worker_id in range(JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker(worker_id)))
+
+    print(f"👷 Started {JOB_WORKERS} analysis job workers ({_queue.qsize()} jobs resumed)")
+
+async def stop_job_workers() -> None:
+    """
+    Cancel the background workers
+    """
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    print("👷 Analysis job workers stopped")
+
+def get_job_store() -> JobStore:
+    """
+    Get the job store, creating an in-process one if the workers were not started
+    """
+    global _store
+
+    if _store is None:
+        _store = create_job_store()
+    return _store
+
+async def submit_analysis_job(part_number: str) -> Dict[str, Any]:
+    """
+    Queue an analysis and return its job immediately; an active job for the same part is reused
+    """
+    if _queue is None:
+        raise ContractAnalysisError("Job workers are not running", code="JOBS_UNAVAILABLE")
+
+    store = get_job_store()
+
+    # The active-job check, the store write and the enqueue run as one step, so concurrent
+    # submissions for a part never queue duplicate analyses or overfill the queue
+    async with _get_submit_lock():
+        existing = await store.get_latest_for_part(part_number)
+        if existing and existing["status"] in ACTIVE_JOB_STATUSES:
+            return existing
+
+        if _queue.qsize() >= JOB_QUEUE_MAX_SIZE:
+            raise ContractAnalysisError("Analysis job queue is full, retry later", code="JOB_QUEUE_FULL")
+
+        await store.prune((datetime.now() - timedelta(seconds=JOB_RETENTION_SECONDS)).isoformat())
+
+        job = {
+            "jobId": uuid.uuid4().hex,
+            "partNumber": part_number,
+            "status": "queued",
+            "submittedAt": datetime.now().isoformat(),
+            "startedAt": None,
+            "finishedAt": None,
+            "queueSeconds": None,
+            "runSeconds": None,
+            "result": None,
+            "error": None
+        }
+        await store.create(job)
+        _queue.put_nowait(job["jobId"])
+
+    print(f"🧾 Queued analysis job {job['jobId']} for {part_number} (queue depth: {_queue.qsize()})")
+    return job
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a job by id
+    """
+    return await get_job_store().get(job_id)
+
+async def get_latest_job_for_part(part_number: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the most recently submitted job for a part number
+    """
+    return await get_job_store().get_latest_for_part(part_number)
+
+async def get_job_stats() -> Dict[str, Any]:
+    """
+    Get queue depth, worker count and job counts by status
+    """
+    return {
+        "workers": len(_workers),
+        "queueDepth": _queue.qsize() if _queue is not None else 0,
+        "queueMaxSize": JOB_QUEUE_MAX_SIZE,
+        "jobsByStatus": await get_job_store().count_by_status()
+    }
+
+async def _worker(worker_id: int) -> None:
+    while True:
+        job_id = await _queue.get()
+        try:
+            await _run_job(job_id)
+        except Exception as error:
+            print(f"Job worker {worker_id} failed on {job_id}: {error}")
+        finally:
+            _queue.task_done()
+
+async def _run_job(job_id: str) -> None:
+    store = get_job_store()
+    job = await store.get(job_id)
+    if job is None or job["status"] not in ACTIVE_JOB_STATUSES:
+        return
+
+    started_at = datetime.now()
+    queue_seconds = (started_at - datetime.fromisoformat(job["submittedAt"])).total_seconds()
+    await store.update(job_id, status="running", startedAt=started_at.isoformat(), queueSeconds=round(queue_seconds, 3))
+    print(f"🏃 Running analysis job {job_id} for {job['partNumber']}")
+
+    try:
+        result = await analyze_contract(job["partNumber"])
+        fields = {"status": "done", "result": result}
+    except ContractAnalysisError as error:
+        fields = {
+            "status": "failed",
+            "error": {"code": error.code, "message": str(error), "supplier": error.supplier}
+        }
+    except Exception as error:
+        fields = {"status": "failed", "error": {"code": None, "message": str(error), "supplier": None}}
+
+    finished_at = datetime.now()
+    await store.update(
+        job_id,
+        finishedAt=finished_at.isoformat(),
+        runSeconds=round((finished_at - started_at).total_seconds(), 3),
+        **fields
+    )
+    print(f"🏁 Analysis job {job_id} {fields['status']} in {(finished_at - started_at).total_seconds():.2f}s")
@@ -0,0 +1,197 @@
+import os
+import json
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+from app.utils.sqlite import open_sqlite
+
+# Job store configuration
+JOB_STORE_BACKEND = os.getenv("JOB_STORE_BACKEND", "memory").lower()  # memory | sqlite
+JOB_STORE_DB_PATH = os.getenv("JOB_STORE_DB_PATH", "data/jobs.db")
+
+JOB_STATUSES = ["queued", "running", "done", "failed"]
+ACTIVE_JOB_STATUSES = ["queued", "running"]
+
+class JobStore(ABC):
+    """Interface for analysis job persistence"""
+
+    @abstractmethod
+    async def create(self, job: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def update(self, job_id: str, **fields: Any) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def get_latest_for_part(self, part_number: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def list_active(self) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def prune(self, finished_before: str) -> int:
+        pass
+
+    @abstractmethod
+    async def count_by_status(self) -> Dict[str, int]:
+        pass
+
+class InMemoryJobStore(JobStore):
+    """Process-local job store (jobs are lost on restart)"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._latest_by_part: Dict[str, str] = {}
+
+    async def create(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["jobId"]] = dict(job)
+        self._latest_by_part[job["partNumber"]] = job["jobId"]
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        if job_id in self._jobs:
+            self._jobs[job_id].update(fields)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def get_latest_for_part(self, part_number: str) -> Optional[Dict[str, Any]]:
+        job_id = self._latest_by_part.get(part_number)
+        return await self.get(job_id) if job_id else None
+
+    async def list_active(self) -> List[Dict[str, Any]]:
+        return [dict(job) for job in self._jobs.values() if job["status"] in ACTIVE_JOB_STATUSES]
+
+    async def prune(self, finished_before: str) -> int:
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.get("finishedAt") and job["finishedAt"] < finished_before
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._latest_by_part.get(job["partNumber"]) == job_id:
+                del self._latest_by_part[job["partNumber"]]
+        return len(expired)
+
+    async def count_by_status(self) -> Dict[str, int]:
+        counts = {job_status: 0 for job_status in JOB_STATUSES}
+        for job in self._jobs.values():
+            counts[job["status"]] += 1
+        return counts
+
+class SqliteJobStore(JobStore):
+    """SQLite-backed job store that survives restarts"""
+
+    # Job fields stored as JSON text
+    JSON_FIELDS = ["result", "error"]
+    COLUMNS = [
+        "jobId", "partNumber", "status", "submittedAt", "startedAt", "finishedAt",
+        "queueSeconds", "runSeconds", "result", "error"
+    ]
+
+    def __init__(self, db_path: str = JOB_STORE_DB_PATH):
+        self._db = open_sqlite(db_path)
+        self._lock = threading.Lock()
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_jobs (
+                jobId TEXT PRIMARY KEY,
+                partNumber TEXT NOT NULL,
+                status TEXT NOT NULL,
+                submittedAt TEXT NOT NULL,
+                startedAt TEXT,
+                finishedAt TEXT,
+                queueSeconds REAL,
+                runSeconds REAL,
+                result TEXT,
+                error TEXT
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_analysis_jobs_part ON analysis_jobs (partNumber, submittedAt)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs (status)")
+
+    async def create(self, job: Dict[str, Any]) -> None:
+        row = [self._encode(column, job.get(column)) for column in self.COLUMNS]
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        await self._execute(f"INSERT INTO analysis_jobs ({', '.join(self.COLUMNS)}) VALUES ({placeholders})", row)
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        if not fields:
+            return
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        values = [self._encode(column, value) for column, value in fields.items()]
+        await self._execute(f"UPDATE analysis_jobs SET {assignments} WHERE jobId = ?", values + [job_id])
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._query("SELECT * FROM analysis_jobs WHERE jobId = ?", [job_id])
+        return rows[0] if rows else None
+
+    async def get_latest_for_part(self, part_number: str) -> Optional[Dict[str, Any]]:
+        rows = await self._query(
+            "SELECT * FROM analysis_jobs WHERE partNumber = ? ORDER BY submittedAt DESC LIMIT 1",
+            [part_number]
+        )
+        return rows[0] if rows else None
+
+    async def list_active(self) -> List[Dict[str, Any]]:
+        return await self._query(
+            "SELECT * FROM analysis_jobs WHERE status IN ('queued', 'running') ORDER BY submittedAt",
+            []
+        )
+
+    async def prune(self, finished_before: str) -> int:
+        return await self._execute(
+            "DELETE FROM analysis_jobs WHERE finishedAt IS NOT NULL AND finishedAt < ?",
+            [finished_before]
+        )
+
+    async def count_by_status(self) -> Dict[str, int]:
+        counts = {job_status: 0 for job_status in JOB_STATUSES}
+        rows = await asyncio.to_thread(self._fetch, "SELECT status, COUNT(*) FROM analysis_jobs GROUP BY status", [])
+        for job_status, count in rows:
+            counts[job_status] = count
+        return counts
+
+    def _encode(self, column: str, value: Any) -> Any:
+        if column in self.JSON_FIELDS and value is not None:
+            return json.dumps(value, default=str)
+        return value
+
+    def _decode(self, row: tuple) -> Dict[str, Any]:
+        job = dict(zip(self.COLUMNS, row))
+        for column in self.JSON_FIELDS:
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    async def _query(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        rows = await asyncio.to_thread(self._fetch, sql.replace("SELECT *", f"SELECT {', '.join(self.COLUMNS)}"), params)
+        return [self._decode(row) for row in rows]
+
+    async def _execute(self, sql: str, params: List[Any]) -> int:
+        def run() -> int:
+            with self._lock:
+                return self._db.execute(sql, params).rowcount
+        return await asyncio.to_thread(run)
+
+def create_job_store() -> JobStore:
+    """
+    Create the job store selected by JOB_STORE_BACKEND
+    """
+    if JOB_STORE_BACKEND == "sqlite":
+        print(f"🗂️ Job store: SQLite ({JOB_STORE_DB_PATH})")
+        return SqliteJobStore(JOB_STORE_DB_PATH)
+
+    print("🗂️ Job store: in-memory")
+    return InMemoryJobStore()
@@ -0,0 +1,237 @@
+import os
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
+import httpx
+from openai import AsyncOpenAI
+from app.utils.exceptions import LLMGatewayError
+
+# LLM gateway configuration
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "90"))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "10"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+_client: Optional[AsyncOpenAI] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+_stats = {
+    "requests": 0,
+    "failures": 0,
+    "timeouts": 0,
+    "inFlight": 0,
+    "waiting": 0,
+    "promptTokens": 0,
+    "completionTokens": 0
+}
+
+# Per-caller token accounting; tasks spawned inside track_llm_usage() inherit the tracker
+_usage_tracker: ContextVar[Optional[Dict[str, int]]] = ContextVar("llm_usage_tracker", default=None)
+
+@contextmanager
+def track_llm_usage() -> Iterator[Dict[str, int]]:
+    """
+    Accumulate token usage of every completion made within the block
+    """
+    usage = {"requests": 0, "promptTokens": 0, "completionTokens": 0}
+    token = _usage_tracker.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage_tracker.reset(token)
+
+def _record_usage(usage: Any) -> None:
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    _stats["promptTokens"] += prompt_tokens
+    _stats["completionTokens"] += completion_tokens
+
+    tracker = _usage_tracker.get()
+    if tracker is not None:
+        tracker["requests"] += 1
+        tracker["promptTokens"] += prompt_tokens
+        tracker["completionTokens"] += completion_tokens
+
+def get_llm_client() -> AsyncOpenAI:
+    """
+    Get the shared async OpenAI client, creating it on first use
+    """
+    global _client
+
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+            ),
+            timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS)
+        )
+        _client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            http_client=http_client,
+            max_retries=OPENAI_MAX_RETRIES
+        )
+        print(f"🔌 LLM gateway ready (max concurrency: {OPENAI_MAX_CONCURRENCY}, timeout: {OPENAI_TIMEOUT_SECONDS}s)")
+
+    return _client
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """
+    Get the semaphore bounding concurrent LLM calls
+    """
+    global _semaphore
+
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+    return _semaphore
+
+async def close_llm_gateway() -> None:
+    """
+    Close the pooled HTTP client (called from the FastAPI lifespan)
+    """
+    global _client, _semaphore
+
+    if _client is not None:
+        await _client.close()
+        _client = None
+        print("🔌 LLM gateway closed")
+
+    _semaphore = None
+
+async def chat_completion(
+    messages: List[Dict[str, str]],
+    model: Optional[str] = None,
+    temperature: float = 0.3,
+    max_tokens: int = 4000,
+    timeout: Optional[float] = None
+) -> str:
+    """
+    Run a chat completion through the gateway without blocking the event loop
+    """
+    client = get_llm_client()
+    semaphore = get_llm_semaphore()
+    call_timeout = timeout or OPENAI_TIMEOUT_SECONDS
+
+    _stats["waiting"] += 1
+    try:
+        await semaphore.acquire()
+    finally:
+        _stats["waiting"] -= 1
+
+    _stats["requests"] += 1
+    _stats["inFlight"] += 1
+    start_time = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(
+            client.chat.completions.create(
+                model=model or OPENAI_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=call_timeout
+            ),
+            timeout=call_timeout
+        )
+
+        _record_usage(response.usage)
+
+        content = response.choices[0].message.content
+        if content is None:
+            raise LLMGatewayError("OpenAI API returned empty response")
+
+        print(f"⏱️ LLM call completed in {time.perf_counter() - start_time:.2f}s")
+        return content
+
+    except asyncio.TimeoutError:
+        _stats["timeouts"] += 1
+        _stats["failures"] += 1
+        raise LLMGatewayError(f"LLM call timed out after {call_timeout}s")
+    except Exception:
+        _stats["failures"] += 1
+        raise
+    finally:
+        _stats["inFlight"] -= 1
+        semaphore.release()
+
+async def stream_chat_completion(
+    messages: List[Dict[str, str]],
+    model: Optional[str] = None,
+    temperature: float = 0.3,
+    max_tokens: int = 4000,
+    timeout: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion through the gateway, yielding text deltas
+    """
+    client = get_llm_client()
+    semaphore = get_llm_semaphore()
+    call_timeout = timeout or OPENAI_TIMEOUT_SECONDS
+
+    _stats["waiting"] += 1
+    try:
+        await semaphore.acquire()
+    finally:
+        _stats["waiting"] -= 1
+
+    _stats["requests"] += 1
+    _stats["inFlight"] += 1
+    start_time = time.perf_counter()
+    deadline = start_time + call_timeout
+    stream = None
+    try:
+        stream = await asyncio.wait_for(
+            client.chat.completions.create(
+                model=model or OPENAI_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=call_timeout,
+                stream=True
+            ),
+            timeout=call_timeout
+        )
+
+        # The deadline covers the whole stream, not each chunk
+        iterator = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    iterator.__anext__(),
+                    timeout=max(deadline - time.perf_counter(), 0)
+                )
+            except StopAsyncIteration:
+                break
+
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+        print(f"⏱️ LLM stream completed in {time.perf_counter() - start_time:.2f}s")
+
+    except asyncio.TimeoutError:
+        _stats["timeouts"] += 1
+        _stats["failures"] += 1
+        raise LLMGatewayError(f"LLM stream timed out after {call_timeout}s")
+    except Exception:
+        _stats["failures"] += 1
+        raise
+    finally:
+        if stream is not None:
+            await stream.response.aclose()
+        _stats["inFlight"] -= 1
+        semaphore.release()
+
+def get_gateway_stats() -> Dict[str, Any]:
+    """
+    Get LLM gateway counters
+    """
+    return {
+        **_stats,
+        "maxConcurrency": OPENAI_MAX_CONCURRENCY,
+        "timeoutSeconds": OPENAI_TIMEOUT_SECONDS
+    }
@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+import numpy as np
+from app.services.postgrest_client import select_all
+from app.services.part_timeseries import VOLUME_COLUMNS, PRICE_COLUMNS, to_series
+
+# MASTER_FILE snapshot configuration
+MASTER_SNAPSHOT_ENABLED = os.getenv("MASTER_SNAPSHOT_ENABLED", "false").lower() == "true"
+MASTER_SNAPSHOT_DIR = os.getenv("MASTER_SNAPSHOT_DIR", "data/master_snapshot")
+MASTER_SNAPSHOT_REFRESH_SECONDS = int(os.getenv("MASTER_SNAPSHOT_REFRESH_SECONDS", "900"))
+# Incremental refreshes only see changed and new rows; parts deleted from MASTER_FILE leave the snapshot at the next full reload
+MASTER_SNAPSHOT_FULL_RELOAD_SECONDS = int(os.getenv("MASTER_SNAPSHOT_FULL_RELOAD_SECONDS", "86400"))
+MASTER_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("MASTER_SNAPSHOT_MAX_AGE_SECONDS", "3600"))
+# Optional MASTER_FILE "last modified" column; without it every refresh is a full reload
+MASTER_SNAPSHOT_UPDATED_COLUMN = os.getenv("MASTER_SNAPSHOT_UPDATED_COLUMN")
+
+# Non-series columns kept per part
+ATTRIBUTE_COLUMNS = [
+    "suppliernumber",
+    "suppliername",
+    "suppliercontactname",
+    "suppliercontactemail",
+    "suppliermanufacturinglocation",
+    "PartNumber",
+    "partname",
+    "material",
+    "currency"
+]
+
+class MasterSnapshot:
+    """
+    Immutable columnar copy of MASTER_FILE: volume and price matrices (memory-mapped
+    when loaded from disk), per-part attributes and a part-number index.
+    Refreshes build a new snapshot, so readers never see a half-applied update.
+    """
+
+    def __init__(
+        self,
+        attributes: List[Dict[str, Any]],
+        volumes: np.ndarray,
+        prices: np.ndarray,
+        refreshed_at: float,
+        full_loaded_at: float,
+        watermark: Optional[str] = None
+    ):
+        self.attributes = attributes
+        self.volumes = volumes
+        self.prices = prices
+        self.refreshed_at = refreshed_at
+        self.full_loaded_at = full_loaded_at
+        self.watermark = watermark
+        self.index = {row["PartNumber"]: position for position, row in enumerate(attributes)}
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], watermark: Optional[str] = None) -> "MasterSnapshot":
+        """
+        Build a snapshot from full MASTER_FILE rows
+        """
+        now = time.time()
+        return cls(
+            [{column: row.get(column) for column in ATTRIBUTE_COLUMNS} for row in rows],
+            to_series(rows, VOLUME_COLUMNS),
+            to_series(rows, PRICE_COLUMNS),
+            refreshed_at=now,
+            full_loaded_at=now,
+            watermark=max_watermark(rows, watermark)
+        )
+
+    def apply_updates(self, rows: List[Dict[str, Any]]) -> "MasterSnapshot":
+        """
+        New snapshot with changed rows replaced and new rows appended
+        """
+        attributes = list(self.attributes)
+        volumes = np.array(self.volumes)
+        prices = np.array(self.prices)
+        new_volumes = to_series(rows, VOLUME_COLUMNS)
+        new_prices = to_series(rows, PRICE_COLUMNS)
+
+        appended = []
+        for offset, row in enumerate(rows):
+            position = self.index.get(row["PartNumber"])
+            if position is None:
+                appended.append(offset)
+                continue
+            attributes[position] = {column: row.get(column) for column in ATTRIBUTE_COLUMNS}
+            volumes[position] = new_volumes[offset]
+            prices[position] = new_prices[offset]
+
+        if appended:
+            attributes.extend({column: rows[offset].get(column) for column in ATTRIBUTE_COLUMNS} for offset in appended)
+            volumes = np.vstack([volumes, new_volumes[appended]])
+            prices = np.vstack([prices, new_prices[appended]])
+
+        return MasterSnapshot(
+            attributes,
+            volumes,
+            prices,
+            refreshed_at=time.time(),
+            full_loaded_at=self.full_loaded_at,
+            watermark=max_watermark(rows, self.watermark)
+        )
+
+    def get_row(self, part_number: str, volumes: bool = True, prices: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild the MASTER_FILE row of a part (same keys as the live query), optionally without the series
+        """
+        position = self.index.get(part_number)
+        return self.row(position, volumes, prices) if position is not None else None
+
+    def row(self, position: int, volumes: bool = True, prices: bool = True) -> Dict[str, Any]:
+        row = dict(self.attributes[position])
+        if volumes:
+            values = self.volumes[position].tolist()
+            row.update(zip(VOLUME_COLUMNS, [None if value != value else (int(value) if value.is_integer() else value) for value in values]))
+        if prices:
+            values = self.prices[position].tolist()
+            row.update(zip(PRICE_COLUMNS, [None if value != value else value for value in values]))
+        return row
+
+    def age_seconds(self) -> float:
+        return time.time() - self.refreshed_at
+
+    def save(self, directory: str) -> None:
+        """
+        Write the snapshot as a new generation and switch the manifest to it
+        """
+        generation = f"gen-{int(self.refreshed_at * 1000)}"
+        path = os.path.join(directory, generation)
+        os.makedirs(path, exist_ok=True)
+
+        np.save(os.path.join(path, "volumes.npy"), np.asarray(self.volumes))
+        np.save(os.path.join(path, "prices.npy"), np.asarray(self.prices))
+        with open(os.path.join(path, "attributes.json"), "w") as file:
+            json.dump(self.attributes, file, default=str)
+
+        manifest = {
+            "generation": generation,
+            "rows": len(self.attributes),
+            "refreshedAt": self.refreshed_at,
+            "fullLoadedAt": self.full_loaded_at,
+            "watermark": self.watermark
+        }
+        manifest_path = os.path.join(directory, "manifest.json")
+        with open(f"{manifest_path}.tmp", "w") as file:
+            json.dump(manifest, file)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        # Older generations may still be mapped by this process; unlinking them is safe on POSIX
+        for entry in os.listdir(directory):
+            if entry.startswith("gen-") and entry != generation:
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["MasterSnapshot"]:
+        """
+        Open the current generation with the matrices memory-mapped (None if there is none)
+        """
+        manifest_path = os.path.join(directory, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        path = os.path.join(directory, manifest["generation"])
+        with open(os.path.join(path, "attributes.json")) as file:
+            attributes = json.load(file)
+
+        return cls(
+            attributes,
+            np.load(os.path.join(path, "volumes.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "prices.npy"), mmap_mode="r"),
+            refreshed_at=manifest["refreshedAt"],
+            full_loaded_at=manifest["fullLoadedAt"],
+            watermark=manifest.get("watermark")
+        )
+
+def max_watermark(rows: List[Dict[str, Any]], current: Optional[str]) -> Optional[str]:
+    """
+    Highest value of the updated column seen so far
+    """
+    if not MASTER_SNAPSHOT_UPDATED_COLUMN:
+        return None
+    values = [str(row[MASTER_SNAPSHOT_UPDATED_COLUMN]) for row in rows if row.get(MASTER_SNAPSHOT_UPDATED_COLUMN) is not None]
+    if current is not None:
+        values.append(current)
+    return max(values) if values else None
+
+_snapshot: Optional[MasterSnapshot] = None
+_refresh_task: Optional[asyncio.Task] = None
+_refresh_lock: Optional[asyncio.Lock] = None
+# Called after each refresh with (snapshot, fetched rows, incremental)
+_refresh_listeners: List[Callable[["MasterSnapshot", List[Dict[str, Any]], bool], Awaitable[None]]] = []
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "staleFallbacks": 0,
+    "fullLoads": 0,
+    "incrementalRefreshes": 0,
+    "rowsUpdated": 0,
+    "refreshFailures": 0,
+    "lastRefreshSeconds": None
+}
+
+def snapshot_columns() -> str:
+    columns = ATTRIBUTE_COLUMNS + VOLUME_COLUMNS + PRICE_COLUMNS
+    if MASTER_SNAPSHOT_UPDATED_COLUMN:
+        columns = columns + [MASTER_SNAPSHOT_UPDATED_COLUMN]
+    return ",".join(columns)
+
+def get_fresh_snapshot() -> Optional[MasterSnapshot]:
+    """
+    The snapshot if enabled, loaded and not older than MASTER_SNAPSHOT_MAX_AGE_SECONDS; otherwise None
+    """
+    if not MASTER_SNAPSHOT_ENABLED:
+        return None
+
+    if _snapshot is None or _snapshot.age_seconds() > MASTER_SNAPSHOT_MAX_AGE_SECONDS:
+        _stats["staleFallbacks"] += 1
+        return None
+
+    return _snapshot
+
+def add_refresh_listener(listener: Callable[[MasterSnapshot, List[Dict[str, Any]], bool], Awaitable[None]]) -> None:
+    """
+    Register a coroutine to run after every snapshot refresh (e.g. to update derived data)
+    """
+    _refresh_listeners.append(listener)
+
+def record_lookup(hit: bool) -> None:
+    _stats["hits" if hit else "misses"] += 1
+
+async def refresh_snapshot(full: bool = False) -> MasterSnapshot:
+    """
+    Refresh the snapshot from MASTER_FILE: incrementally when possible, else a full reload
+    """
+    global _snapshot, _refresh_lock
+
+    if _refresh_lock is None:
+        _refresh_lock = asyncio.Lock()
+
+    async with _refresh_lock:
+        start_time = time.perf_counter()
+        current = _snapshot
+        incremental = (
+            not full
+            and current is not None
+            and MASTER_SNAPSHOT_UPDATED_COLUMN
+            and current.watermark is not None
+            and time.time() - current.full_loaded_at < MASTER_SNAPSHOT_FULL_RELOAD_SECONDS
+        )
+
+        if incremental:
+            rows = await select_all(
+                'MASTER_FILE',
+                snapshot_columns(),
+                filters=[(MASTER_SNAPSHOT_UPDATED_COLUMN, f"gt.{current.watermark}")]
+            )
+            # Matrix copies and stacking run off the event loop, like the .npy writes below
+            snapshot = await asyncio.to_thread(current.apply_updates, rows)
+            _stats["incrementalRefreshes"] += 1
+            _stats["rowsUpdated"] += len(rows)
+        else:
+            rows = await select_all('MASTER_FILE', snapshot_columns())
+            snapshot = await asyncio.to_thread(MasterSnapshot.from_rows, rows)
+            _stats["fullLoads"] += 1
+
+        await asyncio.to_thread(snapshot.save, MASTER_SNAPSHOT_DIR)
+        _snapshot = await asyncio.to_thread(MasterSnapshot.load, MASTER_SNAPSHOT_DIR)
+
+        _stats["lastRefreshSeconds"] = round(time.perf_counter() - start_time, 3)
+        print(
+            f"📸 MASTER_FILE snapshot {'updated' if incremental else 'reloaded'}: "
+            f"{len(rows)} rows fetched, {len(_snapshot.attributes)} parts in {_stats['lastRefreshSeconds']}s"
+        )
+
+        for listener in _refresh_listeners:
+            try:
+                await listener(_snapshot, rows, bool(incremental))
+            except Exception as error:
+                print(f"MASTER_FILE snapshot listener failed: {error}")
+
+        return _snapshot
+
+async def _refresh_loop() -> None:
+    while True:
+        try:
+            if _snapshot is None or _snapshot.age_seconds() >= MASTER_SNAPSHOT_REFRESH_SECONDS:
+                await refresh_snapshot()
+        except Exception as error:
+            _stats["refreshFailures"] += 1
+            print(f"MASTER_FILE snapshot refresh failed: {error}")
+
+        await asyncio.sleep(MASTER_SNAPSHOT_REFRESH_SECONDS if _snapshot is not None else 60)
+
+async def start_snapshot_refresher() -> None:
+    """
+    Open the on-disk snapshot and start the refresh schedule (called from the FastAPI lifespan)
+    """
+    global _snapshot, _refresh_task
+
+    if not MASTER_SNAPSHOT_ENABLED:
+        return
+
+    try:
+        _snapshot = await asyncio.to_thread(MasterSnapshot.load, MASTER_SNAPSHOT_DIR)
+    except Exception as error:
+        print(f"Could not open MASTER_FILE snapshot, reloading: {error}")
+        _snapshot = None
+
+    if _snapshot is not None:
+        print(f"📸 Opened MASTER_FILE snapshot ({len(_snapshot.attributes)} parts, {_snapshot.age_seconds():.0f}s old)")
+
+    _refresh_task = asyncio.create_task(_refresh_loop())
+
+async def stop_snapshot_refresher() -> None:
+    """
+    Stop the refresh schedule
+    """
+    global _refresh_task
+
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+def get_snapshot_stats() -> Dict[str, Any]:
+    """
+    Get snapshot size, age and lookup counters
+    """
+    return {
+        **_stats,
+        "enabled": MASTER_SNAPSHOT_ENABLED,
+        "parts": len(_snapshot.attributes) if _snapshot is not None else 0,
+        "refreshedAt": datetime.fromtimestamp(_snapshot.refreshed_at).isoformat() if _snapshot is not None else None,
+        "ageSeconds": round(_snapshot.age_seconds(), 1) if _snapshot is not None else None,
+        "maxAgeSeconds": MASTER_SNAPSHOT_MAX_AGE_SECONDS,
+        "incremental": bool(MASTER_SNAPSHOT_UPDATED_COLUMN)
+    }
@@ -0,0 +1,158 @@
+import warnings
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+# MASTER_FILE carries 36 monthly volume and price columns: jan2023 ... dec2025
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+YEARS = [2023, 2024, 2025]
+MONTH_INDEX = [f"{month}{year}" for year in YEARS for month in MONTHS]
+VOLUME_COLUMNS = [f"vol{period}" for period in MONTH_INDEX]
+PRICE_COLUMNS = [f"price{period}" for period in MONTH_INDEX]
+PERIODS = len(MONTH_INDEX)
+
+def to_series(rows: List[Dict[str, Any]], columns: List[str]) -> np.ndarray:
+    """
+    Build a (parts, 36) float matrix from MASTER_FILE rows; missing and non-positive values become NaN
+    """
+    matrix = np.array(
+        [[row.get(column) if row.get(column) is not None else np.nan for column in columns] for row in rows],
+        dtype=np.float64
+    ).reshape(len(rows), len(columns))
+    matrix[~(matrix > 0)] = np.nan
+    return matrix
+
+def rows_to_matrices(rows: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Volume and price matrices, one row per part, one column per month in MONTH_INDEX
+    """
+    return to_series(rows, VOLUME_COLUMNS), to_series(rows, PRICE_COLUMNS)
+
+def month_position(now: Optional[datetime] = None) -> int:
+    """
+    Index of the current month in MONTH_INDEX, clamped to the covered range
+    """
+    now = now or datetime.now()
+    position = (now.year - YEARS[0]) * 12 + now.month - 1
+    return max(0, min(position, PERIODS - 1))
+
+def latest_actual(series: np.ndarray, as_of: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Latest value at or before as_of for each row, and its month index (-1 when there is none)
+    """
+    as_of = month_position() if as_of is None else as_of
+    window = series[..., :as_of + 1]
+    has_value = ~np.isnan(window)
+
+    # Position of the last non-NaN column, found by searching the reversed window
+    last = window.shape[-1] - 1 - np.argmax(has_value[..., ::-1], axis=-1)
+    found = has_value.any(axis=-1)
+    values = np.take_along_axis(window, last[..., None], axis=-1)[..., 0]
+
+    return np.where(found, values, np.nan), np.where(found, last, -1)
+
+def current_price(prices: np.ndarray, now: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    "Current" price of each row and its month index (-1 when there is none): the latest 2025 price up to
+    the current calendar month, else the latest 2024 price. 2023 and later-2025 (forecast) months never count.
+    """
+    now = now or datetime.now()
+    values, positions = latest_actual(prices, as_of=YEARS.index(2025) * 12 + now.month - 1)
+    recent = positions >= YEARS.index(2024) * 12
+    return np.where(recent, values, np.nan), np.where(recent, positions, -1)
+
+def yoy_change(series: np.ndarray) -> np.ndarray:
+    """
+    Month-on-month-a-year-earlier change (2024 and 2025 months, 24 columns); NaN without both points
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return series[..., 12:] / series[..., :-12] - 1
+
+def yearly_totals(series: np.ndarray) -> np.ndarray:
+    """
+    Sum per year (3 columns), ignoring missing months
+    """
+    return np.nansum(series.reshape(series.shape[:-1] + (len(YEARS), 12)), axis=-1)
+
+def rolling_average(series: np.ndarray, window: int = 3) -> np.ndarray:
+    """
+    Trailing mean over the last window months, skipping missing months; NaN where the window is empty
+    """
+    present = ~np.isnan(series)
+    totals = np.cumsum(np.where(present, series, 0.0), axis=-1)
+    counts = np.cumsum(present, axis=-1)
+
+    totals[..., window:] = totals[..., window:] - totals[..., :-window].copy()
+    counts[..., window:] = counts[..., window:] - counts[..., :-window].copy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+def volatility(series: np.ndarray) -> np.ndarray:
+    """
+    Coefficient of variation (std / mean) of the actual points; NaN with fewer than two points
+    """
+    points = np.sum(~np.isnan(series), axis=-1)
+    # Rows without points warn about empty slices; they are masked below
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        result = np.nanstd(series, axis=-1) / np.nanmean(series, axis=-1)
+    return np.where(points >= 2, result, np.nan)
+
+def spend(volumes: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """
+    Monthly spend (volume x price); months missing either side count as zero
+    """
+    return np.nan_to_num(volumes * prices, nan=0.0)
+
+def to_python_number(value: float, integral: bool = False) -> Any:
+    """
+    Convert a NumPy scalar to a JSON-friendly Python number (NaN becomes None)
+    """
+    value = float(value)
+    if np.isnan(value):
+        return None
+    if integral and value.is_integer():
+        return int(value)
+    return value
+
+def series_to_trends(series: np.ndarray, integral: bool = False) -> Dict[int, Dict[str, Any]]:
+    """
+    Nested {year: {month: value}} dict of the actual points of one part's series
+    """
+    grid = series.reshape(len(YEARS), 12)
+    trends: Dict[int, Dict[str, Any]] = {}
+    for year_position, year in enumerate(YEARS):
+        trends[year] = {
+            MONTHS[month]: to_python_number(grid[year_position, month], integral)
+            for month in np.flatnonzero(~np.isnan(grid[year_position]))
+        }
+    return trends
+
+def summarize_metrics_batch(volumes: np.ndarray, prices: np.ndarray, as_of: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    YoY change, rolling average, volatility and yearly volume/spend of every part (row) as JSON-friendly dicts
+    """
+    as_of = month_position() if as_of is None else as_of
+    yearly_volume = yearly_totals(volumes)
+    yearly_spend = yearly_totals(spend(volumes, prices))
+    price_yoy = yoy_change(prices)[:, as_of - 12] if as_of >= 12 else np.full(len(prices), np.nan)
+    rolling = rolling_average(prices)[:, as_of]
+    price_volatility = volatility(prices)
+
+    return [
+        {
+            "priceYoY": to_python_number(price_yoy[row]),
+            "priceRollingAvg3m": to_python_number(rolling[row]),
+            "priceVolatility": to_python_number(price_volatility[row]),
+            "volumeByYear": {year: to_python_number(total, True) for year, total in zip(YEARS, yearly_volume[row])},
+            "spendByYear": {year: round(float(total), 2) for year, total in zip(YEARS, yearly_spend[row])}
+        }
+        for row in range(len(prices))
+    ]
+
+def summarize_metrics(volumes: np.ndarray, prices: np.ndarray, as_of: Optional[int] = None) -> Dict[str, Any]:
+    """
+    YoY change, rolling average, volatility and yearly volume/spend of one part as a JSON-friendly dict
+    """
+    return summarize_metrics_batch(volumes[None, :], prices[None, :], as_of)[0]
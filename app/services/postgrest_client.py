@@ -0,0 +1,198 @@
+import os
+import asyncio
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import httpx
+from app.utils.exceptions import PostgRESTError
+
+# PostgREST client configuration (SUPABASE_REST_URL overrides the derived URL, e.g. for a local stub server)
+SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+SUPABASE_ANON_KEY = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+SUPABASE_REST_URL = os.getenv("SUPABASE_REST_URL") or (f"{SUPABASE_URL.rstrip('/')}/rest/v1" if SUPABASE_URL else None)
+SUPABASE_MAX_CONCURRENCY = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "16"))
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "15"))
+SUPABASE_CONNECT_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_CONNECT_TIMEOUT_SECONDS", "5"))
+SUPABASE_MAX_RETRIES = int(os.getenv("SUPABASE_MAX_RETRIES", "2"))
+
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+_stats = {
+    "requests": 0,
+    "failures": 0,
+    "timeouts": 0,
+    "inFlight": 0,
+    "waiting": 0,
+    "rows": 0
+}
+
+def open_postgrest_client(
+    base_url: Optional[str] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> httpx.AsyncClient:
+    """
+    Create the shared PostgREST HTTP client (called from the FastAPI lifespan; transport is for tests)
+    """
+    global _client
+
+    if _client is not None:
+        return _client
+
+    base_url = base_url or SUPABASE_REST_URL
+    if not base_url:
+        raise PostgRESTError("Supabase is not configured (set NEXT_PUBLIC_SUPABASE_URL or SUPABASE_REST_URL)")
+
+    headers = {"Accept": "application/json"}
+    if SUPABASE_ANON_KEY:
+        headers["apikey"] = SUPABASE_ANON_KEY
+        headers["Authorization"] = f"Bearer {SUPABASE_ANON_KEY}"
+
+    _client = httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_CONNECTIONS
+        ),
+        timeout=httpx.Timeout(SUPABASE_TIMEOUT_SECONDS, connect=SUPABASE_CONNECT_TIMEOUT_SECONDS),
+        # Connection failures are retried by the transport; HTTP errors are not
+        transport=transport or httpx.AsyncHTTPTransport(retries=SUPABASE_MAX_RETRIES)
+    )
+    print(f"🔌 PostgREST client ready ({base_url}, max concurrency: {SUPABASE_MAX_CONCURRENCY})")
+
+    return _client
+
+def get_postgrest_client() -> httpx.AsyncClient:
+    """
+    Get the shared PostgREST client, creating it on first use
+    """
+    return _client if _client is not None else open_postgrest_client()
+
+def get_postgrest_semaphore() -> asyncio.Semaphore:
+    """
+    Get the semaphore bounding concurrent PostgREST requests
+    """
+    global _semaphore
+
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(SUPABASE_MAX_CONCURRENCY)
+
+    return _semaphore
+
+async def close_postgrest_client() -> None:
+    """
+    Close the pooled HTTP client (called from the FastAPI lifespan)
+    """
+    global _client, _semaphore
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        print("🔌 PostgREST client closed")
+
+    _semaphore = None
+
+def compact_columns(columns: str) -> str:
+    """
+    Strip whitespace from a select list so it can go in the query string
+    """
+    return "".join(columns.split())
+
+def in_filter(values: Iterable[Any]) -> str:
+    """
+    Build an in.(...) filter value, quoting each item for PostgREST
+    """
+    quoted = []
+    for value in values:
+        text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        quoted.append(f'"{text}"')
+    return f"in.({','.join(quoted)})"
+
+async def select(
+    table: str,
+    columns: str = "*",
+    filters: Optional[List[Tuple[str, str]]] = None,
+    order: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Read rows from a table; filters are (column, "op.value") pairs in PostgREST syntax
+    """
+    params: List[Tuple[str, Any]] = [("select", compact_columns(columns))]
+    params.extend(filters or [])
+    if order:
+        params.append(("order", order))
+    if limit is not None:
+        params.append(("limit", limit))
+    if offset is not None:
+        params.append(("offset", offset))
+
+    client = get_postgrest_client()
+    semaphore = get_postgrest_semaphore()
+
+    _stats["waiting"] += 1
+    try:
+        await semaphore.acquire()
+    finally:
+        _stats["waiting"] -= 1
+
+    _stats["requests"] += 1
+    _stats["inFlight"] += 1
+    start_time = time.perf_counter()
+    try:
+        response = await client.get(f"/{table}", params=params)
+        if response.status_code >= 400:
+            raise PostgRESTError(
+                f"PostgREST {table} query failed ({response.status_code}): {response.text[:200]}",
+                status_code=response.status_code
+            )
+
+        rows = response.json()
+        _stats["rows"] += len(rows)
+        print(f"⏱️ PostgREST {table} query returned {len(rows)} rows in {time.perf_counter() - start_time:.3f}s")
+        return rows
+
+    except httpx.TimeoutException:
+        _stats["timeouts"] += 1
+        _stats["failures"] += 1
+        raise PostgRESTError(f"PostgREST {table} query timed out after {SUPABASE_TIMEOUT_SECONDS}s")
+    except httpx.HTTPError as error:
+        _stats["failures"] += 1
+        raise PostgRESTError(f"PostgREST {table} query failed: {error}")
+    except Exception:
+        _stats["failures"] += 1
+        raise
+    finally:
+        _stats["inFlight"] -= 1
+        semaphore.release()
+
+async def select_all(
+    table: str,
+    columns: str = "*",
+    filters: Optional[List[Tuple[str, str]]] = None,
+    order: str = "PartNumber",
+    page_size: int = 1000
+) -> List[Dict[str, Any]]:
+    """
+    Read every matching row, page by page in a stable order
+    """
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        page = await select(table, columns, filters=filters, order=order, limit=page_size, offset=offset)
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
+
+def get_postgrest_stats() -> Dict[str, Any]:
+    """
+    Get PostgREST client counters
+    """
+    return {
+        **_stats,
+        "maxConcurrency": SUPABASE_MAX_CONCURRENCY,
+        "timeoutSeconds": SUPABASE_TIMEOUT_SECONDS
+    }
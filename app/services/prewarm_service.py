@@ -0,0 +1,206 @@
+import os
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import numpy as np
+from app.services.supabase_service import get_all_parts
+from app.services.contract_service import analyze_contract, is_model_analysis
+from app.services.llm_gateway import track_llm_usage
+from app.services.part_timeseries import MONTH_INDEX, month_position, to_series, spend
+
+# Pre-warming configuration
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "false").lower() == "true"
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "50"))
+PREWARM_RANK_BY = os.getenv("PREWARM_RANK_BY", "spend").lower()  # spend | volume
+PREWARM_LOOKBACK_MONTHS = int(os.getenv("PREWARM_LOOKBACK_MONTHS", "6"))
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "2"))
+PREWARM_TOKEN_BUDGET = int(os.getenv("PREWARM_TOKEN_BUDGET", "200000"))
+PREWARM_WINDOW_START_HOUR = int(os.getenv("PREWARM_WINDOW_START_HOUR", "1"))
+PREWARM_WINDOW_END_HOUR = int(os.getenv("PREWARM_WINDOW_END_HOUR", "5"))
+PREWARM_INTERVAL_HOURS = float(os.getenv("PREWARM_INTERVAL_HOURS", "24"))
+PREWARM_CHECK_SECONDS = int(os.getenv("PREWARM_CHECK_SECONDS", "300"))
+PREWARM_COST_PER_1K_PROMPT_TOKENS = float(os.getenv("PREWARM_COST_PER_1K_PROMPT_TOKENS", "0.03"))
+PREWARM_COST_PER_1K_COMPLETION_TOKENS = float(os.getenv("PREWARM_COST_PER_1K_COMPLETION_TOKENS", "0.06"))
+
+_scheduler_task: Optional[asyncio.Task] = None
+_run_task: Optional[asyncio.Task] = None
+_status: Dict[str, Any] = {
+    "state": "idle",
+    "lastRunStartedAt": None,
+    "lastRunFinishedAt": None,
+    "lastRun": None
+}
+
+def get_recent_months(now: Optional[datetime] = None) -> List[str]:
+    """
+    The lookback window of MONTH_INDEX periods ending at the current month, clamped to the MASTER_FILE range
+    """
+    end_position = month_position(now)
+    return MONTH_INDEX[max(0, end_position - PREWARM_LOOKBACK_MONTHS + 1):end_position + 1]
+
+def rank_parts(rows: List[Dict[str, Any]], months: List[str], rank_by: str = PREWARM_RANK_BY) -> List[Dict[str, Any]]:
+    """
+    Rank MASTER_FILE rows by recent volume or spend (volume x price), highest first
+    """
+    if not rows:
+        return []
+
+    volumes = to_series(rows, [f"vol{period}" for period in months])
+    prices = to_series(rows, [f"price{period}" for period in months])
+    volume = np.nansum(volumes, axis=1)
+    total_spend = spend(volumes, prices).sum(axis=1)
+
+    scores = volume if rank_by == "volume" else total_spend
+    order = [position for position in np.argsort(-scores, kind="stable") if scores[position] > 0]
+    return [
+        {"partNumber": rows[position]['PartNumber'], "volume": float(volume[position]), "spend": round(float(total_spend[position]), 2)}
+        for position in order
+    ]
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Estimated USD cost of the given token usage
+    """
+    return round(
+        prompt_tokens / 1000 * PREWARM_COST_PER_1K_PROMPT_TOKENS
+        + completion_tokens / 1000 * PREWARM_COST_PER_1K_COMPLETION_TOKENS,
+        4
+    )
+
+async def run_prewarm(top_n: int = PREWARM_TOP_N, token_budget: int = PREWARM_TOKEN_BUDGET) -> Dict[str, Any]:
+    """
+    Rank parts and precompute their analyses under the concurrency and token budget
+    """
+    months = get_recent_months()
+    columns = ", ".join(["PartNumber"] + [f"vol{period}, price{period}" for period in months])
+
+    _status["state"] = "running"
+    _status["lastRunStartedAt"] = datetime.now().isoformat()
+    progress: Dict[str, Any] = {
+        "rankBy": PREWARM_RANK_BY,
+        "months": months,
+        "candidates": 0,
+        "completed": 0,
+        "failed": 0,
+        "failedParts": [],
+        "skippedForBudget": 0,
+        "tokenBudget": token_budget,
+        "promptTokens": 0,
+        "completionTokens": 0,
+        "estimatedCostUsd": 0.0,
+        "topParts": []
+    }
+    _status["lastRun"] = progress
+
+    try:
+        print(f"🔥 Pre-warm: ranking parts by {PREWARM_RANK_BY} over {len(months)} months")
+        candidates = rank_parts(await get_all_parts(columns), months)[:top_n]
+        progress["candidates"] = len(candidates)
+        progress["topParts"] = candidates[:10]
+
+        semaphore = asyncio.Semaphore(PREWARM_CONCURRENCY)
+
+        with track_llm_usage() as usage:
+            async def prewarm_part(part: Dict[str, Any]) -> None:
+                async with semaphore:
+                    # In-flight calls can overshoot the budget by at most PREWARM_CONCURRENCY analyses
+                    if usage["promptTokens"] + usage["completionTokens"] >= token_budget:
+                        progress["skippedForBudget"] += 1
+                        return
+                    try:
+                        # A mock or fallback analysis is not cached, so it warmed nothing
+                        if not is_model_analysis(await analyze_contract(part["partNumber"])):
+                            raise ValueError("analysis fell back instead of coming from the model")
+                        progress["completed"] += 1
+                    except Exception as error:
+                        print(f"Pre-warm failed for {part['partNumber']}: {error}")
+                        progress["failed"] += 1
+                        progress["failedParts"].append(part["partNumber"])
+                    finally:
+                        progress["promptTokens"] = usage["promptTokens"]
+                        progress["completionTokens"] = usage["completionTokens"]
+                        progress["estimatedCostUsd"] = estimate_cost(usage["promptTokens"], usage["completionTokens"])
+
+            await asyncio.gather(*(prewarm_part(part) for part in candidates))
+
+        print(
+            f"🔥 Pre-warm finished: {progress['completed']} warmed, {progress['failed']} failed, "
+            f"{progress['skippedForBudget']} skipped for budget, ~${progress['estimatedCostUsd']}"
+        )
+        return progress
+
+    finally:
+        _status["state"] = "idle"
+        _status["lastRunFinishedAt"] = datetime.now().isoformat()
+
+def is_in_window(now: datetime) -> bool:
+    """
+    Whether now falls in the off-peak window (which may wrap past midnight)
+    """
+    if PREWARM_WINDOW_START_HOUR <= PREWARM_WINDOW_END_HOUR:
+        return PREWARM_WINDOW_START_HOUR <= now.hour < PREWARM_WINDOW_END_HOUR
+    return now.hour >= PREWARM_WINDOW_START_HOUR or now.hour < PREWARM_WINDOW_END_HOUR
+
+async def _scheduler_loop() -> None:
+    while True:
+        now = datetime.now()
+        last_run = _status["lastRunStartedAt"]
+        due = last_run is None or (now - datetime.fromisoformat(last_run)).total_seconds() >= PREWARM_INTERVAL_HOURS * 3600
+
+        if due and is_in_window(now) and _status["state"] == "idle":
+            try:
+                await run_prewarm()
+            except Exception as error:
+                print(f"Pre-warm run failed: {error}")
+
+        await asyncio.sleep(PREWARM_CHECK_SECONDS)
+
+def trigger_prewarm() -> bool:
+    """
+    Start a pre-warm run in the background now; False if one is already running
+    """
+    global _run_task
+
+    if _status["state"] == "running" or (_run_task is not None and not _run_task.done()):
+        return False
+
+    # Marked running before the task starts, so a second trigger or the scheduler cannot start another run
+    _status["state"] = "running"
+    _run_task = asyncio.create_task(run_prewarm())
+    return True
+
+def get_prewarm_status() -> Dict[str, Any]:
+    """
+    Get scheduler state and progress/cost of the latest run
+    """
+    return {
+        **_status,
+        "enabled": PREWARM_ENABLED,
+        "window": f"{PREWARM_WINDOW_START_HOUR:02d}:00-{PREWARM_WINDOW_END_HOUR:02d}:00",
+        "topN": PREWARM_TOP_N,
+        "concurrency": PREWARM_CONCURRENCY
+    }
+
+async def start_prewarm_scheduler() -> None:
+    """
+    Start the off-peak pre-warm scheduler (called from the FastAPI lifespan)
+    """
+    global _scheduler_task
+
+    if not PREWARM_ENABLED:
+        return
+
+    _scheduler_task = asyncio.create_task(_scheduler_loop())
+    print(f"🔥 Pre-warm scheduler started (top {PREWARM_TOP_N} parts by {PREWARM_RANK_BY}, window {get_prewarm_status()['window']})")
+
+async def stop_prewarm_scheduler() -> None:
+    """
+    Stop the scheduler and any run in progress
+    """
+    for task in (_scheduler_task, _run_task):
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
@@ -0,0 +1,213 @@
+import os
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+# Token budget for the CONTRACT INFORMATION block; lower-ranked contracts are dropped to fit
+PROMPT_CONTRACT_TOKEN_BUDGET = int(os.getenv("PROMPT_CONTRACT_TOKEN_BUDGET", "6000"))
+# Clause text shorter than this is cheaper inline than as a shared reference
+PROMPT_SHARED_TEXT_MIN_CHARS = int(os.getenv("PROMPT_SHARED_TEXT_MIN_CHARS", "24"))
+
+# Contract fields holding free text that is often repeated verbatim across contracts
+CONTRACT_TEXT_FIELDS = ["terms", "clauses", "risks", "opportunities"]
+
+_encoding = None
+_encoding_loaded = False
+
+# Expected shape of every AI analysis section, shared by the monolithic and per-section prompts
+ANALYSIS_RESPONSE_SCHEMA: Dict[str, Any] = {
+    "dateRangeOfContracts": "Summary of contract date ranges",
+    "keyClausesIdentification": {
+        "critical_clauses": ["List of critical contract clauses"],
+        "risk_clauses": ["Clauses that pose risks"],
+        "opportunity_clauses": ["Clauses that present opportunities"]
+    },
+    "riskAssessmentAndMitigation": {
+        "high_risks": ["List of high-risk factors"],
+        "medium_risks": ["List of medium-risk factors"],
+        "low_risks": ["List of low-risk factors"],
+        "mitigation_strategies": ["Recommended mitigation strategies"]
+    },
+    "contractBenchmarkingAndPrecedentBasedInsights": {
+        "benchmark_metrics": ["Key metrics for benchmarking"],
+        "industry_comparisons": ["Industry standard comparisons"],
+        "best_practices": ["Recommended best practices"]
+    },
+    "negotiationLeveragePoints": {
+        "strengths": ["Your negotiation strengths"],
+        "weaknesses": ["Areas of weakness"],
+        "opportunities": ["Negotiation opportunities"],
+        "threats": ["Potential threats"]
+    },
+    "complianceCheck": {
+        "regulatory_requirements": ["Regulatory compliance requirements"],
+        "internal_policies": ["Internal policy compliance"],
+        "recommendations": ["Compliance recommendations"]
+    },
+    "summaryAndStrategicRecommendations": {
+        "executive_summary": "High-level summary of findings",
+        "key_recommendations": ["Strategic recommendations"],
+        "next_steps": ["Recommended next steps"],
+        "priority_actions": ["Priority actions to take"]
+    }
+}
+
+def count_tokens(text: str) -> int:
+    """
+    Count prompt tokens locally (tiktoken when installed, otherwise a ~4 chars/token estimate)
+    """
+    global _encoding, _encoding_loaded
+
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            print("⚠️ tiktoken unavailable - estimating prompt tokens from character count")
+            _encoding = None
+
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+def get_tokenizer_name() -> str:
+    """
+    Name of the tokenizer behind count_tokens
+    """
+    return "cl100k_base" if _encoding is not None else "estimate"
+
+def compact_json(value: Any) -> str:
+    """
+    Serialize without pretty-print whitespace
+    """
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+
+def drop_empty_fields(value: Any) -> Any:
+    """
+    Recursively remove null and empty fields
+    """
+    if isinstance(value, dict):
+        compacted = {key: drop_empty_fields(item) for key, item in value.items()}
+        return {key: item for key, item in compacted.items() if item not in (None, "", {}, [])}
+    if isinstance(value, (list, tuple)):
+        compacted = [drop_empty_fields(item) for item in value]
+        return [item for item in compacted if item not in (None, "", {}, [])]
+    return value
+
+def rank_contracts(contract_info: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Order contracts by relevance: most recent end date first, then highest value
+    """
+    def rank_key(contract: Dict[str, Any]) -> Tuple[str, float]:
+        end_date = contract.get("end_date") or contract.get("start_date") or ""
+        try:
+            value = float(contract.get("value") or 0)
+        except (TypeError, ValueError):
+            value = 0.0
+        return str(end_date), value
+
+    return sorted(contract_info, key=rank_key, reverse=True)
+
+def _iter_text_values(contract: Dict[str, Any]):
+    for field in CONTRACT_TEXT_FIELDS:
+        section = contract.get(field)
+        if isinstance(section, dict):
+            for text in section.values():
+                if isinstance(text, str):
+                    yield text
+
+def _replace_shared_text(contract: Dict[str, Any], references: Dict[str, str]) -> Dict[str, Any]:
+    replaced = dict(contract)
+    for field in CONTRACT_TEXT_FIELDS:
+        section = contract.get(field)
+        if isinstance(section, dict):
+            replaced[field] = {
+                key: references.get(text, text) if isinstance(text, str) else text
+                for key, text in section.items()
+            }
+    return replaced
+
+def build_contract_context(
+    contract_info: List[Dict[str, Any]],
+    token_budget: Optional[int] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Render the CONTRACT INFORMATION block within a token budget.
+    Contracts are compacted (no nulls, no whitespace), clause text repeated across
+    contracts is emitted once and referenced as §n, and contracts are included in
+    rank order until the budget is spent (the top-ranked contract is always included).
+    """
+    budget = token_budget or PROMPT_CONTRACT_TOKEN_BUDGET
+    ranked = [drop_empty_fields(contract) for contract in rank_contracts(contract_info)]
+
+    # Text that appears in more than one contract becomes a shared reference
+    occurrences: Dict[str, int] = {}
+    for contract in ranked:
+        for text in set(_iter_text_values(contract)):
+            occurrences[text] = occurrences.get(text, 0) + 1
+    shared_texts = [
+        text for text, count in occurrences.items()
+        if count > 1 and len(text) >= PROMPT_SHARED_TEXT_MIN_CHARS
+    ]
+    references = {text: f"§{index}" for index, text in enumerate(shared_texts, start=1)}
+
+    header = "CONTRACT INFORMATION (one compact JSON contract per line, ranked by recency and value):"
+    legend_header = "SHARED CLAUSE TEXT (referenced as §n in the contracts above):"
+    used_tokens = count_tokens(header) + count_tokens(legend_header)
+    contract_lines: List[str] = []
+    legend: Dict[str, str] = {}
+    for contract in ranked:
+        line = compact_json(_replace_shared_text(contract, references))
+        new_legend = {
+            references[text]: text
+            for text in _iter_text_values(contract)
+            if text in references and references[text] not in legend
+        }
+        # +1 per line for the separator
+        cost = count_tokens(line) + 1 + sum(count_tokens(f"{ref}: {text}") + 1 for ref, text in new_legend.items())
+
+        if contract_lines and used_tokens + cost > budget:
+            break
+
+        contract_lines.append(line)
+        legend.update(new_legend)
+        used_tokens += cost
+
+    blocks = [header]
+    blocks.extend(contract_lines)
+    if legend:
+        blocks.append(legend_header)
+        blocks.extend(f"{ref}: {text}" for ref, text in sorted(legend.items(), key=lambda item: int(item[0][1:])))
+
+    context = "\n    ".join(blocks)
+    stats = {
+        "contractsIncluded": len(contract_lines),
+        "contractsTotal": len(contract_info),
+        "contractTokens": count_tokens(context),
+        "tokenBudget": budget,
+        "sharedTexts": len(legend),
+        "tokenizer": get_tokenizer_name()
+    }
+
+    if len(contract_lines) < len(contract_info):
+        print(f"✂️ Prompt budget: included {len(contract_lines)}/{len(contract_info)} contracts ({stats['contractTokens']} tokens)")
+
+    return context, stats
+
+def format_part_context(part_info: Dict[str, Any]) -> str:
+    """
+    Render the PART INFORMATION block of a prompt
+    """
+    return f"""PART INFORMATION:
+    - Part Number: {part_info.get('PartNumber', 'N/A')}
+    - Part Name: {part_info.get('partname', 'N/A')}
+    - Supplier: {part_info.get('suppliername', 'N/A')}
+    - Material: {part_info.get('material', 'N/A')}
+    - Currency: {part_info.get('currency', 'N/A')}
+    - Current Pricing: {compact_json(drop_empty_fields(part_info.get('currentPricing', {})))}"""
+
+def format_response_schema(section_keys: List[str]) -> str:
+    """
+    Render the expected JSON response for the given sections
+    """
+    return json.dumps({key: ANALYSIS_RESPONSE_SCHEMA[key] for key in section_keys}, indent=4)
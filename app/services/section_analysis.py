@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import asyncio
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from app.services.llm_gateway import chat_completion
+from app.services.clause_retrieval import build_prompt_context
+from app.services.prompt_builder import format_part_context, format_response_schema
+from app.utils.json_stream import extract_json_object
+
+AI_SECTION_MAX_TOKENS = int(os.getenv("AI_SECTION_MAX_TOKENS", "1200"))
+
+# One prompt per analysis section; sections with depends_on_others run after the rest finish.
+# retrieval_query selects the contract passages each section's prompt carries.
+SECTION_SPECS: Dict[str, Dict[str, Any]] = {
+    "keyClauses": {
+        "keys": ["dateRangeOfContracts", "keyClausesIdentification"],
+        "focus": "the contract date ranges and the key clauses: which are critical, which pose risks and which present opportunities",
+        "retrieval_query": "key clauses termination notice renewal term duration start end date liability indemnity intellectual property exclusivity"
+    },
+    "risk": {
+        "keys": ["riskAssessmentAndMitigation"],
+        "focus": "risk assessment: classify high, medium and low risks and recommend mitigation strategies",
+        "retrieval_query": "risk high medium low single source supply disruption liability penalty price increase dependency mitigation"
+    },
+    "benchmarking": {
+        "keys": ["contractBenchmarkingAndPrecedentBasedInsights"],
+        "focus": "benchmarking the contracts against industry standards and precedent",
+        "retrieval_query": "pricing payment terms net days discount warranty service level industry standard market rate"
+    },
+    "negotiation": {
+        "keys": ["negotiationLeveragePoints"],
+        "focus": "negotiation leverage: strengths, weaknesses, opportunities and threats",
+        "retrieval_query": "savings volume discount opportunity leverage price adjustment renewal option multi year commitment rebate"
+    },
+    "compliance": {
+        "keys": ["complianceCheck"],
+        "focus": "regulatory and internal policy compliance",
+        "retrieval_query": "compliance regulatory audit confidentiality data protection insurance force majeure governing law policy"
+    },
+    "summary": {
+        "keys": ["summaryAndStrategicRecommendations"],
+        "focus": "an executive summary with strategic recommendations, next steps and priority actions",
+        "retrieval_query": "value savings opportunity risk renewal termination payment terms pricing",
+        "depends_on_others": True
+    }
+}
+
+def create_section_prompt(
+    section: str,
+    part_info: Dict[str, Any],
+    contract_context: str,
+    prior_findings: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Create the prompt for a single analysis section
+    """
+    spec = SECTION_SPECS[section]
+
+    findings_block = ""
+    if prior_findings:
+        findings_block = f"""
+    FINDINGS FROM THE OTHER ANALYSIS SECTIONS:
+    {json.dumps(prior_findings, separators=(',', ':'))}
+"""
+
+    return f"""
+    You are an expert contract analyst and procurement specialist. Analyze the following contract data, focusing only on {spec['focus']}.
+
+    {format_part_context(part_info)}
+
+    {contract_context}
+{findings_block}
+    Respond with a JSON object in exactly the following format:
+
+    {format_response_schema(spec['keys'])}
+
+    Focus on practical, actionable insights that can help with contract negotiation and risk management.
+    """
+
+async def run_section(
+    section: str,
+    part_info: Dict[str, Any],
+    contract_context: str,
+    fallback_analysis: Dict[str, Any],
+    prior_findings: Optional[Dict[str, Any]] = None
+) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """
+    Run one section prompt, falling back to the provided analysis on failure
+    """
+    keys = SECTION_SPECS[section]["keys"]
+    start_time = time.perf_counter()
+
+    try:
+        response = await chat_completion(
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an expert contract analyst and procurement specialist. Provide detailed, practical analysis in JSON format."
+                },
+                {
+                    "role": "user",
+                    "content": create_section_prompt(section, part_info, contract_context, prior_findings)
+                }
+            ],
+            temperature=0.3,
+            max_tokens=AI_SECTION_MAX_TOKENS
+        )
+        parsed = extract_json_object(response)
+        missing = [key for key in keys if key not in parsed]
+        if missing:
+            raise ValueError(f"Response missing {', '.join(missing)}")
+
+        payload = {key: parsed[key] for key in keys}
+        timing = {"seconds": round(time.perf_counter() - start_time, 3), "status": "ok"}
+
+    except Exception as error:
+        print(f"Error in {section} section analysis: {error}")
+        payload = {key: fallback_analysis.get(key) for key in keys}
+        timing = {"seconds": round(time.perf_counter() - start_time, 3), "status": "fallback", "error": str(error)}
+
+    print(f"⏱️ Section {section} finished in {timing['seconds']}s ({timing['status']})")
+    return section, payload, timing
+
+async def iter_sections_parallel(
+    part_info: Dict[str, Any],
+    contract_info: List[Dict[str, Any]],
+    fallback_analysis: Dict[str, Any]
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run the independent section prompts concurrently and yield each section as it completes,
+    followed by the dependent sections and finally the analysisMetadata timings
+    """
+    start_time = time.perf_counter()
+    findings: Dict[str, Any] = {}
+    timings: Dict[str, Any] = {}
+
+    # Each section gets the contract passages retrieved for its own query; one at a time, so the
+    # first section builds the shared passage index and the others reuse it
+    contexts: Dict[str, str] = {}
+    prompt_stats: Dict[str, Any] = {}
+    for name, spec in SECTION_SPECS.items():
+        contexts[name], prompt_stats[name] = await build_prompt_context(contract_info, [spec["retrieval_query"]])
+
+    independent = [name for name, spec in SECTION_SPECS.items() if not spec.get("depends_on_others")]
+    dependent = [name for name, spec in SECTION_SPECS.items() if spec.get("depends_on_others")]
+
+    # Concurrency is bounded by the LLM gateway semaphore shared with every other caller
+    tasks = [
+        asyncio.create_task(run_section(name, part_info, contexts[name], fallback_analysis))
+        for name in independent
+    ]
+    try:
+        for next_completed in asyncio.as_completed(tasks):
+            section, payload, timing = await next_completed
+            timings[section] = timing
+            for key, value in payload.items():
+                findings[key] = value
+                yield key, value
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    for name in dependent:
+        section, payload, timing = await run_section(name, part_info, contexts[name], fallback_analysis, findings)
+        timings[section] = timing
+        for key, value in payload.items():
+            yield key, value
+
+    yield "analysisMetadata", {
+        "mode": "parallel",
+        "sectionTimings": timings,
+        "totalSeconds": round(time.perf_counter() - start_time, 3),
+        "promptStats": prompt_stats
+    }
+
+async def analyze_sections_parallel(
+    part_info: Dict[str, Any],
+    contract_info: List[Dict[str, Any]],
+    fallback_analysis: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Run the section-parallel analysis and merge the sections into one analysis
+    """
+    analysis: Dict[str, Any] = {}
+    async for key, value in iter_sections_parallel(part_info, contract_info, fallback_analysis):
+        analysis[key] = value
+    return analysis
+
+def is_complete_analysis(analysis: Dict[str, Any]) -> bool:
+    """
+    Whether every section came from the model (no fallbacks), i.e. the result is safe to cache
+    """
+    timings = analysis.get("analysisMetadata", {}).get("sectionTimings", {})
+    return bool(timings) and all(timing.get("status") == "ok" for timing in timings.values())
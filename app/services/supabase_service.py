@@ -1,102 +1,200 @@
 import os
+import asyncio
 from typing import Dict, Any, List, Optional
-from supabase import create_client, Client
-
-# Initialize Supabase client
-supabase: Client = create_client(
-    os.getenv("NEXT_PUBLIC_SUPABASE_URL"),
-    os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+import numpy as np
+from app.services.postgrest_client import select, select_all, in_filter
+from app.services.master_snapshot import ATTRIBUTE_COLUMNS, get_fresh_snapshot, record_lookup
+from app.services.supplier_index import get_supplier_index
+from app.services.supplier_aggregates import get_supplier_aggregate
+from app.services.part_timeseries import (
+    MONTH_INDEX,
+    VOLUME_COLUMNS,
+    PRICE_COLUMNS,
+    to_series,
+    current_price,
+    series_to_trends,
+    summarize_metrics_batch,
+    to_python_number
 )
 
-async def get_part_information(part_number: str) -> Optional[Dict[str, Any]]:
+# Bulk lookup configuration: part numbers per in.(...) query and concurrent chunk queries
+PARTS_LOOKUP_CHUNK_SIZE = int(os.getenv("PARTS_LOOKUP_CHUNK_SIZE", "100"))
+PARTS_LOOKUP_CONCURRENCY = int(os.getenv("PARTS_LOOKUP_CONCURRENCY", "4"))
+
+# Field profiles: which MASTER_FILE columns a lookup selects and which derived data it computes
+#   minimal - part and supplier attributes only
+#   pricing - plus the 36 monthly prices (currentPricing, pricingTrends)
+#   full    - plus the 36 monthly volumes (volumeTrends, metrics)
+PART_PROFILES = {
+    "minimal": {"volumes": False, "prices": False},
+    "pricing": {"volumes": False, "prices": True},
+    "full": {"volumes": True, "prices": True}
+}
+
+def get_profile_columns(profile: str) -> List[str]:
     """
-    Get part information from MASTER_FILE table
+    MASTER_FILE columns selected for a field profile
+    """
+    if profile not in PART_PROFILES:
+        raise ValueError(f"Unknown part profile: {profile} (expected one of {', '.join(PART_PROFILES)})")
+
+    fields = PART_PROFILES[profile]
+    return (
+        ATTRIBUTE_COLUMNS
+        + (VOLUME_COLUMNS if fields["volumes"] else [])
+        + (PRICE_COLUMNS if fields["prices"] else [])
+    )
+
+# Columns needed for the full profile
+PART_COLUMNS = ", ".join(get_profile_columns("full"))
+
+async def get_part_information(part_number: str, profile: str = "full") -> Optional[Dict[str, Any]]:
+    """
+    Get part information from MASTER_FILE table, limited to a field profile
     """
     try:
-        print(f"🔍 Querying MASTER_FILE for part number: {part_number}")
-
-        response = supabase.table('MASTER_FILE').select("""
-            suppliernumber,
-            suppliername,
-            suppliercontactname,
-            suppliercontactemail,
-            suppliermanufacturinglocation,
-            PartNumber,
-            partname,
-            material,
-            currency,
-            voljan2023, volfeb2023, volmar2023, volapr2023, volmay2023, voljun2023,
-            voljul2023, volaug2023, volsep2023, voloct2023, volnov2023, voldec2023,
-            voljan2024, volfeb2024, volmar2024, volapr2024, volmay2024, voljun2024,
-            voljul2024, volaug2024, volsep2024, voloct2024, volnov2024, voldec2024,
-            voljan2025, volfeb2025, volmar2025, volapr2025, volmay2025, voljun2025,
-            voljul2025, volaug2025, volsep2025, voloct2025, volnov2025, voldec2025,
-            pricejan2023, pricefeb2023, pricemar2023, priceapr2023, pricemay2023, pricejun2023,
-            pricejul2023, priceaug2023, pricesep2023, priceoct2023, pricenov2023, pricedec2023,
-            pricejan2024, pricefeb2024, pricemar2024, priceapr2024, pricemay2024, pricejun2024,
-            pricejul2024, priceaug2024, pricesep2024, priceoct2024, pricenov2024, pricedec2024,
-            pricejan2025, pricefeb2025, pricemar2025, priceapr2025, pricemay2025, pricejun2025,
-            pricejul2025, priceaug2025, pricesep2025, priceoct2025, pricenov2025, pricedec2025
-        """).eq('PartNumber', part_number).execute()
-
-        if not response.data or len(response.data) == 0:
+        columns = get_profile_columns(profile)
+
+        snapshot = get_fresh_snapshot()
+        if snapshot is not None:
+            row = snapshot.get_row(part_number, **PART_PROFILES[profile])
+            record_lookup(row is not None)
+            if row is not None:
+                return process_part_row(row, profile)
+
+        print(f"🔍 Querying MASTER_FILE for part number: {part_number} ({profile} profile)")
+
+        rows = await select('MASTER_FILE', ", ".join(columns), filters=[('PartNumber', f'eq.{part_number}')], limit=1)
+
+        if not rows:
             print(f"❌ Part number {part_number} not found in MASTER_FILE")
             return None
 
-        data = response.data[0]
+        data = rows[0]
         print(f"✅ Found part information for {part_number}: {data['suppliername']}")
 
-        # Process and structure the data
-        processed_data = {
-            **data,
-            # Calculate current pricing and volume trends
-            "currentPricing": extract_current_pricing(data),
-            "volumeTrends": extract_volume_trends(data),
-            "pricingTrends": extract_pricing_trends(data)
-        }
-
-        return processed_data
+        return process_part_row(data, profile)
 
     except Exception as error:
         print(f"Error getting part information: {error}")
         raise error
 
-def extract_current_pricing(data: Dict[str, Any]) -> Dict[str, Any]:
+async def get_parts_information(part_numbers: List[str], profile: str = "full") -> Dict[str, Dict[str, Any]]:
+    """
+    Get part information for many part numbers, keyed by part number (unknown parts are left out)
+    """
+    try:
+        part_numbers = list(dict.fromkeys(part_numbers))
+        if not part_numbers:
+            return {}
+
+        columns = ", ".join(get_profile_columns(profile))
+
+        rows: List[Dict[str, Any]] = []
+        missing = part_numbers
+
+        # Serve what the snapshot has; only parts it does not know go to the live query
+        snapshot = get_fresh_snapshot()
+        if snapshot is not None:
+            missing = []
+            for part_number in part_numbers:
+                row = snapshot.get_row(part_number, **PART_PROFILES[profile])
+                record_lookup(row is not None)
+                if row is not None:
+                    rows.append(row)
+                else:
+                    missing.append(part_number)
+
+        if missing:
+            # in.(...) lists are chunked to keep URLs short; chunks run concurrently, bounded
+            chunks = [missing[start:start + PARTS_LOOKUP_CHUNK_SIZE] for start in range(0, len(missing), PARTS_LOOKUP_CHUNK_SIZE)]
+            semaphore = asyncio.Semaphore(PARTS_LOOKUP_CONCURRENCY)
+
+            async def fetch_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    return await select('MASTER_FILE', columns, filters=[('PartNumber', in_filter(chunk))])
+
+            print(f"🔍 Querying MASTER_FILE for {len(missing)} part numbers in {len(chunks)} chunks")
+            for chunk_rows in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+                rows.extend(chunk_rows)
+
+        parts = {part['PartNumber']: part for part in process_part_rows(rows, profile)}
+        print(f"✅ Found {len(parts)}/{len(part_numbers)} parts in MASTER_FILE")
+
+        return parts
+
+    except Exception as error:
+        print(f"Error getting parts information: {error}")
+        raise error
+
+async def get_all_parts(columns: str, page_size: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Read selected columns of every MASTER_FILE row, page by page
+    """
+    try:
+        rows = await select_all('MASTER_FILE', columns, order='PartNumber', page_size=page_size)
+        print(f"✅ Read {len(rows)} MASTER_FILE rows")
+        return rows
+
+    except Exception as error:
+        print(f"Error reading MASTER_FILE: {error}")
+        raise error
+
+def process_part_row(data: Dict[str, Any], profile: str = "full") -> Dict[str, Any]:
+    """
+    Add the derived pricing and volume data of a field profile to a MASTER_FILE row
+    """
+    return process_part_rows([data], profile)[0]
+
+def process_part_rows(rows: List[Dict[str, Any]], profile: str = "full") -> List[Dict[str, Any]]:
+    """
+    Add derived data to many MASTER_FILE rows, computed over the whole batch's matrices at once
+    """
+    if profile == "minimal" or not rows:
+        return [dict(row) for row in rows]
+
+    prices = to_series(rows, PRICE_COLUMNS)
+    # Most recent actual (not forecast) price of every part
+    latest_prices, latest_positions = current_price(prices)
+
+    volumes = None
+    metrics = None
+    if profile == "full":
+        volumes = to_series(rows, VOLUME_COLUMNS)
+        metrics = summarize_metrics_batch(volumes, prices)
+
+    parts = []
+    for position, row in enumerate(rows):
+        part = {
+            **row,
+            "currentPricing": {
+                "latestPrice": to_python_number(latest_prices[position]),
+                "latestPriceDate": MONTH_INDEX[int(latest_positions[position])] if latest_positions[position] >= 0 else None,
+                "currency": row.get('currency')
+            }
+        }
+        if volumes is not None:
+            part["volumeTrends"] = series_to_trends(volumes[position], integral=True)
+        part["pricingTrends"] = series_to_trends(prices[position])
+        if metrics is not None:
+            part["metrics"] = metrics[position]
+        parts.append(part)
+
+    return parts
+
+def extract_current_pricing(data: Dict[str, Any], prices: Optional[np.ndarray] = None) -> Dict[str, Any]:
     """
     Extract current pricing information
     """
-    from datetime import datetime
-    
-    current_month = datetime.now().month - 1  # 0-11
-    current_year = datetime.now().year
-    
-    # Get the most recent actual price (not forecast)
-    latest_price = None
-    latest_price_date = None
-
-    # Check 2025 prices first (current year)
-    for month in range(current_month + 1):
-        month_names = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
-        price_key = f"price{month_names[month]}2025"
-        
-        if data.get(price_key) and data[price_key] > 0:
-            latest_price = data[price_key]
-            latest_price_date = f"{month_names[month]}2025"
-
-    # If no 2025 price, check 2024
-    if not latest_price:
-        for month in range(11, -1, -1):
-            month_names = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
-            price_key = f"price{month_names[month]}2024"
-            
-            if data.get(price_key) and data[price_key] > 0:
-                latest_price = data[price_key]
-                latest_price_date = f"{month_names[month]}2024"
-                break
+    if prices is None:
+        prices = to_series([data], PRICE_COLUMNS)[0]
+
+    # Most recent actual (not forecast) price
+    latest_price, latest_position = current_price(prices)
 
     return {
-        "latestPrice": latest_price,
-        "latestPriceDate": latest_price_date,
+        "latestPrice": to_python_number(latest_price),
+        "latestPriceDate": MONTH_INDEX[int(latest_position)] if latest_position >= 0 else None,
         "currency": data.get('currency')
     }
 
@@ -104,46 +202,21 @@ def extract_volume_trends(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Extract volume trends
     """
-    volumes = {}
-    years = [2023, 2024, 2025]
-    months = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
-
-    for year in years:
-        volumes[year] = {}
-        for month in months:
-            key = f"vol{month}{year}"
-            if data.get(key) and data[key] > 0:
-                volumes[year][month] = data[key]
-
-    return volumes
+    return series_to_trends(to_series([data], VOLUME_COLUMNS)[0], integral=True)
 
 def extract_pricing_trends(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Extract pricing trends
     """
-    prices = {}
-    years = [2023, 2024, 2025]
-    months = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
-
-    for year in years:
-        prices[year] = {}
-        for month in months:
-            key = f"price{month}{year}"
-            if data.get(key) and data[key] > 0:
-                prices[year][month] = data[key]
-
-    return prices
+    return series_to_trends(to_series([data], PRICE_COLUMNS)[0])
 
 async def get_parts_by_supplier(supplier_name: str) -> List[Dict[str, Any]]:
     """
     Search for parts by supplier name
     """
     try:
-        response = supabase.table('MASTER_FILE').select(
-            'PartNumber, partname, material, currency'
-        ).ilike('suppliername', f'%{supplier_name}%').execute()
-
-        return response.data or []
+        index = get_supplier_index()
+        return index.find_parts(supplier_name)
     except Exception as error:
         print(f"Error searching parts by supplier: {error}")
         raise error
@@ -153,22 +226,26 @@ async def get_supplier_statistics(supplier_name: str) -> Optional[Dict[str, Any]
     Get supplier statistics
     """
     try:
-        response = supabase.table('MASTER_FILE').select(
-            'PartNumber, material, currency'
-        ).ilike('suppliername', f'%{supplier_name}%').execute()
-
-        data = response.data
-        if not data or len(data) == 0:
+        index = get_supplier_index()
+        records = [
+            record for record in [await get_supplier_aggregate(name) for name in index.match_suppliers(supplier_name)]
+            if record is not None
+        ]
+        if not records:
             return None
 
+        # Precomputed per-supplier rollups; a query matching several suppliers sums them
         stats = {
-            "totalParts": len(data),
-            "materials": list(set([item['material'] for item in data if item.get('material')])),
-            "currencies": list(set([item['currency'] for item in data if item.get('currency')])),
-            "partNumbers": [item['PartNumber'] for item in data]
+            "totalParts": sum(record["totalParts"] for record in records),
+            "materials": sorted({material for record in records for material in record["materials"]}),
+            "currencies": sorted({currency for record in records for currency in record["currencies"]}),
+            "partNumbers": [part_number for record in records for part_number in record["partNumbers"]],
+            "suppliers": [record["supplierName"] for record in records],
+            "totalVolume": round(sum(record["totalVolume"] for record in records), 2),
+            "totalSpend": round(sum(record["totalSpend"] for record in records), 2)
         }
 
         return stats
     except Exception as error:
         print(f"Error in get_supplier_statistics: {error}")
-        raise error 
\ No newline at end of file
+        raise error
@@ -0,0 +1,381 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from app.services.postgrest_client import select_all
+from app.services.part_timeseries import MONTH_INDEX, YEARS, PERIODS, rows_to_matrices, spend, yearly_totals
+from app.services.master_snapshot import (
+    MasterSnapshot,
+    get_fresh_snapshot,
+    add_refresh_listener,
+    snapshot_columns
+)
+from app.utils.exceptions import ContractAnalysisError
+from app.utils.sqlite import open_sqlite
+
+# Supplier aggregate configuration
+SUPPLIER_AGGREGATES_DB_PATH = os.getenv("SUPPLIER_AGGREGATES_DB_PATH", "data/supplier_aggregates.db")
+SUPPLIER_AGGREGATES_REFRESH_SECONDS = int(os.getenv("SUPPLIER_AGGREGATES_REFRESH_SECONDS", "3600"))
+
+class SupplierAggregates:
+    """
+    Per-supplier rollups of MASTER_FILE: part counts, materials, currencies and
+    monthly volume/spend sums. Each part's contribution is kept so changed rows
+    can be subtracted and re-added without a full pass.
+    """
+
+    def __init__(self):
+        self.built_at = time.time()
+        self.volume: Dict[str, np.ndarray] = {}
+        self.spend: Dict[str, np.ndarray] = {}
+        # Volume of the months that also have a price (the denominator of the average price)
+        self.priced_volume: Dict[str, np.ndarray] = {}
+        self.parts: Dict[str, Dict[str, None]] = {}
+        self.materials: Dict[str, Counter] = {}
+        self.currencies: Dict[str, Counter] = {}
+        # PartNumber -> (supplier, material, currency, volume row, priced volume row, spend row)
+        self.contributions: Dict[str, Tuple[str, Any, Any, np.ndarray, np.ndarray, np.ndarray]] = {}
+        # Rendered records, rebuilt only for suppliers that changed
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_matrices(cls, attributes: List[Dict[str, Any]], volumes: np.ndarray, prices: np.ndarray) -> "SupplierAggregates":
+        """
+        Build all supplier rollups in one vectorized pass over the MASTER_FILE matrices
+        """
+        aggregates = cls()
+        names = np.array([row.get("suppliername") or "" for row in attributes], dtype=object)
+        suppliers, inverse = np.unique(names, return_inverse=True)
+
+        volume_rows, priced_volume_rows, spend_rows = contribution_rows(np.asarray(volumes), np.asarray(prices))
+
+        # Scatter-add every part's months into its supplier's row
+        volume_sums = np.zeros((len(suppliers), PERIODS))
+        priced_volume_sums = np.zeros((len(suppliers), PERIODS))
+        spend_sums = np.zeros((len(suppliers), PERIODS))
+        np.add.at(volume_sums, inverse, volume_rows)
+        np.add.at(priced_volume_sums, inverse, priced_volume_rows)
+        np.add.at(spend_sums, inverse, spend_rows)
+
+        for position, supplier in enumerate(suppliers):
+            if not supplier:
+                continue
+            aggregates.volume[supplier] = volume_sums[position]
+            aggregates.priced_volume[supplier] = priced_volume_sums[position]
+            aggregates.spend[supplier] = spend_sums[position]
+            aggregates.parts[supplier] = {}
+            aggregates.materials[supplier] = Counter()
+            aggregates.currencies[supplier] = Counter()
+
+        for position, row in enumerate(attributes):
+            supplier = names[position]
+            if not supplier:
+                continue
+            aggregates._index_part(row, supplier, volume_rows[position], priced_volume_rows[position], spend_rows[position])
+
+        aggregates.records = {supplier: aggregates._render(supplier) for supplier in aggregates.parts}
+        return aggregates
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "SupplierAggregates":
+        volumes, prices = rows_to_matrices(rows)
+        return cls.from_matrices(rows, volumes, prices)
+
+    def apply_rows(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """
+        Replace the contributions of changed MASTER_FILE rows; returns the suppliers that changed
+        """
+        volume_rows, priced_volume_rows, spend_rows = contribution_rows(*rows_to_matrices(rows))
+
+        changed = set()
+        for position, row in enumerate(rows):
+            previous = self.contributions.pop(row["PartNumber"], None)
+            if previous is not None:
+                old_supplier, old_material, old_currency, old_volume, old_priced_volume, old_spend = previous
+                self.volume[old_supplier] = self.volume[old_supplier] - old_volume
+                self.priced_volume[old_supplier] = self.priced_volume[old_supplier] - old_priced_volume
+                self.spend[old_supplier] = self.spend[old_supplier] - old_spend
+                self.parts[old_supplier].pop(row["PartNumber"], None)
+                self.materials[old_supplier][old_material] -= 1
+                self.currencies[old_supplier][old_currency] -= 1
+                changed.add(old_supplier)
+
+            supplier = row.get("suppliername")
+            if not supplier:
+                continue
+            if supplier not in self.parts:
+                self.volume[supplier] = np.zeros(PERIODS)
+                self.priced_volume[supplier] = np.zeros(PERIODS)
+                self.spend[supplier] = np.zeros(PERIODS)
+                self.parts[supplier] = {}
+                self.materials[supplier] = Counter()
+                self.currencies[supplier] = Counter()
+            self.volume[supplier] = self.volume[supplier] + volume_rows[position]
+            self.priced_volume[supplier] = self.priced_volume[supplier] + priced_volume_rows[position]
+            self.spend[supplier] = self.spend[supplier] + spend_rows[position]
+            self._index_part(row, supplier, volume_rows[position], priced_volume_rows[position], spend_rows[position])
+            changed.add(supplier)
+
+        for supplier in changed:
+            if self.parts[supplier]:
+                self.records[supplier] = self._render(supplier)
+            else:
+                for table in (self.volume, self.priced_volume, self.spend, self.parts, self.materials, self.currencies, self.records):
+                    table.pop(supplier, None)
+
+        return sorted(changed)
+
+    def get(self, supplier_name: str) -> Optional[Dict[str, Any]]:
+        return self.records.get(supplier_name)
+
+    def age_seconds(self) -> float:
+        return time.time() - self.built_at
+
+    def _index_part(
+        self,
+        row: Dict[str, Any],
+        supplier: str,
+        volume_row: np.ndarray,
+        priced_volume_row: np.ndarray,
+        spend_row: np.ndarray
+    ) -> None:
+        material = row.get("material")
+        currency = row.get("currency")
+        self.parts[supplier][row["PartNumber"]] = None
+        self.materials[supplier][material] += 1
+        self.currencies[supplier][currency] += 1
+        self.contributions[row["PartNumber"]] = (supplier, material, currency, volume_row, priced_volume_row, spend_row)
+
+    def _render(self, supplier: str) -> Dict[str, Any]:
+        volume = self.volume[supplier]
+        priced_volume = self.priced_volume[supplier]
+        monthly_spend = self.spend[supplier]
+
+        # Volume-weighted average price per month, indexed to the first priced month (= 100)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            average_price = np.where((priced_volume > 0) & (monthly_spend > 0), monthly_spend / priced_volume, np.nan)
+        priced = np.flatnonzero(~np.isnan(average_price))
+        price_index = average_price / average_price[priced[0]] * 100 if len(priced) else average_price
+
+        materials = sorted(material for material, count in self.materials[supplier].items() if material and count > 0)
+        currencies = sorted(currency for currency, count in self.currencies[supplier].items() if currency and count > 0)
+
+        return {
+            "supplierName": supplier,
+            "totalParts": len(self.parts[supplier]),
+            "materials": materials,
+            "currencies": currencies,
+            "mixedCurrencies": len(currencies) > 1,
+            "partNumbers": list(self.parts[supplier]),
+            "totalVolume": round(float(volume.sum()), 2),
+            "totalSpend": round(float(monthly_spend.sum()), 2),
+            "volumeByYear": {year: round(float(total), 2) for year, total in zip(YEARS, yearly_totals(volume))},
+            "spendByYear": {year: round(float(total), 2) for year, total in zip(YEARS, yearly_totals(monthly_spend))},
+            "monthlyVolume": {period: round(float(value), 2) for period, value in zip(MONTH_INDEX, volume) if value},
+            "monthlySpend": {period: round(float(value), 2) for period, value in zip(MONTH_INDEX, monthly_spend) if value},
+            "priceIndex": {
+                period: round(float(value), 2) for period, value in zip(MONTH_INDEX, price_index) if not np.isnan(value)
+            },
+            "updatedAt": datetime.now().isoformat()
+        }
+
+class SupplierAggregateStore:
+    """SQLite copy of the rendered supplier records, so they survive restarts"""
+
+    def __init__(self, db_path: str = SUPPLIER_AGGREGATES_DB_PATH):
+        self._db = open_sqlite(db_path)
+        self._lock = threading.Lock()
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS supplier_aggregates (
+                supplier_name TEXT PRIMARY KEY,
+                record TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+
+    def replace_all(self, records: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM supplier_aggregates")
+            self._write(records)
+            self._db.execute("COMMIT")
+
+    def upsert(self, records: Dict[str, Dict[str, Any]], removed: List[str]) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM supplier_aggregates WHERE supplier_name = ?", [(name,) for name in removed])
+            self._write(records)
+            self._db.execute("COMMIT")
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute("SELECT supplier_name, record FROM supplier_aggregates").fetchall()
+        return {name: json.loads(record) for name, record in rows}
+
+    def _write(self, records: Dict[str, Dict[str, Any]]) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO supplier_aggregates (supplier_name, record, updated_at) VALUES (?, ?, ?)",
+            [(name, json.dumps(record), record["updatedAt"]) for name, record in records.items()]
+        )
+
+def contribution_rows(volumes: np.ndarray, prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-part monthly volume, volume with a known price, and spend (missing months as zero)
+    """
+    volume_rows = np.nan_to_num(volumes, nan=0.0)
+    priced_volume_rows = np.where(np.isnan(prices), 0.0, volume_rows)
+    return volume_rows, priced_volume_rows, spend(volumes, prices)
+
+_aggregates: Optional[SupplierAggregates] = None
+# Records loaded from disk at startup, served until the first build completes
+_persisted: Dict[str, Dict[str, Any]] = {}
+_store: Optional[SupplierAggregateStore] = None
+_build_lock: Optional[asyncio.Lock] = None
+_build_task: Optional[asyncio.Task] = None
+_stats = {
+    "fullBuilds": 0,
+    "incrementalUpdates": 0,
+    "suppliersUpdated": 0,
+    "buildFailures": 0,
+    "lastBuildSeconds": None
+}
+
+def get_aggregate_store() -> SupplierAggregateStore:
+    global _store
+
+    if _store is None:
+        _store = SupplierAggregateStore()
+    return _store
+
+def _get_build_lock() -> asyncio.Lock:
+    global _build_lock
+
+    if _build_lock is None:
+        _build_lock = asyncio.Lock()
+    return _build_lock
+
+async def rebuild_supplier_aggregates(snapshot: Optional[MasterSnapshot] = None) -> SupplierAggregates:
+    """
+    Recompute every supplier's rollup from the snapshot (or one paged MASTER_FILE query) and persist it.
+    Without a snapshot, aggregates rebuilt within SUPPLIER_AGGREGATES_REFRESH_SECONDS are returned as they are.
+    """
+    global _aggregates, _persisted
+
+    async with _get_build_lock():
+        # Callers that queued behind a build reuse its result instead of scanning again
+        if snapshot is None and _aggregates is not None and _aggregates.age_seconds() < SUPPLIER_AGGREGATES_REFRESH_SECONDS:
+            return _aggregates
+
+        start_time = time.perf_counter()
+        snapshot = snapshot or get_fresh_snapshot()
+        if snapshot is not None:
+            aggregates = await asyncio.to_thread(
+                SupplierAggregates.from_matrices, snapshot.attributes, snapshot.volumes, snapshot.prices
+            )
+        else:
+            rows = await select_all('MASTER_FILE', snapshot_columns())
+            aggregates = await asyncio.to_thread(SupplierAggregates.from_rows, rows)
+
+        await asyncio.to_thread(get_aggregate_store().replace_all, aggregates.records)
+        _aggregates = aggregates
+        _persisted = {}
+
+        _stats["fullBuilds"] += 1
+        _stats["lastBuildSeconds"] = round(time.perf_counter() - start_time, 3)
+        print(f"📊 Supplier aggregates built: {len(aggregates.records)} suppliers in {_stats['lastBuildSeconds']}s")
+        return aggregates
+
+def get_supplier_aggregates() -> Optional[SupplierAggregates]:
+    """
+    Get the supplier aggregates (None until the first background build completes)
+    """
+    return _aggregates
+
+async def get_supplier_aggregate(supplier_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Get one supplier's rollup by exact name (a dict lookup; builds only run in the background)
+    """
+    if _aggregates is not None:
+        return _aggregates.get(supplier_name)
+    if _persisted:
+        # The persisted records are the last complete build, served until the new one is ready
+        return _persisted.get(supplier_name)
+    raise ContractAnalysisError("Supplier aggregates are still being built, retry shortly", code="AGGREGATES_BUILDING")
+
+async def _on_snapshot_refresh(snapshot: MasterSnapshot, rows: List[Dict[str, Any]], incremental: bool) -> None:
+    if not incremental or _aggregates is None:
+        await rebuild_supplier_aggregates(snapshot)
+        return
+
+    async with _get_build_lock():
+        changed = _aggregates.apply_rows(rows)
+        # Incremental updates keep the aggregates current, so the scheduled rebuild is not due
+        _aggregates.built_at = time.time()
+        records = {supplier: _aggregates.records[supplier] for supplier in changed if supplier in _aggregates.records}
+        removed = [supplier for supplier in changed if supplier not in _aggregates.records]
+        await asyncio.to_thread(get_aggregate_store().upsert, records, removed)
+
+    _stats["incrementalUpdates"] += 1
+    _stats["suppliersUpdated"] += len(changed)
+    if changed:
+        print(f"📊 Supplier aggregates updated for {len(changed)} suppliers")
+
+async def _build_loop() -> None:
+    while True:
+        try:
+            if _aggregates is None or _aggregates.age_seconds() >= SUPPLIER_AGGREGATES_REFRESH_SECONDS:
+                await rebuild_supplier_aggregates()
+        except Exception as error:
+            _stats["buildFailures"] += 1
+            print(f"Supplier aggregate build failed: {error}")
+
+        await asyncio.sleep(SUPPLIER_AGGREGATES_REFRESH_SECONDS if _aggregates is not None else 60)
+
+async def start_supplier_aggregates() -> None:
+    """
+    Follow snapshot refreshes, load persisted aggregates and start the background builds (called from the FastAPI lifespan)
+    """
+    global _persisted, _build_task
+
+    add_refresh_listener(_on_snapshot_refresh)
+
+    try:
+        _persisted = await asyncio.to_thread(get_aggregate_store().load_all)
+        if _persisted:
+            print(f"📊 Loaded {len(_persisted)} persisted supplier aggregates")
+    except Exception as error:
+        print(f"Could not load supplier aggregates: {error}")
+
+    if _build_task is None:
+        _build_task = asyncio.create_task(_build_loop())
+
+async def stop_supplier_aggregates() -> None:
+    """
+    Stop the background builds
+    """
+    global _build_task
+
+    if _build_task is not None:
+        _build_task.cancel()
+        try:
+            await _build_task
+        except asyncio.CancelledError:
+            pass
+        _build_task = None
+
+def get_supplier_aggregate_stats() -> Dict[str, Any]:
+    """
+    Get supplier aggregate build counters
+    """
+    return {
+        **_stats,
+        "suppliers": len(_aggregates.records) if _aggregates is not None else len(_persisted),
+        "building": _aggregates is None and _build_lock is not None and _build_lock.locked(),
+        "ageSeconds": round(_aggregates.age_seconds(), 1) if _aggregates is not None else None,
+        "refreshSeconds": SUPPLIER_AGGREGATES_REFRESH_SECONDS
+    }
@@ -0,0 +1,246 @@
+import os
+import re
+import time
+import asyncio
+import unicodedata
+from typing import Dict, Any, List, Optional, Set, Tuple
+from app.services.postgrest_client import select_all
+from app.services.master_snapshot import MasterSnapshot, get_fresh_snapshot, add_refresh_listener
+from app.utils.exceptions import ContractAnalysisError
+
+# Supplier search index configuration
+SUPPLIER_INDEX_REFRESH_SECONDS = int(os.getenv("SUPPLIER_INDEX_REFRESH_SECONDS", "900"))
+SUPPLIER_SEARCH_MIN_SCORE = float(os.getenv("SUPPLIER_SEARCH_MIN_SCORE", "0.3"))
+
+# Part fields kept per supplier (what get_parts_by_supplier / get_supplier_statistics return)
+PART_FIELDS = ['PartNumber', 'partname', 'material', 'currency']
+
+# Score bands: literal matches always rank above typo-tolerant ones
+MATCH_SCORES = {"exact": 1.0, "prefix": 0.9, "substring": 0.8}
+FUZZY_SCORE_CEILING = 0.75
+
+def normalize_name(name: str) -> str:
+    """
+    Lowercase, strip accents and punctuation, collapse whitespace
+    """
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Trigrams of a normalized name, padded so word starts and ends count
+    """
+    padded = f"  {text} "
+    return {padded[position:position + 3] for position in range(len(padded) - 2)}
+
+class SupplierIndex:
+    """
+    Trigram postings over normalized supplier names, with each supplier's parts
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.built_at = time.time()
+        self.names: List[str] = []
+        self.normalized: List[str] = []
+        self.grams: List[Set[str]] = []
+        self.parts: List[List[Dict[str, Any]]] = []
+        self.postings: Dict[str, List[int]] = {}
+
+        self.ids: Dict[str, int] = {}
+        for row in rows:
+            name = row.get('suppliername')
+            if not name:
+                continue
+            supplier_id = self.ids.get(name)
+            if supplier_id is None:
+                supplier_id = self.ids[name] = len(self.names)
+                self.names.append(name)
+                self.normalized.append(normalize_name(name))
+                self.parts.append([])
+            self.parts[supplier_id].append({field: row.get(field) for field in PART_FIELDS})
+
+        for supplier_id, normalized in enumerate(self.normalized):
+            grams = trigrams(normalized)
+            self.grams.append(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(supplier_id)
+
+        self.part_count = sum(len(parts) for parts in self.parts)
+
+    def search(self, query: str, limit: int = 10, min_score: float = SUPPLIER_SEARCH_MIN_SCORE) -> List[Dict[str, Any]]:
+        """
+        Suppliers matching query by exact, prefix, substring or trigram similarity, best first
+        """
+        return [
+            {
+                "supplierName": self.names[supplier_id],
+                "score": score,
+                "matchType": match_type,
+                "partCount": len(self.parts[supplier_id]),
+                "partNumbers": [part['PartNumber'] for part in self.parts[supplier_id]]
+            }
+            for score, supplier_id, match_type in self._match(query, min_score)[:limit]
+        ]
+
+    def match_suppliers(self, query: str) -> List[str]:
+        """
+        Names of the matching suppliers. Literal matches win: typo-tolerant
+        matches are only used when no supplier name contains the query.
+        """
+        matches = self._match(query, SUPPLIER_SEARCH_MIN_SCORE)
+        literal = [match for match in matches if match[2] != "fuzzy"]
+        return [self.names[supplier_id] for _, supplier_id, _ in (literal or matches)]
+
+    def find_parts(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Parts of the suppliers returned by match_suppliers
+        """
+        return [part for name in self.match_suppliers(query) for part in self.parts[self.ids[name]]]
+
+    def _match(self, query: str, min_score: float) -> List[Tuple[float, int, str]]:
+        needle = normalize_name(query)
+        if not needle:
+            return []
+
+        query_grams = trigrams(needle)
+        candidates: Dict[int, int] = {}
+        if len(needle) < 3:
+            # Too short for trigram candidates; the distinct supplier list is small enough to scan
+            candidates = {supplier_id: 0 for supplier_id in range(len(self.names))}
+        else:
+            for gram in query_grams:
+                for supplier_id in self.postings.get(gram, ()):
+                    candidates[supplier_id] = candidates.get(supplier_id, 0) + 1
+
+        matches = []
+        for supplier_id, shared in candidates.items():
+            name = self.normalized[supplier_id]
+            if name == needle:
+                match_type, score = "exact", MATCH_SCORES["exact"]
+            elif name.startswith(needle) or f" {needle}" in name:
+                match_type, score = "prefix", MATCH_SCORES["prefix"]
+            elif needle in name:
+                match_type, score = "substring", MATCH_SCORES["substring"]
+            else:
+                # Share of the query's trigrams found in the name (so a misspelt short query can
+                # match a long name), nudged by Dice similarity so closer-length names rank first
+                containment = shared / len(query_grams)
+                dice = 2 * shared / (len(query_grams) + len(self.grams[supplier_id]))
+                match_type, score = "fuzzy", round((0.8 * containment + 0.2 * dice) * FUZZY_SCORE_CEILING, 4)
+
+            if score >= min_score:
+                matches.append((score, supplier_id, match_type))
+
+        matches.sort(key=lambda match: (-match[0], self.names[match[1]]))
+        return matches
+
+    def age_seconds(self) -> float:
+        return time.time() - self.built_at
+
+_index: Optional[SupplierIndex] = None
+_build_lock: Optional[asyncio.Lock] = None
+_build_task: Optional[asyncio.Task] = None
+_stats = {
+    "builds": 0,
+    "buildFailures": 0,
+    "lastBuildSeconds": None
+}
+
+def _get_build_lock() -> asyncio.Lock:
+    global _build_lock
+
+    if _build_lock is None:
+        _build_lock = asyncio.Lock()
+    return _build_lock
+
+async def rebuild_supplier_index(snapshot: Optional[MasterSnapshot] = None) -> SupplierIndex:
+    """
+    Rebuild the supplier index from the MASTER_FILE snapshot (or one paged query).
+    Without a snapshot, an index built within SUPPLIER_INDEX_REFRESH_SECONDS is returned as it is.
+    """
+    global _index
+
+    async with _get_build_lock():
+        # Callers that queued behind a build reuse its result instead of scanning again
+        if snapshot is None and _index is not None and _index.age_seconds() < SUPPLIER_INDEX_REFRESH_SECONDS:
+            return _index
+
+        start_time = time.perf_counter()
+        snapshot = snapshot or get_fresh_snapshot()
+        if snapshot is not None:
+            rows = snapshot.attributes
+        else:
+            rows = await select_all('MASTER_FILE', ", ".join(['suppliername'] + PART_FIELDS))
+
+        index = await asyncio.to_thread(SupplierIndex, rows)
+        _index = index
+
+        _stats["builds"] += 1
+        _stats["lastBuildSeconds"] = round(time.perf_counter() - start_time, 3)
+        print(
+            f"🔎 Supplier index built: {len(index.names)} suppliers, {index.part_count} parts "
+            f"in {_stats['lastBuildSeconds']}s"
+        )
+        return index
+
+def get_supplier_index() -> SupplierIndex:
+    """
+    Get the current supplier index (builds only run in the background)
+    """
+    if _index is None:
+        raise ContractAnalysisError("The supplier index is still being built, retry shortly", code="SUPPLIER_INDEX_BUILDING")
+    return _index
+
+async def _on_snapshot_refresh(snapshot: MasterSnapshot, rows: List[Dict[str, Any]], incremental: bool) -> None:
+    await rebuild_supplier_index(snapshot)
+
+async def _build_loop() -> None:
+    while True:
+        try:
+            if _index is None or _index.age_seconds() >= SUPPLIER_INDEX_REFRESH_SECONDS:
+                await rebuild_supplier_index()
+        except Exception as error:
+            _stats["buildFailures"] += 1
+            print(f"Supplier index build failed: {error}")
+
+        await asyncio.sleep(SUPPLIER_INDEX_REFRESH_SECONDS if _index is not None else 60)
+
+async def start_supplier_index() -> None:
+    """
+    Follow snapshot refreshes and start the background builds (called from the FastAPI lifespan)
+    """
+    global _build_task
+
+    add_refresh_listener(_on_snapshot_refresh)
+
+    if _build_task is None:
+        _build_task = asyncio.create_task(_build_loop())
+
+async def stop_supplier_index() -> None:
+    """
+    Stop the background builds
+    """
+    global _build_task
+
+    if _build_task is not None:
+        _build_task.cancel()
+        try:
+            await _build_task
+        except asyncio.CancelledError:
+            pass
+        _build_task = None
+
+def get_supplier_index_stats() -> Dict[str, Any]:
+    """
+    Get supplier index size and age
+    """
+    return {
+        **_stats,
+        "building": _index is None and _build_lock is not None and _build_lock.locked(),
+        "suppliers": len(_index.names) if _index is not None else 0,
+        "parts": _index.part_count if _index is not None else 0,
+        "trigrams": len(_index.postings) if _index is not None else 0,
+        "ageSeconds": round(_index.age_seconds(), 1) if _index is not None else None,
+        "refreshSeconds": SUPPLIER_INDEX_REFRESH_SECONDS
+    }
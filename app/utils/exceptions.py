@@ -5,4 +5,18 @@ class ContractAnalysisError(Exception):
     def __init__(self, message, code=None, supplier=None):
         super().__init__(message)
         self.code = code
-        self.supplier = supplier 
\ No newline at end of file
+        self.supplier = supplier 
+
+class LLMGatewayError(Exception):
+    """Raised when the LLM gateway cannot produce a completion"""
+    pass
+
+class PostgRESTError(Exception):
+    """Raised when a Supabase PostgREST query fails"""
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class ContractStoreError(Exception):
+    """Raised when the Cassandra/Astra contract store cannot be queried"""
+    pass
@@ -0,0 +1,91 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+class TopLevelJsonSectionParser:
+    """
+    Incrementally parse a streamed JSON object and emit each top-level
+    member as soon as its value is complete
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start: Optional[int] = None
+        self._finished = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """
+        Add streamed text and return the members completed by it
+        """
+        completed = []
+        if self._finished:
+            return completed
+
+        self._buffer += text
+
+        while self._position < len(self._buffer):
+            char = self._buffer[self._position]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                # Text before the opening brace (e.g. a ```json fence) is ignored
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = self._position + 1
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 1:
+                    self._emit(self._position, completed)
+                    self._finished = True
+                    self._depth = 0
+                    break
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                self._emit(self._position, completed)
+                self._member_start = self._position + 1
+
+            self._position += 1
+
+        return completed
+
+    def _emit(self, end: int, completed: List[Tuple[str, Any]]) -> None:
+        member = self._buffer[self._member_start:end].strip()
+        if not member:
+            return
+
+        try:
+            parsed = json.loads("{" + member + "}")
+        except ValueError:
+            # Leave malformed members for the final full-response parse
+            return
+
+        completed.extend(parsed.items())
+
+def extract_json_object(response: str) -> Dict[str, Any]:
+    """
+    Extract the JSON object from an AI response, raising if none can be parsed
+    """
+    # Try to extract JSON from the response
+    if "```json" in response:
+        json_start = response.find("```json") + 7
+        json_end = response.find("```", json_start)
+        json_str = response[json_start:json_end].strip()
+    else:
+        # Try to find JSON in the response
+        start_idx = response.find("{")
+        end_idx = response.rfind("}") + 1
+        json_str = response[start_idx:end_idx]
+    
+    return json.loads(json_str)
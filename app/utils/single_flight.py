@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key onto one in-flight task.
+    Every caller gets the shared result or exception; the shared task is only
+    cancelled once all of its callers have been cancelled.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        self._stats = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,
+            "failures": 0,
+            "cancelled": 0
+        }
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn for key, or join the call already in flight for it
+        """
+        self._stats["calls"] += 1
+
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = {"task": None, "waiters": 0}
+            entry["task"] = asyncio.create_task(self._run(key, entry, fn))
+            self._inflight[key] = entry
+            self._stats["executions"] += 1
+        else:
+            self._stats["coalesced"] += 1
+            print(f"🔗 Coalesced duplicate request for {key} ({entry['waiters']} already waiting)")
+
+        entry["waiters"] += 1
+        try:
+            # shield: one caller being cancelled must not cancel the others
+            return await asyncio.shield(entry["task"])
+        finally:
+            entry["waiters"] -= 1
+            task = entry["task"]
+            if entry["waiters"] == 0 and not task.done():
+                task.cancel()
+                self._stats["cancelled"] += 1
+                if self._inflight.get(key) is entry:
+                    del self._inflight[key]
+
+    async def _run(self, key: str, entry: Dict[str, Any], fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._stats["failures"] += 1
+            raise
+        finally:
+            if self._inflight.get(key) is entry:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get call, execution and coalescing counters
+        """
+        return {
+            **self._stats,
+            "inFlight": len(self._inflight)
+        }
@@ -0,0 +1,15 @@
+import os
+import sqlite3
+
+def open_sqlite(db_path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite connection shared across worker threads
+    """
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
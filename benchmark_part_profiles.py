@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark part lookups per field profile: response payload size and latency
+
+Live mode queries MASTER_FILE through PostgREST for a sample of part numbers.
+--synthetic generates rows locally and measures the serialized payload and
+derived-data processing time only (no network).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from app.services.supabase_service import PART_PROFILES, get_profile_columns, process_part_row
+from app.services.postgrest_client import get_postgrest_client, compact_columns, close_postgrest_client, select
+from app.services.part_timeseries import VOLUME_COLUMNS, PRICE_COLUMNS
+
+def synthetic_row(number, rng):
+    row = {
+        "suppliernumber": f"S{number % 300:04d}",
+        "suppliername": f"Supplier {number % 300}",
+        "suppliercontactname": "Jane Doe",
+        "suppliercontactemail": "jane@example.com",
+        "suppliermanufacturinglocation": "Stuttgart, DE",
+        "PartNumber": f"PA-{number:05d}",
+        "partname": "Bracket",
+        "material": "steel",
+        "currency": "EUR"
+    }
+    row.update({column: rng.randint(0, 5000) for column in VOLUME_COLUMNS})
+    row.update({column: round(rng.uniform(0.5, 40), 4) for column in PRICE_COLUMNS})
+    return row
+
+def summarize(profile, sizes, fetch_timings, process_timings):
+    fetch = f"fetch median {statistics.median(fetch_timings) * 1000:8.2f} ms   " if fetch_timings else ""
+    print(
+        f"{profile:<8} columns {len(get_profile_columns(profile)):3d}   payload {statistics.mean(sizes):8.0f} B   "
+        f"{fetch}process median {statistics.median(process_timings) * 1000:7.3f} ms"
+    )
+
+async def run(args):
+    rng = random.Random(7)
+
+    if args.synthetic:
+        rows = [synthetic_row(number, rng) for number in range(args.samples)]
+        print(f"🧪 {len(rows)} synthetic MASTER_FILE rows\n")
+        for profile in PART_PROFILES:
+            columns = get_profile_columns(profile)
+            sizes, process_timings = [], []
+            for row in rows:
+                projected = {column: row[column] for column in columns}
+                sizes.append(len(json.dumps([projected]).encode("utf-8")))
+                start = time.perf_counter()
+                process_part_row(projected, profile)
+                process_timings.append(time.perf_counter() - start)
+            summarize(profile, sizes, [], process_timings)
+        return
+
+    sample = await select('MASTER_FILE', 'PartNumber', order='PartNumber', limit=args.samples)
+    part_numbers = [row['PartNumber'] for row in sample]
+    print(f"📥 Sampled {len(part_numbers)} part numbers\n")
+
+    client = get_postgrest_client()
+    for profile in PART_PROFILES:
+        select_list = compact_columns(", ".join(get_profile_columns(profile)))
+        sizes, fetch_timings, process_timings = [], [], []
+        for part_number in part_numbers:
+            start = time.perf_counter()
+            response = await client.get("/MASTER_FILE", params={"select": select_list, "PartNumber": f"eq.{part_number}"})
+            response.raise_for_status()
+            rows = response.json()
+            fetch_timings.append(time.perf_counter() - start)
+            sizes.append(len(response.content))
+
+            start = time.perf_counter()
+            for row in rows:
+                process_part_row(row, profile)
+            process_timings.append(time.perf_counter() - start)
+        summarize(profile, sizes, fetch_timings, process_timings)
+
+    await close_postgrest_client()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=50, help="number of parts to look up")
+    parser.add_argument("--synthetic", action="store_true", help="use generated rows instead of Supabase")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
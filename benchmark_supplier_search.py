@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark supplier search: the supplier trigram index against the ilike '%name%' path
+
+Live mode (Supabase configured) times real PostgREST ilike queries against index lookups.
+--synthetic N generates N parts locally and times an in-process sequential scan instead,
+which shows the scan cost without network latency.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import string
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from app.services.supplier_index import SupplierIndex, PART_FIELDS
+from app.services.postgrest_client import select, select_all, close_postgrest_client
+
+def make_queries(names, count, seed=7):
+    """Mix of full names, prefixes, inner substrings and one-typo names"""
+    rng = random.Random(seed)
+    queries = []
+    for position in range(count):
+        name = rng.choice(names)
+        kind = position % 4
+        if kind == 0:
+            queries.append(name)
+        elif kind == 1:
+            queries.append(name[:max(3, len(name) // 2)])
+        elif kind == 2:
+            start = rng.randint(0, max(0, len(name) - 4))
+            queries.append(name[start:start + 4])
+        else:
+            typo = rng.randint(0, len(name) - 1)
+            queries.append(name[:typo] + rng.choice(string.ascii_lowercase) + name[typo + 1:])
+    return queries
+
+def synthetic_rows(parts, suppliers, seed=7):
+    rng = random.Random(seed)
+    words = ["acme", "nordic", "precision", "global", "metal", "works", "plastics", "tech", "industries", "castings"]
+    names = [
+        f"{rng.choice(words).title()} {rng.choice(words).title()} {rng.choice(['GmbH', 'Ltd', 'Inc', 'S.A.'])} {number}"
+        for number in range(suppliers)
+    ]
+    return [
+        {
+            "suppliername": rng.choice(names),
+            "PartNumber": f"PA-{number:05d}",
+            "partname": "Part",
+            "material": rng.choice(["steel", "aluminium", "abs"]),
+            "currency": "EUR"
+        }
+        for number in range(parts)
+    ]
+
+def summarize(label, timings, matches):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(
+        f"{label:<22} median {statistics.median(timings) * 1000:9.3f} ms   "
+        f"p95 {p95 * 1000:9.3f} ms   avg matches {statistics.mean(matches):7.1f}"
+    )
+
+async def run(args):
+    if args.synthetic:
+        rows = synthetic_rows(args.synthetic, args.suppliers)
+        print(f"🧪 Synthetic MASTER_FILE: {len(rows)} parts, {args.suppliers} suppliers")
+    else:
+        rows = await select_all('MASTER_FILE', ", ".join(['suppliername'] + PART_FIELDS))
+        print(f"📥 Loaded {len(rows)} MASTER_FILE rows")
+
+    start = time.perf_counter()
+    index = SupplierIndex(rows)
+    print(f"🔎 Index build: {(time.perf_counter() - start) * 1000:.1f} ms ({len(index.names)} suppliers, {len(index.postings)} trigrams)")
+
+    queries = make_queries(index.names, args.queries)
+
+    baseline_timings, baseline_matches = [], []
+    for query in queries:
+        start = time.perf_counter()
+        if args.synthetic:
+            needle = query.lower()
+            result = [row for row in rows if needle in (row["suppliername"] or "").lower()]
+        else:
+            result = await select(
+                'MASTER_FILE',
+                'PartNumber, partname, material, currency',
+                filters=[('suppliername', f'ilike.*{query}*')]
+            )
+        baseline_timings.append(time.perf_counter() - start)
+        baseline_matches.append(len(result))
+
+    index_timings, index_matches = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = index.find_parts(query)
+        index_timings.append(time.perf_counter() - start)
+        index_matches.append(len(result))
+
+    print()
+    summarize("scan (in-process)" if args.synthetic else "ilike (PostgREST)", baseline_timings, baseline_matches)
+    summarize("trigram index", index_timings, index_matches)
+
+    # Typo queries find nothing with ilike; the index falls back to fuzzy matches
+    typo_hits = sum(1 for position in range(3, len(queries), 4) if index_matches[position] and not baseline_matches[position])
+    print(f"\nTypo queries answered only by the index: {typo_hits}/{len(queries) // 4}")
+
+    await close_postgrest_client()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200, help="number of queries to time")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N", help="use N generated parts instead of Supabase")
+    parser.add_argument("--suppliers", type=int, default=500, help="supplier count for --synthetic")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
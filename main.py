@@ -19,6 +19,16 @@ import uvicorn
 
 from app.routes import contract_routes, health_routes
 from app.services.health_service import check_database_connections
+from app.services.llm_gateway import close_llm_gateway
+from app.services.postgrest_client import open_postgrest_client, close_postgrest_client
+from app.services.contract_repository import open_contract_repository, close_contract_repository
+from app.services.contract_statistics import start_contract_statistics, stop_contract_statistics
+from app.services.contract_text_index import start_contract_text_index, stop_contract_text_index
+from app.services.master_snapshot import start_snapshot_refresher, stop_snapshot_refresher
+from app.services.supplier_aggregates import start_supplier_aggregates, stop_supplier_aggregates
+from app.services.supplier_index import start_supplier_index, stop_supplier_index
+from app.services.job_service import start_job_workers, stop_job_workers
+from app.services.prewarm_service import start_prewarm_scheduler, stop_prewarm_scheduler
 
 # Pydantic models for request/response validation
 class ContractAnalysisRequest(BaseModel):
@@ -58,9 +68,28 @@ class ErrorResponse(BaseModel):
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting CONTRACTEXTRACT AI Agent server...")
+    open_postgrest_client()
+    await open_contract_repository()
+    await start_contract_statistics()
+    await start_contract_text_index()
+    await start_supplier_aggregates()
+    await start_supplier_index()
+    await start_snapshot_refresher()
+    await start_job_workers()
+    await start_prewarm_scheduler()
     yield
     # Shutdown
     print("🛑 Shutting down CONTRACTEXTRACT AI Agent server...")
+    await stop_prewarm_scheduler()
+    await stop_snapshot_refresher()
+    await stop_supplier_aggregates()
+    await stop_supplier_index()
+    await stop_job_workers()
+    await close_llm_gateway()
+    await close_postgrest_client()
+    await stop_contract_statistics()
+    await stop_contract_text_index()
+    await close_contract_repository()
 
 # Create FastAPI app
 app = FastAPI(
@@ -132,7 +161,8 @@ async def root():
         "status": "running",
         "endpoints": {
             "health": "/api/health",
-            "contractAnalysis": "/api/contracts/analyze"
+            "contractAnalysis": "/api/contracts/analyze",
+            "contractAnalysisStream": "/api/contracts/analyze/stream"
         }
     }
 
@@ -159,7 +189,7 @@ async def not_found_handler(request: Request, exc: Exception):
         content={
             "error": "Endpoint not found",
             "message": f"The requested endpoint {request.url.path} does not exist",
-            "availableEndpoints": ["/api/health", "/api/contracts/analyze"]
+            "availableEndpoints": ["/api/health", "/api/contracts/analyze", "/api/contracts/analyze/stream"]
         }
     )
 
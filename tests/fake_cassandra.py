@@ -0,0 +1,107 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from app.services.contract_model import contract_row_factory
+from app.services.contract_repository import CONTRACT_EXECUTION_PROFILE
+
+class FakePrepared:
+    def __init__(self, query: str):
+        self.query = query
+
+    def bind(self, values: Sequence[Any]) -> "FakeBound":
+        return FakeBound(self, list(values))
+
+class FakeBound:
+    def __init__(self, prepared: FakePrepared, values: List[Any]):
+        self.query = prepared.query
+        self.values = values
+        self.fetch_size: Optional[int] = None
+
+class FakeBatch:
+    """
+    Stands in for cassandra.query.BatchStatement, which only accepts the driver's own prepared statements
+    """
+
+    def __init__(self, batch_type: Any = None):
+        self.batch_type = batch_type
+        self.statements: List[Tuple[str, List[Any]]] = []
+
+    def add(self, statement: FakePrepared, parameters: Sequence[Any]) -> None:
+        self.statements.append((statement.query, list(parameters)))
+
+    def parameters_for(self, query_fragment: str) -> List[List[Any]]:
+        return [parameters for query, parameters in self.statements if query_fragment in query]
+
+class FakeResponseFuture:
+    """
+    Hands out pages through the callbacks the way ResponseFuture does, one page per start_fetching_next_page
+    """
+
+    def __init__(self, pages: List[List[Any]], error: Optional[BaseException] = None, query: str = ""):
+        self.query = query
+        self.pages = pages
+        self.error = error
+        self.fetched = 0
+        self.callback: Optional[Callable] = None
+
+    @property
+    def has_more_pages(self) -> bool:
+        return self.fetched < len(self.pages)
+
+    def add_callbacks(self, callback: Callable, errback: Callable) -> None:
+        self.callback = callback
+        if self.error is not None:
+            errback(self.error)
+        else:
+            self.start_fetching_next_page()
+
+    def start_fetching_next_page(self) -> None:
+        page = self.pages[self.fetched] if self.pages else []
+        self.fetched += 1
+        self.callback(page)
+
+class FakeSession:
+    """
+    Cassandra session double: records DDL, prepared statements, batches and reads.
+    Reads are answered by handlers registered with on(); rows are dicts, returned as
+    Contract records under the contracts execution profile like the real row factory.
+    """
+
+    def __init__(self, default_fetch_size: int = 5000):
+        self.default_fetch_size = default_fetch_size
+        self.ddl: List[str] = []
+        self.prepared: List[str] = []
+        self.batches: List[FakeBatch] = []
+        self.reads: List[Tuple[str, List[Any]]] = []
+        self.futures: List[FakeResponseFuture] = []
+        self.handlers: List[Tuple[str, Callable[[List[Any]], List[Dict[str, Any]]]]] = []
+        self.error: Optional[BaseException] = None
+
+    def on(self, query_fragment: str, rows: Any) -> None:
+        """
+        Answer reads whose CQL contains query_fragment with rows (a list, or a function of the bound values)
+        """
+        handler = rows if callable(rows) else (lambda parameters, rows=rows: rows)
+        self.handlers.insert(0, (query_fragment, handler))
+
+    def prepare(self, query: str) -> FakePrepared:
+        self.prepared.append(query)
+        return FakePrepared(query)
+
+    def execute(self, query: str) -> None:
+        self.ddl.append(query)
+
+    def execute_async(self, statement: Any, parameters: Optional[Sequence[Any]] = None, execution_profile: Any = None) -> FakeResponseFuture:
+        if isinstance(statement, FakeBatch):
+            self.batches.append(statement)
+            future = FakeResponseFuture([])
+        else:
+            fetch_size = getattr(statement, "fetch_size", None) or self.default_fetch_size
+            values = list(statement.values) if isinstance(statement, FakeBound) else list(parameters or [])
+            self.reads.append((statement.query, values))
+            rows = next((handler(values) for fragment, handler in self.handlers if fragment in statement.query), [])
+            if rows and execution_profile == CONTRACT_EXECUTION_PROFILE:
+                columns = list(rows[0])
+                rows = contract_row_factory(columns, [tuple(row[column] for column in columns) for row in rows])
+            future = FakeResponseFuture([rows[start:start + fetch_size] for start in range(0, len(rows), fetch_size)], self.error, statement.query)
+
+        self.futures.append(future)
+        return future
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from cassandra.util import unix_time_from_uuid1
+from app.services import contract_repository
+from app.services.contract_model import CONTRACT_FIELDS, Contract
+from app.services.astra_service import plan_contract_search
+from app.services.contract_repository import (
+    CONTRACT_CHANGE_LOG_TTL_SECONDS,
+    close_contract_repository,
+    open_contract_repository
+)
+from app.utils.exceptions import ContractStoreError
+from tests.fake_cassandra import FakeBatch, FakeSession
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(contract_repository, "BatchStatement", FakeBatch)
+    return FakeSession()
+
+def run(session, scenario):
+    async def main():
+        repository = await open_contract_repository(session=session)
+        try:
+            return await scenario(repository)
+        finally:
+            await close_contract_repository()
+    return asyncio.run(main())
+
+def contract_row(number, supplier_name="Acme", contract_type="Supply Agreement", value=1000.0):
+    row = {
+        "id": f"contract_{number:03d}",
+        "supplier_name": supplier_name,
+        "contract_title": f"Agreement {number}",
+        "contract_type": contract_type,
+        "start_date": "2024-01-01",
+        "end_date": "2024-12-31",
+        "value": value,
+        "currency": "USD"
+    }
+    # Map columns are read with toJson, so they arrive as JSON text
+    for field in CONTRACT_FIELDS[8:]:
+        row[field] = json.dumps({"clause": f"{field} text {number}"})
+    return row
+
+def reads_of(session, query_fragment):
+    return [values for query, values in session.reads if query_fragment in query]
+
+def test_open_creates_tables_and_prepares_statements(session):
+    repository = run(session, lambda repository: asyncio.sleep(0, result=repository))
+
+    created = " ".join(session.ddl)
+    for table in list(repository.query_tables.values()) + [repository.change_log, repository.supplier_versions]:
+        assert f"CREATE TABLE IF NOT EXISTS {table} " in created
+    assert any("toJson(terms) AS terms" in query for query in session.prepared)
+    assert ("by_supplier", ()) in repository.select_statements
+
+def test_supplier_pages_are_fetched_on_demand(session):
+    session.on("_by_supplier WHERE", [contract_row(number) for number in range(5)])
+
+    async def scenario(repository):
+        pages = [page async for page in repository.iter_supplier_contracts("Acme", fetch_size=2)]
+
+        async for _ in repository.iter_supplier_contracts("Acme", fetch_size=2):
+            break
+        return pages
+
+    pages = run(session, scenario)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert all(isinstance(contract, Contract) for page in pages for contract in page)
+    assert pages[0][0].terms == {"clause": "terms text 0"}
+    assert reads_of(session, "_by_supplier WHERE")[0] == ["Acme"]
+    # The consumer that stopped after one page never requested the second
+    assert session.futures[-1].fetched == 1
+
+def test_saving_a_new_contract_writes_one_batch(session):
+    contract = {**contract_row(1), "terms": {"payment": "Net 30"}, "clauses": None, "risks": None, "opportunities": None}
+
+    change = run(session, lambda repository: repository.save_contract(contract))
+
+    assert len(session.batches) == 1
+    batch = session.batches[0]
+    table = "default_keyspace.contracts"
+    assert len(batch.parameters_for(f"INSERT INTO {table} (")) == 1
+    for name in ("by_supplier", "by_type", "by_value"):
+        assert len(batch.parameters_for(f"INSERT INTO {table}_{name} ")) == 1
+    assert batch.parameters_for("DELETE FROM") == []
+
+    [logged] = batch.parameters_for(f"INSERT INTO {table}_changes ")
+    assert logged[2:] == ["contract_001", None, None, "Supply Agreement", 1000.0, CONTRACT_CHANGE_LOG_TTL_SECONDS]
+    assert batch.parameters_for(f"INSERT INTO {table}_supplier_versions ") == [["Acme", change["changed_at"]]]
+    assert change["old_type"] is None and change["new_type"] == "Supply Agreement"
+    assert change["suppliers"] == ["Acme"]
+
+def test_moving_a_contract_removes_rows_under_its_previous_keys(session):
+    session.on("SELECT id, supplier_name, contract_type, value FROM", [
+        {"id": "contract_001", "supplier_name": "Old Supplier", "contract_type": "Service Agreement", "value": 50_000.0}
+    ])
+    contract = {**contract_row(1, value=2_000_000.0), "terms": None, "clauses": None, "risks": None, "opportunities": None}
+
+    change = run(session, lambda repository: repository.save_contract(contract))
+
+    batch = session.batches[0]
+    table = "default_keyspace.contracts"
+    assert batch.parameters_for(f"DELETE FROM {table}_by_supplier ") == [["Old Supplier", "Service Agreement", 50_000.0, "contract_001"]]
+    assert batch.parameters_for(f"DELETE FROM {table}_by_type ") == [["Service Agreement", 50_000.0, "contract_001"]]
+    assert len(batch.parameters_for(f"DELETE FROM {table}_by_value ")) == 1
+    assert [row[0] for row in batch.parameters_for(f"INSERT INTO {table}_supplier_versions ")] == ["Old Supplier", "Acme"]
+    assert (change["old_type"], change["old_value"], change["new_value"]) == ("Service Agreement", 50_000.0, 2_000_000.0)
+
+def test_deleting_a_missing_contract_writes_nothing(session):
+    change = run(session, lambda repository: repository.delete_contract("contract_404"))
+
+    assert change is None
+    assert session.batches == []
+
+def test_delete_logs_the_removed_type_and_value(session):
+    session.on("SELECT id, supplier_name, contract_type, value FROM", [
+        {"id": "contract_001", "supplier_name": "Acme", "contract_type": None, "value": None}
+    ])
+
+    change = run(session, lambda repository: repository.delete_contract("contract_001"))
+
+    batch = session.batches[0]
+    assert batch.parameters_for("DELETE FROM default_keyspace.contracts WHERE") == [["contract_001"]]
+    # A null type is stored as "" in the query-table keys
+    assert batch.parameters_for("DELETE FROM default_keyspace.contracts_by_type ") == [["", 0.0, "contract_001"]]
+    assert (change["old_type"], change["new_type"]) == ("", None)
+
+def test_changes_are_read_from_every_day_partition_since(session):
+    changed_at = contract_repository.uuid_from_time(time.time())
+    session.on("_changes WHERE", lambda values: [{"changed_at": changed_at, "id": values[0]}])
+    since = time.time() - 2 * 86400
+
+    changes = run(session, lambda repository: repository.get_changes_since(since))
+
+    today = datetime.now(timezone.utc).date()
+    days = [(today - timedelta(days=offset)).strftime("%Y-%m-%d") for offset in (2, 1, 0)]
+    reads = reads_of(session, "_changes WHERE")
+    assert [values[0] for values in reads] == days
+    assert [change["id"] for change in changes] == days
+    assert unix_time_from_uuid1(reads[0][1]) == pytest.approx(since, abs=0.001)
+
+def test_driver_errors_surface_as_contract_store_errors(session):
+    session.error = RuntimeError("coordinator timed out")
+
+    with pytest.raises(ContractStoreError, match="coordinator timed out"):
+        run(session, lambda repository: repository.get_by_supplier("Acme"))
+
+    assert contract_repository.get_contract_store_stats()["inFlight"] == 0
+
+def base_row(number, **overrides):
+    # The rebuild scans raw columns, so map columns arrive as dicts
+    row = contract_row(number, **overrides)
+    for field in CONTRACT_FIELDS[8:]:
+        row[field] = json.loads(row[field])
+    return row
+
+def test_rebuild_pages_the_base_table_and_deletes_stale_rows(session, monkeypatch):
+    monkeypatch.setattr(contract_repository, "CASSANDRA_FETCH_SIZE", 1)
+    table = "default_keyspace.contracts"
+    session.on(f"{', '.join(CONTRACT_FIELDS)} FROM {table}", [base_row(1), base_row(2, supplier_name="Beta")])
+    session.on(f"value_key, id FROM {table}_by_supplier", [
+        {"supplier_name": "Acme", "contract_type": "Supply Agreement", "value_key": 1000.0, "id": "contract_001"},
+        # Moved to Acme, and deleted, without their query-table rows being removed
+        {"supplier_name": "Old Supplier", "contract_type": "Supply Agreement", "value_key": 1000.0, "id": "contract_001"},
+        {"supplier_name": "Gone Supplier", "contract_type": "", "value_key": 0.0, "id": "contract_003"}
+    ])
+    session.on("SELECT id, supplier_name, contract_type, value FROM", lambda values: [
+        {"id": "contract_001", "supplier_name": "Acme", "contract_type": "Supply Agreement", "value": 1000.0}
+    ] if values == ["contract_001"] else [])
+
+    result = run(session, lambda repository: repository.rebuild_query_tables())
+
+    assert result == {"rows": 2, "staleRowsDeleted": 2, "suppliers": 4}
+    # One page per contract, so the scan never held the whole table
+    [scan] = [future for future in session.futures if future.query.endswith(f"{', '.join(CONTRACT_FIELDS)} FROM {table}")]
+    assert scan.fetched == 2
+    assert sum(len(batch.parameters_for(f"INSERT INTO {table}_by_supplier ")) for batch in session.batches) == 2
+    assert sorted(reads_of(session, f"DELETE FROM {table}_by_supplier ")) == [
+        ["Gone Supplier", "", 0.0, "contract_003"],
+        ["Old Supplier", "Supply Agreement", 1000.0, "contract_001"]
+    ]
+    bumped = reads_of(session, f"INSERT INTO {table}_supplier_versions ")
+    assert sorted(values[0] for values in bumped) == ["Acme", "Beta", "Gone Supplier", "Old Supplier"]
+    assert len({values[1] for values in bumped}) == 1
+
+def test_reads_scan_the_base_table_until_the_query_tables_are_backfilled(session, monkeypatch):
+    monkeypatch.setattr(contract_repository, "CONTRACT_QUERY_TABLES_AUTO_CREATE", False)
+    table = "default_keyspace.contracts"
+    session.on(f"SELECT id FROM {table} LIMIT 1", [{"id": "contract_001"}])
+    session.on(f"AS opportunities FROM {table}", [
+        contract_row(1),
+        contract_row(2, contract_type="Service Agreement", value=2_000_000.0),
+        contract_row(3, supplier_name="Beta", value=5000.0)
+    ])
+
+    async def scenario(repository):
+        ready = repository.query_tables_ready
+        by_supplier = await repository.get_by_supplier("Acme")
+        by_type = await repository.execute_plan(plan_contract_search({"contract_type": "Supply Agreement", "min_value": "2000"}))
+        by_value = await repository.execute_plan(plan_contract_search({"min_value": "1000000"}))
+        return ready, by_supplier, by_type, by_value
+
+    ready, by_supplier, by_type, by_value = run(session, scenario)
+
+    assert ready is False
+    assert [contract.id for contract in by_supplier] == ["contract_001", "contract_002"]
+    assert [contract.id for contract in by_type] == ["contract_003"]
+    assert [contract.id for contract in by_value] == ["contract_002"]
+    assert reads_of(session, "_by_supplier WHERE") == []
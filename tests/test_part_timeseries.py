@@ -0,0 +1,44 @@
+from datetime import datetime
+import pytest
+from app.services.part_timeseries import MONTH_INDEX, MONTHS, PRICE_COLUMNS, current_price, to_series
+
+def baseline_current_pricing(data, now):
+    """
+    The row-by-row lookup extract_current_pricing used before the NumPy rewrite
+    """
+    latest_price = None
+    latest_price_date = None
+    for month in range(now.month):
+        price = data.get(f"price{MONTHS[month]}2025")
+        if price and price > 0:
+            latest_price = price
+            latest_price_date = f"{MONTHS[month]}2025"
+    if not latest_price:
+        for month in range(11, -1, -1):
+            price = data.get(f"price{MONTHS[month]}2024")
+            if price and price > 0:
+                latest_price = price
+                latest_price_date = f"{MONTHS[month]}2024"
+                break
+    return latest_price, latest_price_date
+
+SAMPLE_ROWS = [
+    # A 2025 actual, then a forecast later in the year
+    {"pricemar2025": 12.5, "pricenov2025": 99.0, "pricedec2024": 11.0},
+    # No 2025 price yet: the last 2024 price
+    {"pricejun2024": 10.0, "priceoct2024": 10.5, "pricejan2023": 9.0},
+    # Only 2023 prices: no current price
+    {"pricejan2023": 9.0, "pricedec2023": 9.5},
+    # Zero and missing prices are skipped
+    {"pricejan2025": 0, "pricefeb2025": None, "pricejul2024": 8.25},
+    {}
+]
+
+@pytest.mark.parametrize("now", [datetime(2025, 1, 15), datetime(2025, 4, 1), datetime(2025, 10, 31), datetime(2026, 10, 17)])
+def test_current_price_matches_the_row_by_row_lookup(now):
+    values, positions = current_price(to_series(SAMPLE_ROWS, PRICE_COLUMNS), now)
+
+    for row, value, position in zip(SAMPLE_ROWS, values, positions):
+        expected_price, expected_date = baseline_current_pricing(row, now)
+        assert (None if position < 0 else float(value)) == expected_price
+        assert (MONTH_INDEX[position] if position >= 0 else None) == expected_date
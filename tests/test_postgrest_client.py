@@ -0,0 +1,95 @@
+import asyncio
+from urllib.parse import parse_qsl
+import httpx
+import pytest
+from app.services import postgrest_client, supabase_service
+from app.services.postgrest_client import (
+    close_postgrest_client,
+    in_filter,
+    open_postgrest_client,
+    select,
+    select_all
+)
+from app.utils.exceptions import PostgRESTError
+
+class StubPostgREST:
+    """
+    In-process PostgREST stand-in: serves MASTER_FILE rows with limit/offset and PartNumber in.() filters
+    """
+
+    def __init__(self, rows, status_code=200):
+        self.rows = rows
+        self.status_code = status_code
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        params = parse_qsl(request.url.query.decode())
+        self.requests.append(params)
+        if self.status_code >= 400:
+            return httpx.Response(self.status_code, text="upstream failure")
+
+        rows = self.rows
+        for column, value in params:
+            if column == "PartNumber" and value.startswith("in.("):
+                wanted = {item.strip('"') for item in value[4:-1].split(",")}
+                rows = [row for row in rows if row["PartNumber"] in wanted]
+
+        query = dict(params)
+        offset = int(query.get("offset", 0))
+        limit = int(query["limit"]) if "limit" in query else len(rows)
+        return httpx.Response(200, json=rows[offset:offset + limit])
+
+def run_with_stub(stub, scenario):
+    async def main():
+        open_postgrest_client(base_url="http://postgrest.test", transport=httpx.MockTransport(stub))
+        try:
+            return await scenario()
+        finally:
+            await close_postgrest_client()
+    return asyncio.run(main())
+
+def part_rows(count):
+    return [{"PartNumber": f"P{number:04d}", "suppliername": "Acme"} for number in range(count)]
+
+def test_select_all_reads_pages_until_a_short_page():
+    stub = StubPostgREST(part_rows(2500))
+
+    rows = run_with_stub(stub, lambda: select_all("MASTER_FILE", "PartNumber, suppliername", page_size=1000))
+
+    assert [row["PartNumber"] for row in rows] == [f"P{number:04d}" for number in range(2500)]
+    assert [dict(params)["offset"] for params in stub.requests] == ["0", "1000", "2000"]
+    assert all(dict(params)["order"] == "PartNumber" for params in stub.requests)
+    assert dict(stub.requests[0])["select"] == "PartNumber,suppliername"
+
+def test_select_all_stops_after_an_exactly_full_last_page():
+    stub = StubPostgREST(part_rows(2000))
+
+    rows = run_with_stub(stub, lambda: select_all("MASTER_FILE", page_size=1000))
+
+    assert len(rows) == 2000
+    assert len(stub.requests) == 3
+
+def test_select_raises_postgrest_error_with_status():
+    stub = StubPostgREST([], status_code=503)
+
+    with pytest.raises(PostgRESTError) as raised:
+        run_with_stub(stub, lambda: select("MASTER_FILE", filters=[("PartNumber", "eq.P0001")]))
+
+    assert raised.value.status_code == 503
+    assert postgrest_client.get_postgrest_stats()["inFlight"] == 0
+
+def test_in_filter_quotes_values():
+    assert in_filter(["A1", 'B"2', "C,3", "D\\4"]) == 'in.("A1","B\\"2","C,3","D\\\\4")'
+
+def test_parts_lookup_chunks_in_filters(monkeypatch):
+    monkeypatch.setattr(supabase_service, "PARTS_LOOKUP_CHUNK_SIZE", 3)
+    stub = StubPostgREST(part_rows(10))
+    requested = ["P0001", "P0002", "P0003", "P0004", "P0005", "P0006", "P0007", "P0002", "MISSING"]
+
+    parts = run_with_stub(stub, lambda: supabase_service.get_parts_information(requested, profile="minimal"))
+
+    assert sorted(parts) == ["P0001", "P0002", "P0003", "P0004", "P0005", "P0006", "P0007"]
+    filters = [dict(params)["PartNumber"] for params in stub.requests]
+    # Duplicates are dropped before chunking: 8 distinct part numbers in chunks of 3
+    assert sorted(value.count(",") + 1 for value in filters) == [2, 3, 3]
+    assert all(value.startswith("in.(") for value in filters)